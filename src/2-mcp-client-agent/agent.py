@@ -5,6 +5,7 @@ from mcp import ClientSession
 from langchain_mcp_adapters.tools import load_mcp_tools
 from langgraph.prebuilt import create_react_agent
 from langchain_openai import ChatOpenAI
+from mcp_tool_compaction import ToolCompactor
 
 load_dotenv()
 
@@ -16,10 +17,14 @@ async def main() -> None:
             tools = await load_mcp_tools(session)
             print(f"✅ Connected! Found {len(tools)} tools: {[tool.name for tool in tools]}")
             
+            # Schemas are trimmed to TOOL_SCHEMA_BUDGET, if set, until the model calls the tool
+            compactor = ToolCompactor(tools)
+            print(f"Tool schemas: {compactor.report()}")
+            
             model = ChatOpenAI(model="gpt-4o", temperature=0.1)
             agent = create_react_agent(
                 model=model,
-                tools=tools,
+                tools=compactor.tools(),
                 prompt="You are a helpful assistant. Use the available tools to help users with their requests."
             )
             
@@ -28,20 +33,31 @@ async def main() -> None:
                 
                 # Exit condition
                 if user_input.lower() in ["exit", "quit", "bye"]:
+                    print(f"Tool schemas: {compactor.report()}")
                     print("\n🤖: Goodbye!")
                     break
                 
                 if not user_input:
                     continue
                 
+                if compactor.changed():
+                    agent = create_react_agent(
+                        model=model,
+                        tools=compactor.tools(),
+                        prompt="You are a helpful assistant. Use the available tools to help users with their requests."
+                    )
+                
                 print("🤖: ", end="", flush=True)
                 async for token, metadata in agent.astream(
                     {"messages": [{"role": "user", "content": user_input}]},
+                    # The timer counts model calls and their latency for the report
+                    config={"callbacks": [compactor.timer]},
                     stream_mode="messages"
                 ):
                     if not getattr(token, "tool_call_id", None):
                         print(token.content, end="", flush=True)
                         await asyncio.sleep(0.08)
+                compactor.record_turn()
                                     
 
 if __name__ == "__main__":
@@ -1,7 +1,9 @@
 from mcp.server.fastmcp import FastMCP
 import requests
+from mcp_logging import get_logger
 
 mcp = FastMCP("WeatherStockMCP")
+log = get_logger("resources")
 
 @mcp.resource("config://app")
 def get_config() -> str:
@@ -21,12 +23,10 @@ def get_tag() -> str:
 @mcp.resource("report://{name}")
 def get_report(name: str) -> str:
     """Get a report for a given name."""
-    print(name)
     url = f"http://localhost:9000/mybucket/{name}"
-    print(f"url: {url}")
     response = requests.get(url)
-    print(f"response.status_code: {response.status_code}")
-    print(f"response.text: {response.text}")
+    log.info("get_report", name=name, url=url, status_code=response.status_code)
+    log.debug("get_report body", name=name, text=response.text)
     return response.text
 
 
@@ -2,8 +2,10 @@ from fastmcp import FastMCP, Context
 import yfinance as yf
 import requests
 import anyio
+from mcp_logging import get_logger
 
 mcp = FastMCP("WeatherStockMCP")
+log = get_logger("context")
 
 @mcp.tool()
 async def get_weather(latitude: float, longitude: float, ctx: Context) -> str:
@@ -24,11 +26,7 @@ async def get_stock_price(symbol: str, ctx: Context) -> str:
     """Get the current stock price of a given symbol."""
     try:
         await ctx.info(f"Calling stock provider")
-        print(f"ctx.request_context: {ctx.request_context}")
-        
-        # request = ctx.request_context.request
-        # print(f"request: {request}")
-        # print(f"request.scope: {request.scope}")
+        log.debug("get_stock_price", symbol=symbol, request_id=ctx.request_id)
         
         stock_data = yf.Ticker(symbol)
         last_price = stock_data.fast_info.last_price
@@ -7,7 +7,7 @@ from mcp.client.stdio import stdio_client
 from langchain_mcp_adapters.tools import load_mcp_tools
 from langchain_openai import ChatOpenAI
 from langgraph.prebuilt import create_react_agent
-from langgraph.checkpoint.memory import InMemorySaver
+from mcp_history import BoundedSaver
 
 load_dotenv()
 
@@ -35,7 +35,8 @@ async def main():
                 print(f"  - {tool.name}: {tool.description}")
             
             model = ChatOpenAI(model="gpt-4o", temperature=0.1)
-            checkpointer = InMemorySaver()
+            # Recent turns verbatim, older ones summarized; HISTORY_DB persists them
+            checkpointer = BoundedSaver()
             
             agent = create_react_agent(
                 model=model,
@@ -44,7 +45,8 @@ async def main():
                 checkpointer=checkpointer
             )
             
-            config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+            # Set HISTORY_THREAD_ID to resume a conversation saved in HISTORY_DB
+            config = {"configurable": {"thread_id": os.getenv("HISTORY_THREAD_ID") or str(uuid.uuid4())}}
             
             while True:
                 user_input = input("\n🙂: ")
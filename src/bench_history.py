@@ -0,0 +1,118 @@
+"""Prompt size, turn latency and memory over long sessions: InMemorySaver vs BoundedSaver.
+
+    python src/bench_history.py --turns 500
+
+A react agent runs on a local fake chat model, so the numbers are prompt size
+and LangGraph/checkpointer overhead, not model time. Every fourth turn calls a
+tool. Prompt size is the characters the model is sent per call, divided by 4
+as a rough token count. The SQLite run also times resuming the thread from the
+file in a fresh checkpointer.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from typing import List
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.prebuilt import create_react_agent
+from mcp_history import BoundedSaver
+
+
+@tool
+def view_cart() -> str:
+    """View the current shopping cart."""
+    return "Your cart contains: {'apple': 3, 'pear': 1, 'bread': 2}"
+
+
+class FakeChatModel(BaseChatModel):
+    """Answers with a fixed-size reply, or a tool call when the user asks for the cart"""
+
+    prompt_chars: List[int] = []
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        self.prompt_chars.append(sum(len(str(m.content)) for m in messages))
+        last = messages[-1]
+        if "cart" in str(last.content) and not isinstance(last, ToolMessage):
+            reply = AIMessage(content="", tool_calls=[{"name": "view_cart", "args": {}, "id": f"call-{len(self.prompt_chars)}"}])
+        else:
+            reply = AIMessage(content="Here is a reasonably detailed answer to your question. " * 6)
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+
+async def session(checkpointer, turns: int, thread_id: str = "bench"):
+    model = FakeChatModel(prompt_chars=[])
+    agent = create_react_agent(model=model, tools=[view_cart], prompt="You are a helpful assistant.", checkpointer=checkpointer)
+    config = {"configurable": {"thread_id": thread_id}}
+    latencies, prompt_tokens = [], []
+    for turn in range(turns):
+        text = "What is in my cart right now?" if turn % 4 == 3 else f"Question {turn}: tell me something useful about groceries."
+        calls = len(model.prompt_chars)
+        start = time.perf_counter()
+        await agent.ainvoke({"messages": [{"role": "user", "content": text}]}, config)
+        latencies.append((time.perf_counter() - start) * 1000)
+        prompt_tokens.append(max(model.prompt_chars[calls:]) // 4)
+    return agent, latencies, prompt_tokens
+
+
+def stored_bytes(checkpointer) -> int:
+    return sum(len(blob[1]) for blob in checkpointer.blobs.values()) + sum(
+        len(saved[0][1]) + len(saved[1][1]) for ns in checkpointer.storage.values()
+        for checkpoints in ns.values() for saved in checkpoints.values()
+    )
+
+
+def report(name: str, latencies: List[float], prompt_tokens: List[int], checkpointer):
+    marks = " ".join(f"t{n}={prompt_tokens[n - 1]}" for n in (10, 100, len(prompt_tokens)) if n <= len(prompt_tokens))
+    last = latencies[-50:]
+    print(
+        f"{name:<24} prompt tokens {marks} mean={statistics.mean(prompt_tokens):.0f}"
+        f" | turn p50 {statistics.median(latencies):5.1f} ms, last 50 p50 {statistics.median(last):5.1f} ms"
+        f" | stored {stored_bytes(checkpointer) / 1024:8.1f} KiB"
+    )
+
+
+async def main(turns: int, window: int):
+    _, latencies, prompt_tokens = await session(saver := InMemorySaver(), turns)
+    report("InMemorySaver", latencies, prompt_tokens, saver)
+
+    _, latencies, prompt_tokens = await session(saver := BoundedSaver(window_turns=window), turns)
+    report(f"BoundedSaver(window={window})", latencies, prompt_tokens, saver)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "history.sqlite3")
+        _, latencies, prompt_tokens = await session(saver := BoundedSaver(path=path, window_turns=window), turns)
+        report("BoundedSaver + SQLite", latencies, prompt_tokens, saver)
+        print(f"{'':<24} {saver.stats('bench')}")
+
+        start = time.perf_counter()
+        resumed = BoundedSaver(path=path, window_turns=window)
+        load_ms = (time.perf_counter() - start) * 1000
+        state = await create_react_agent(FakeChatModel(prompt_chars=[]), [view_cart], checkpointer=resumed).aget_state(
+            {"configurable": {"thread_id": "bench"}}
+        )
+        print(
+            f"{'':<24} resume from {os.path.getsize(path) / 1024:.1f} KiB file in {load_ms:.1f} ms,"
+            f" {len(state.values['messages'])} messages restored"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=500)
+    parser.add_argument("--window", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.window))
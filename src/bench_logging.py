@@ -0,0 +1,70 @@
+"""Per-call overhead of tool logging: print() vs the shared queue-backed logger.
+
+    python src/bench_logging.py --calls 100000
+
+The tool body is a cart update with the logging add_to_cart used to do.
+Everything is written to /dev/null, so the numbers are the cost paid on the
+calling thread, not terminal or pipe throughput (which only makes print worse).
+"""
+import argparse
+import contextlib
+import os
+import time
+import mcp_logging
+
+HEADERS = {"host": "localhost:8000", "accept": "application/json, text/event-stream",
+           "content-type": "application/json", "mcp-session-id": "5b0c0f6a9d3e4f0c8d1e2f3a4b5c6d7e"}
+
+
+def tool_with_print(cart: dict, item: str, quantity: int):
+    print("========== add_to_cart ==========")
+    print(f"request.headers: {HEADERS}")
+    print(f"cart before: {cart}")
+    cart[item] = cart.get(item, 0) + quantity
+    print(f"cart after: {cart}")
+
+
+def tool_with_logger(log, cart: dict, item: str, quantity: int):
+    cart[item] = cart.get(item, 0) + quantity
+    log.info("add_to_cart", session_id=HEADERS["mcp-session-id"], item=item, quantity=quantity, cart_size=len(cart))
+
+
+def bare_tool(cart: dict, item: str, quantity: int):
+    cart[item] = cart.get(item, 0) + quantity
+
+
+def run(call, calls: int) -> float:
+    """Microseconds per call"""
+    cart = {}
+    start = time.perf_counter()
+    for i in range(calls):
+        call(cart, f"item-{i % 20}", 1)
+    return (time.perf_counter() - start) * 1e6 / calls
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=100_000)
+    args = parser.parse_args()
+
+    results = []
+    with open(os.devnull, "w") as devnull:
+        results.append(("no logging", run(bare_tool, args.calls)))
+        with contextlib.redirect_stdout(devnull):
+            results.append(("print()", run(tool_with_print, args.calls)))
+        modes = [("logger, level WARNING", "WARNING", 1.0), ("logger, INFO", "INFO", 1.0),
+                 ("logger, INFO sampled 10%", "INFO", 0.1)]
+        for label, level, rate in modes:
+            mcp_logging.configure(level=level, sample_rate=rate, stream=devnull, queue_size=args.calls + 1)
+            log = mcp_logging.get_logger("bench")
+            results.append((label, run(lambda cart, item, quantity: tool_with_logger(log, cart, item, quantity), args.calls)))
+            mcp_logging.shutdown()
+
+    baseline = results[0][1]
+    print(f"{'mode':<28}{'us/call':>10}{'overhead us':>14}")
+    for label, per_call_us in results:
+        print(f"{label:<28}{per_call_us:>10.2f}{per_call_us - baseline:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Benchmark search_tools' index on a registry with 1k-10k mounted tools.
+
+    python bench_tool_search.py --sizes 1000,10000
+
+Synthetic tools (see mcp_tool_catalog) are spread over one mounted server per
+domain, the way the registry mounts weather and finance. The benchmark reports
+the cold index build, listing the registry's tools plus a no-op sync (what
+search_tools pays once per TOOL_SEARCH_SYNC_INTERVAL), and a sync after 1%
+more tools register. It also gives p50/p99 search latency and recall@k for
+BM25, vector and hybrid ranking, and the size of a search result next to the
+full list_tools catalog.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import List, Tuple
+
+from fastmcp import FastMCP
+from fastmcp.tools import Tool
+from mcp_tool_catalog import ACTIONS, DOMAINS, combinations
+from tool_search import ToolSearchIndex, local_embed
+
+
+def run_tool(record_id: str, note: str = "") -> str:
+    return "ok"
+
+
+def synthetic_tools(count: int, seed: int = 0) -> List[Tuple[str, Tool]]:
+    """(domain, tool) pairs; the tools share one function and differ in name, description and schema"""
+    base = Tool.from_function(run_tool)
+    tools = []
+    for domain, obj, action in combinations(count, seed):
+        parameters = {
+            "type": "object",
+            "properties": {
+                f"{obj}_id": {"type": "string", "description": f"ID of the {obj}"},
+                "note": {"type": "string"},
+            },
+            "required": [f"{obj}_id"],
+        }
+        tools.append((domain, base.model_copy(update={
+            "name": f"{action}_{obj}",
+            "description": f"{action.capitalize()} a {obj} in the {domain} system.",
+            "parameters": parameters,
+        })))
+    return tools
+
+
+def queries(keys: List[str], count: int, seed: int = 1) -> List[Tuple[str, str]]:
+    """A query per sampled tool: the action in other words half the time, the object in the plural"""
+    rng = random.Random(seed)
+    out = []
+    for key in rng.sample(keys, min(count, len(keys))):
+        domain, action, obj = key.split("_", 2)
+        verb = action if rng.random() < 0.5 else rng.choice(ACTIONS[action])
+        out.append((f"{verb} {obj}s in {domain}", key))
+    return out
+
+
+def percentile(samples: List[float], p: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+async def run(size: int, k: int, query_count: int):
+    tools = synthetic_tools(int(size * 1.01))
+    registry = FastMCP("BenchRegistry")
+    servers = {domain: FastMCP(domain) for domain in DOMAINS}
+    for domain, server in servers.items():
+        registry.mount(server, prefix=domain)
+    for domain, tool in tools[:size]:
+        servers[domain].add_tool(tool)
+
+    index = ToolSearchIndex(local_embed)
+    start = time.perf_counter()
+    catalog = await registry.get_tools()
+    get_tools_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    index.sync(catalog)
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    catalog = await registry.get_tools()
+    start = time.perf_counter()
+    index.sync(catalog)
+    noop_ms = (time.perf_counter() - start) * 1000
+
+    for domain, tool in tools[size:]:
+        servers[domain].add_tool(tool)
+    catalog = await registry.get_tools()
+    start = time.perf_counter()
+    added, _ = index.sync(catalog)
+    incremental_ms = (time.perf_counter() - start) * 1000
+
+    print(
+        f"{size:>6} tools | get_tools {get_tools_ms:7.1f} ms | cold sync {cold_ms:8.1f} ms"
+        f" | no-op sync {noop_ms:6.1f} ms | +{added} tools sync {incremental_ms:6.1f} ms"
+    )
+    workload = queries(list(catalog), query_count)
+    for mode in ("bm25", "vector", "hybrid"):
+        latencies, hits = [], 0
+        for query, target in workload:
+            start = time.perf_counter()
+            keys = [key for key, _ in index.search(query, k, mode)]
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += target in keys
+        print(
+            f"{'':>13}{mode:>7}: p50 {statistics.median(latencies):6.3f} ms p99 {percentile(latencies, 0.99):6.3f} ms"
+            f" | recall@{k} {hits / len(workload):.2f}"
+        )
+
+    mcp_tools = await registry._list_tools()
+    catalog_bytes = len(json.dumps([tool.to_mcp_tool().model_dump(mode="json") for tool in mcp_tools]))
+    result_bytes = len(json.dumps([index.describe(key) for key, _ in index.search(workload[0][0], k)]))
+    print(f"{'':>13}list_tools {catalog_bytes / 1024:8.1f} KiB vs search_tools(k={k}) {result_bytes / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+    for size in (int(size) for size in args.sizes.split(",")):
+        asyncio.run(run(size, args.k, args.queries))
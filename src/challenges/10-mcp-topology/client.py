@@ -21,6 +21,13 @@ async def main():
             stock_result = await session.call_tool("finance_get_stock_price", {"symbol": "AAPL"})
             print("\nStock Price:", stock_result)
             
+            # Ask the server for the matching tool instead of ranking the whole catalog locally
+            search_result = await session.call_tool("search_tools", {"query": "current stock price", "k": 1})
+            best_tool = search_result.structuredContent["result"][0]
+            print("\nsearch_tools:", best_tool)
+            stock_result = await session.call_tool(best_tool["name"], {"symbol": "MSFT"})
+            print("\nStock Price:", stock_result)
+            
             # first_name = await session.call_tool("weather_nested_get_first_name")
             # print("\nFirst Name:", first_name)
 
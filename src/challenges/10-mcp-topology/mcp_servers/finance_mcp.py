@@ -1,15 +1,17 @@
 from fastmcp import FastMCP
 import yfinance as yf
+from mcp_logging import get_logger
 
 finance_mcp = FastMCP("FinanceMCP")
+log = get_logger("finance")
 
 @finance_mcp.tool("get_stock_price")
 def get_stock_price(symbol: str) -> str:
     """Get the current stock price of a given symbol."""
-    print(f"symbol: {symbol}")
+    log.debug("get_stock_price", symbol=symbol)
     stock_data = yf.Ticker(symbol)
     last_price = stock_data.fast_info.last_price
-    print(f"last_price: {last_price}")
+    log.info("get_stock_price done", symbol=symbol, last_price=last_price)
     return f"The current price of {symbol} is ${last_price}."
 
 
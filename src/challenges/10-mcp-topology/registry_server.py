@@ -2,13 +2,36 @@ from fastmcp import FastMCP
 from fastmcp.server.server import MountedServer
 import yfinance as yf
 import requests
-from typing import Any
+from typing import Annotated, Any
+from pydantic import BaseModel, Field
 from mcp_servers.weather_mcp import weather_mcp
 from mcp_servers.nested_server import nested_mcp
 from mcp_servers.finance_mcp import finance_mcp
+from tool_search import ToolSearchIndex, get_embed
 
 
 registry_mcp = FastMCP("RegistryServer")
+search_index = ToolSearchIndex(get_embed())
+
+class ToolMatch(BaseModel):
+    name: str = Field(description="Tool name to pass to call_tool")
+    description: str
+    input_schema: dict[str, Any] = Field(description="JSON schema of the tool's arguments")
+    score: float = Field(description="Relevance; higher is better")
+
+@registry_mcp.tool("search_tools")
+async def search_tools(
+    query: str,
+    k: Annotated[int, Field(ge=1, le=50, description="Number of tools to return")] = 5,
+) -> list[ToolMatch]:
+    """Find the k tools that best match a task, with their input schemas, instead of listing every tool."""
+    # Tools mounted or changed since the last sync are indexed one by one
+    if search_index.stale():
+        search_index.sync(await registry_mcp.get_tools())
+    return [
+        ToolMatch(**search_index.describe(key), score=round(score, 4))
+        for key, score in search_index.search(query, k)
+    ]
 
 # @registry_mcp.tool("get_mounted_servers")
 # def list_mounted_servers() -> list[MountedServer]:
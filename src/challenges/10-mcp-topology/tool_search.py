@@ -0,0 +1,265 @@
+"""In-process search index over a FastMCP server's tools, for a search_tools meta-tool.
+
+With thousands of mounted tools, the list_tools catalog alone is larger than
+the conversation. Clients can instead ask the server for the few tools that
+match a query:
+
+    index = ToolSearchIndex(get_embed())
+    index.sync(await registry_mcp.get_tools())
+    index.search("current price of a stock", k=5)
+
+Two rankings are fused with reciprocal rank fusion: BM25 over the words in
+tool names, descriptions and parameter names, and cosine similarity between
+embeddings of the same text. sync() diffs the live tool list against the
+index, so registering or changing a tool only indexes that tool.
+
+- TOOL_SEARCH_EMBEDDINGS      local, openai or off (default local)
+- TOOL_SEARCH_SYNC_INTERVAL   seconds between syncs against the live tool list (default 5)
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import time
+from collections import Counter, defaultdict
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+Embed = Callable[[List[str]], Sequence[Sequence[float]]]
+
+
+def tokenize(text: str) -> List[str]:
+    # get_stock_price / getStockPrice / "stock prices" all give the same words
+    text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text)
+    return [
+        word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+        for word in re.findall(r"[a-z0-9]+", text.lower())
+    ]
+
+
+def local_embed(texts: List[str], dim: int = 256) -> np.ndarray:
+    """Hashed character trigrams of each word: no model and no network.
+
+    Trigrams let "stocks" find "stock" and survive typos that BM25's exact
+    words miss; a real embedding model can be passed in for semantic matches.
+    """
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in tokenize(text):
+            padded = f" {word} "
+            for i in range(len(padded) - 2):
+                digest = hashlib.blake2b(padded[i:i + 3].encode(), digest_size=4).digest()
+                vectors[row, int.from_bytes(digest, "little") % dim] += 1.0
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def openai_embed(texts: List[str]) -> List[List[float]]:
+    from openai import OpenAI
+    response = OpenAI().embeddings.create(model="text-embedding-3-small", input=texts)
+    return [item.embedding for item in response.data]
+
+
+def get_embed() -> Optional[Embed]:
+    """Embedding backend selected by TOOL_SEARCH_EMBEDDINGS; None disables the vector ranking"""
+    backend = os.getenv("TOOL_SEARCH_EMBEDDINGS", "local")
+    if backend == "local":
+        return local_embed
+    if backend == "openai":
+        return openai_embed
+    if backend == "off":
+        return None
+    raise ValueError(f"Unknown TOOL_SEARCH_EMBEDDINGS: {backend!r}")
+
+
+def tool_text(tool) -> str:
+    properties = (tool.parameters or {}).get("properties", {})
+    parts = [tool.key, tool.description or ""]
+    for name, schema in properties.items():
+        parts.append(name)
+        parts.append(schema.get("description", ""))
+    return " ".join(parts)
+
+
+def tool_fingerprint(tool) -> str:
+    payload = json.dumps({"description": tool.description, "parameters": tool.parameters}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class BM25:
+    """BM25 over an inverted index that supports adding and removing single documents"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.lengths: Dict[str, int] = {}
+        self.total_length = 0
+
+    def add(self, key: str, text: str):
+        words = tokenize(text)
+        for word, count in Counter(words).items():
+            self.postings[word][key] = count
+        self.lengths[key] = len(words)
+        self.total_length += len(words)
+
+    def remove(self, key: str, text: str):
+        for word in set(tokenize(text)):
+            postings = self.postings.get(word)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self.postings[word]
+        self.total_length -= self.lengths.pop(key, 0)
+
+    def search(self, query: str, limit: int) -> List[Tuple[str, float]]:
+        if not self.lengths:
+            return []
+        documents = len(self.lengths)
+        avg_length = self.total_length / documents
+        scores: Dict[str, float] = defaultdict(float)
+        for word in set(tokenize(query)):
+            postings = self.postings.get(word)
+            # Words in most tools ("a", "the", "get") score next to nothing but cost a full scan
+            if not postings or len(postings) > documents / 2:
+                continue
+            idf = math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[key] / avg_length)
+                scores[key] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+
+
+class VectorIndex:
+    """Unit vectors in one growable matrix; a removed row is filled with the last row"""
+
+    def __init__(self):
+        self.matrix: Optional[np.ndarray] = None
+        self.keys: List[str] = []
+        self.rows: Dict[str, int] = {}
+
+    def add(self, key: str, vector: np.ndarray):
+        if self.matrix is None:
+            self.matrix = np.zeros((64, len(vector)), dtype=np.float32)
+        elif len(self.keys) == len(self.matrix):
+            self.matrix = np.concatenate([self.matrix, np.zeros_like(self.matrix)])
+        self.rows[key] = len(self.keys)
+        self.matrix[len(self.keys)] = vector
+        self.keys.append(key)
+
+    def remove(self, key: str):
+        row = self.rows.pop(key, None)
+        if row is None:
+            return
+        last_key = self.keys.pop()
+        if last_key != key:
+            self.matrix[row] = self.matrix[len(self.keys)]
+            self.keys[row] = last_key
+            self.rows[last_key] = row
+
+    def search(self, vector: np.ndarray, limit: int) -> List[Tuple[str, float]]:
+        if not self.keys or limit < 1:
+            return []
+        scores = self.matrix[:len(self.keys)] @ vector
+        limit = min(limit, len(self.keys))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [(self.keys[row], float(scores[row])) for row in top]
+
+
+class ToolSearchIndex:
+    def __init__(
+        self,
+        embed: Optional[Embed] = None,
+        exclude: Sequence[str] = ("search_tools",),
+        sync_interval: Optional[float] = None,
+    ):
+        self.embed = embed
+        self.exclude = set(exclude)
+        self.sync_interval = float(os.getenv("TOOL_SEARCH_SYNC_INTERVAL", 5.0)) if sync_interval is None else sync_interval
+        self.last_sync = float("-inf")
+        self.bm25 = BM25()
+        self.vectors = VectorIndex()
+        # key -> (parameters object, description, fingerprint, indexed text)
+        self._indexed: Dict[str, Tuple[Any, str, str, str]] = {}
+        self.syncs = 0
+        self.added = 0
+        self.removed = 0
+        self.searches = 0
+
+    def stale(self) -> bool:
+        """True once sync_interval has passed; listing thousands of mounted tools is not free"""
+        return time.monotonic() - self.last_sync >= self.sync_interval
+
+    def sync(self, tools: Dict[str, Any]) -> Tuple[int, int]:
+        """Index tools that are new or changed and drop tools that are gone; returns (added, removed)"""
+        changed = {}
+        for key, tool in tools.items():
+            if key in self.exclude:
+                continue
+            entry = self._indexed.get(key)
+            # Mounted tools are shallow copies, so an unchanged tool keeps the same
+            # parameters object and hashing its schema again can be skipped
+            if entry is not None and entry[0] is tool.parameters and entry[1] == tool.description:
+                continue
+            fingerprint = tool_fingerprint(tool)
+            if entry is not None and entry[2] == fingerprint:
+                self._indexed[key] = (tool.parameters, tool.description, fingerprint, entry[3])
+                continue
+            changed[key] = (tool, fingerprint)
+
+        gone = [key for key in self._indexed if key not in tools or key in changed]
+        for key in gone:
+            self.bm25.remove(key, self._indexed.pop(key)[3])
+            self.vectors.remove(key)
+
+        texts = {key: tool_text(tool) for key, (tool, _) in changed.items()}
+        embedded = list(self.embed(list(texts.values()))) if self.embed and texts else [None] * len(texts)
+        for (key, (tool, fingerprint)), vector in zip(changed.items(), embedded):
+            self.bm25.add(key, texts[key])
+            if vector is not None:
+                self.vectors.add(key, np.asarray(vector, dtype=np.float32))
+            self._indexed[key] = (tool.parameters, tool.description, fingerprint, texts[key])
+
+        removed = len([key for key in gone if key not in changed])
+        self.last_sync = time.monotonic()
+        self.syncs += 1
+        self.added += len(changed)
+        self.removed += removed
+        return len(changed), removed
+
+    def search(self, query: str, k: int = 5, mode: str = "hybrid") -> List[Tuple[str, float]]:
+        """Top `k` (tool key, score) pairs; mode is bm25, vector or hybrid"""
+        self.searches += 1
+        depth = max(50, k * 5)
+        lexical = self.bm25.search(query, depth) if mode in ("bm25", "hybrid") else []
+        semantic = []
+        if mode in ("vector", "hybrid") and self.embed is not None:
+            query_vector = np.asarray(self.embed([query])[0], dtype=np.float32)
+            semantic = self.vectors.search(query_vector / (np.linalg.norm(query_vector) or 1.0), depth)
+        if mode != "hybrid" or not semantic:
+            return (lexical or semantic)[:k]
+
+        # Reciprocal rank fusion: the scales of BM25 and cosine scores don't need to agree
+        fused: Dict[str, float] = defaultdict(float)
+        for ranking in (lexical, semantic):
+            for rank, (key, _) in enumerate(ranking):
+                fused[key] += 1.0 / (60 + rank)
+        return sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def describe(self, key: str) -> dict:
+        parameters, description, _, _ = self._indexed[key]
+        return {"name": key, "description": description, "input_schema": parameters}
+
+    def stats(self) -> dict:
+        return {
+            "tools": len(self._indexed),
+            "terms": len(self.bm25.postings),
+            "vectors": len(self.vectors.keys),
+            "syncs": self.syncs,
+            "added": self.added,
+            "removed": self.removed,
+            "searches": self.searches,
+        }
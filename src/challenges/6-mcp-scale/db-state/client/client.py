@@ -1,60 +1,80 @@
 import asyncio
+import os
 import uuid
 from dotenv import load_dotenv
-from mcp.client.streamable_http import streamablehttp_client
-from mcp import ClientSession
-from langchain_mcp_adapters.tools import load_mcp_tools
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
 from langgraph.prebuilt import create_react_agent
 from langchain_openai import ChatOpenAI
-from langgraph.checkpoint.memory import InMemorySaver
-from mcp.types import LoggingMessageNotificationParams
+from mcp_history import BoundedSaver
+from mcp import ClientSession
+from mcp.types import LoggingMessageNotificationParams, Tool
+from mcp_session_pool import SessionPool
 
 load_dotenv()
 
 async def logging_callback(params: LoggingMessageNotificationParams):
     print(f"\n[Server Log - {params.level.upper()}] {params.data}")
 
+def pooled_tool(pool: SessionPool, session: ClientSession, tool: Tool) -> BaseTool:
+    """LangChain tool that borrows a pooled session for each call instead of keeping `session`"""
+    langchain_tool = convert_mcp_tool_to_langchain_tool(session, tool)
+
+    async def call_tool(**arguments):
+        async with pool.acquire() as pooled:
+            return await convert_mcp_tool_to_langchain_tool(pooled, tool).coroutine(**arguments)
+
+    return langchain_tool.model_copy(update={"coroutine": call_tool})
+
 async def main():
     headers = {"X-User-ID": "user-001"}
     
-    async with streamablehttp_client("http://localhost:8080/mcp", headers=headers) as (read, write, _):
-        async with ClientSession(read, write, logging_callback=logging_callback) as session:
-            await session.initialize()
-            
-            tools = await load_mcp_tools(session)
-            print(f"✅ Connected! Available tools: {[tool.name for tool in tools]}")
-            
-            model = ChatOpenAI(model="gpt-4o", temperature=0.1)
-            checkpointer = InMemorySaver()
-            
-            agent = create_react_agent(
-                model=model,
-                tools=tools,
-                prompt="You are a task management assistant.",
-                checkpointer=checkpointer
-            )
-            
+    # Sessions are borrowed per tool call, so tool calls the model makes in
+    # parallel run on separate sessions instead of queueing on one
+    async with SessionPool("http://localhost:8080/mcp", size=int(os.getenv("MCP_POOL_SIZE", 2)),
+                           headers=headers, logging_callback=logging_callback) as pool:
+        async with pool.acquire() as session:
+            tools = [pooled_tool(pool, session, tool) for tool in (await session.list_tools()).tools]
+        print(f"✅ Connected! Available tools: {[tool.name for tool in tools]}")
+        
+        model = ChatOpenAI(model="gpt-4o", temperature=0.1)
+        # Recent turns verbatim, older ones summarized; HISTORY_DB persists them
+        checkpointer = BoundedSaver()
+        agent = create_react_agent(
+            model=model,
+            tools=tools,
+            prompt="You are a task management assistant.",
+            checkpointer=checkpointer
+        )
+        
+        while True:
             config = {"configurable": {"thread_id": str(uuid.uuid4())}}
-            
-            while True:
-                user_input = input("\n🙂: ").strip()
-                
-                if user_input.lower() in ["exit", "quit", "bye"]:
-                    print("\n🤖: Goodbye!")
-                    break
-                
-                if not user_input:
-                    continue
-                
-                print("🤖: ", end="", flush=True)
-                async for token, metadata in agent.astream(
-                    {"messages": [{"role": "user", "content": user_input}]},
-                    config=config,
-                    stream_mode="messages"
-                ):
-                    if not getattr(token, "tool_call_id", None):
-                        print(token.content, end="", flush=True)
-                        await asyncio.sleep(0.01)
+            if await converse(agent, config) != "new":
+                print(f"Session pool: {pool.stats()}")
+                break
+
+async def converse(agent, config) -> str:
+    """Chat until the user quits or types "new" to start another conversation"""
+    while True:
+        user_input = input("\n🙂: ").strip()
+        
+        if user_input.lower() in ["exit", "quit", "bye", "new"]:
+            if user_input.lower() != "new":
+                print("\n🤖: Goodbye!")
+            return user_input.lower()
+        
+        if not user_input:
+            continue
+        
+        print("🤖: ", end="", flush=True)
+        async for token, metadata in agent.astream(
+            {"messages": [{"role": "user", "content": user_input}]},
+            config=config,
+            stream_mode="messages"
+        ):
+            if not getattr(token, "tool_call_id", None):
+                print(token.content, end="", flush=True)
+                await asyncio.sleep(0.01)
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
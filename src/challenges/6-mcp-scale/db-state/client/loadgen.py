@@ -0,0 +1,188 @@
+"""Load generator for the nginx + replicas db-state deployment.
+
+    python loadgen.py --sessions 50 --duration 30
+    python loadgen.py --mix create_task=5,list_tasks=3,complete_task=1,do_task=1
+    python loadgen.py --replicas 1,2,3 --compose-file ../server/docker-compose.yml
+
+Every session is its own streamablehttp_client connection with its own
+X-User-ID and calls tools back to back, picked at random according to the
+mix weights. With --replicas, the compose stack is rescaled to each replica
+count in turn and the run is repeated to give a scaling curve.
+"""
+import argparse
+import asyncio
+import random
+import subprocess
+import time
+import uuid
+from typing import Dict, List, Optional
+import httpx
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+DEFAULT_MIX = "create_task=4,list_tasks=4,complete_task=1,do_task=1"
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for item in mix.split(","):
+        tool, _, weight = item.partition("=")
+        weights[tool.strip()] = float(weight or 1)
+    return weights
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Recorder:
+    """Latency samples and errors per tool, shared by every session of a run"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.errors: Dict[str, int] = {}
+
+    def record(self, tool: str, elapsed_ms: float, ok: bool):
+        self.samples.setdefault(tool, []).append(elapsed_ms)
+        if not ok:
+            self.errors[tool] = self.errors.get(tool, 0) + 1
+
+    def report(self, elapsed: float) -> dict:
+        tools = {
+            tool: {
+                "calls": len(values),
+                "errors": self.errors.get(tool, 0),
+                "calls_per_s": len(values) / elapsed,
+                "p50_ms": percentile(values, 50),
+                "p95_ms": percentile(values, 95),
+                "p99_ms": percentile(values, 99),
+            }
+            for tool, values in sorted(self.samples.items())
+        }
+        every_call = [value for values in self.samples.values() for value in values]
+        total = {
+            "calls": len(every_call),
+            "errors": sum(self.errors.values()),
+            "calls_per_s": len(every_call) / elapsed,
+            "p50_ms": percentile(every_call, 50) if every_call else 0.0,
+            "p95_ms": percentile(every_call, 95) if every_call else 0.0,
+            "p99_ms": percentile(every_call, 99) if every_call else 0.0,
+        }
+        return {"tools": tools, "total": total}
+
+
+async def run_session(url: str, user_id: str, mix: Dict[str, float], deadline: float,
+                      recorder: Recorder, background: bool):
+    tools, weights = list(mix), list(mix.values())
+    pending: List[str] = []
+    created = 0
+    async with streamablehttp_client(url, headers={"X-User-ID": user_id}) as (read, write, _):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            while time.monotonic() < deadline:
+                tool = random.choices(tools, weights)[0]
+                if tool in ("complete_task", "do_task") and not pending:
+                    # Nothing to finish yet, so this call creates a task instead
+                    tool = "create_task"
+                if tool == "create_task":
+                    task_name = f"task-{created}"
+                    created += 1
+                    arguments = {"task_name": task_name}
+                elif tool == "list_tasks":
+                    arguments = {"limit": 20}
+                elif tool == "do_task":
+                    arguments = {"task_name": pending.pop(0), "background": background}
+                else:
+                    arguments = {"task_name": pending.pop(0)}
+
+                start = time.perf_counter()
+                try:
+                    result = await session.call_tool(tool, arguments)
+                    ok = not result.isError
+                except Exception as e:
+                    print(f"[{user_id}] {tool} failed: {e}")
+                    ok = False
+                recorder.record(tool, (time.perf_counter() - start) * 1000, ok)
+                if tool == "create_task" and ok:
+                    pending.append(task_name)
+
+
+async def run_load(url: str, sessions: int, duration: float, mix: Dict[str, float], background: bool) -> dict:
+    recorder = Recorder()
+    run_id = uuid.uuid4().hex[:8]
+    start = time.monotonic()
+    deadline = start + duration
+    results = await asyncio.gather(*(
+        run_session(url, f"load-{run_id}-{i}", mix, deadline, recorder, background)
+        for i in range(sessions)
+    ), return_exceptions=True)
+    failed = [result for result in results if isinstance(result, BaseException)]
+    if failed:
+        print(f"{len(failed)} of {sessions} sessions failed, first error: {failed[0]!r}")
+    return recorder.report(time.monotonic() - start)
+
+
+def print_report(report: dict):
+    print(f"{'tool':<16}{'calls':>8}{'errors':>8}{'calls/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for tool, r in [*report["tools"].items(), ("total", report["total"])]:
+        print(f"{tool:<16}{r['calls']:>8}{r['errors']:>8}{r['calls_per_s']:>10.1f}"
+              f"{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}{r['p99_ms']:>9.1f}")
+
+
+def scale_replicas(compose_file: str, replicas: int):
+    """Rescale mcp-server and restart nginx so it resolves the new set of replicas"""
+    compose = ["docker", "compose", "-f", compose_file]
+    subprocess.run([*compose, "up", "-d", "--scale", f"mcp-server={replicas}", "--no-recreate"], check=True)
+    subprocess.run([*compose, "restart", "nginx"], check=True)
+
+
+async def wait_until_ready(url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                response = await client.get(url, headers={"Accept": "text/event-stream"})
+                if response.status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(1)
+    raise TimeoutError(f"{url} did not come up within {timeout}s")
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8080/mcp")
+    parser.add_argument("--sessions", type=int, default=20, help="Concurrent client sessions, one user each")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load per run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="tool=weight pairs, comma separated")
+    parser.add_argument("--background", action="store_true", help="Queue do_task calls instead of waiting for them")
+    parser.add_argument("--replicas", default=None, help="Comma separated replica counts for a scaling curve")
+    parser.add_argument("--compose-file", default="../server/docker-compose.yml")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    if not args.replicas:
+        print_report(await run_load(args.url, args.sessions, args.duration, mix, args.background))
+        return
+
+    curve = []
+    for replicas in [int(count) for count in args.replicas.split(",")]:
+        print(f"\n=== {replicas} replica(s) ===")
+        scale_replicas(args.compose_file, replicas)
+        await wait_until_ready(args.url)
+        report = await run_load(args.url, args.sessions, args.duration, mix, args.background)
+        print_report(report)
+        curve.append((replicas, report["total"]))
+
+    baseline: Optional[float] = curve[0][1]["calls_per_s"] or None
+    print(f"\n{'replicas':<10}{'calls/s':>10}{'speedup':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for replicas, total in curve:
+        speedup = total["calls_per_s"] / baseline if baseline else 0.0
+        print(f"{replicas:<10}{total['calls_per_s']:>10.1f}{speedup:>9.2f}{total['p50_ms']:>9.1f}"
+              f"{total['p95_ms']:>9.1f}{total['p99_ms']:>9.1f}{total['errors']:>8}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
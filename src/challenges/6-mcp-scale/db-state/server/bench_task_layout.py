@@ -0,0 +1,93 @@
+"""Bytes sent to Redis per task update: JSON-in-user-hash vs per-task hash layout.
+
+    python bench_task_layout.py --tasks 200 --ticks 20
+
+Each task goes through the do_task lifecycle (create, in_progress, N progress
+ticks, completed) and the request bytes written to the socket are counted.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+import redis.asyncio as redis
+from models import TaskState
+from task_store import RedisHashTaskStore, RedisTaskStore, initialize_redis_pool
+
+
+class CountingConnection(redis.Connection):
+    bytes_sent = 0
+
+    async def send_packed_command(self, command, check_health=True):
+        if isinstance(command, (bytes, bytearray, memoryview, str)):
+            CountingConnection.bytes_sent += len(command)
+        else:
+            CountingConnection.bytes_sent += sum(len(chunk) for chunk in command)
+        await super().send_packed_command(command, check_health)
+
+
+async def run_lifecycle(store, user_id: str, tasks: int, ticks: int) -> dict:
+    states = {}
+    CountingConnection.bytes_sent = 0
+    for i in range(tasks):
+        state = TaskState(task_id=str(uuid.uuid4()), request_id=str(i), user_id=user_id)
+        await store.create(user_id, f"task-{i}", state)
+        states[f"task-{i}"] = state
+    create_bytes = CountingConnection.bytes_sent
+
+    CountingConnection.bytes_sent = 0
+    updates = 0
+    start = time.perf_counter()
+    for task_name in states:
+        state = await store.get(user_id, task_name)
+        state.status = "in_progress"
+        for tick in range(ticks):
+            state.progress = min(100, tick * 100 // ticks)
+            state.updated_at = datetime.now(timezone.utc).isoformat()
+            await store.put(user_id, task_name, state)
+            updates += 1
+        state.status = "completed"
+        state.progress = 100
+        state.result = f"Task '{task_name}' completed"
+        await store.put(user_id, task_name, state)
+        updates += 1
+    elapsed = time.perf_counter() - start
+    update_bytes = CountingConnection.bytes_sent
+
+    read_start = time.perf_counter()
+    for task_name in states:
+        await store.get(user_id, task_name)
+    read_elapsed = time.perf_counter() - read_start
+
+    await store.apply(deletes=[(user_id, task_name) for task_name in states])
+    return {
+        "create_bytes_per_task": create_bytes / tasks,
+        "bytes_per_update": update_bytes / updates,
+        "update_ms": elapsed * 1000 / updates,
+        "get_ms": read_elapsed * 1000 / tasks,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--ticks", type=int, default=20)
+    args = parser.parse_args()
+
+    pool = initialize_redis_pool()
+    pool.connection_class = CountingConnection
+    redis_client = redis.Redis(connection_pool=pool)
+    user_id = f"bench-{uuid.uuid4()}"
+    try:
+        print(f"{'layout':<12}{'create B/task':>15}{'B/update':>10}{'update ms':>11}{'get ms':>9}")
+        for name, store in (("json", RedisTaskStore(redis_client)), ("hash", RedisHashTaskStore(redis_client))):
+            r = await run_lifecycle(store, user_id, args.tasks, args.ticks)
+            print(f"{name:<12}{r['create_bytes_per_task']:>15.1f}{r['bytes_per_update']:>10.1f}"
+                  f"{r['update_ms']:>11.3f}{r['get_ms']:>9.3f}")
+    finally:
+        await redis_client.aclose()
+        await pool.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
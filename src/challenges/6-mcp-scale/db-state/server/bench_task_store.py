@@ -0,0 +1,82 @@
+"""Per-op latency of the task store backends.
+
+    python bench_task_store.py                 # memory, plus redis if reachable
+    python bench_task_store.py --ops 5000 --backends memory
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from models import TaskState
+from task_store import TaskStore, initialize_task_store
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def timed(samples, coro):
+    start = time.perf_counter()
+    await coro
+    samples.append((time.perf_counter() - start) * 1000)
+
+
+async def bench_store(store: TaskStore, ops: int) -> dict:
+    user_id = f"bench-{uuid.uuid4()}"
+    samples = {"create": [], "get": [], "put": [], "apply_10": [], "list_100": [], "delete": []}
+    states = [
+        TaskState(task_id=str(uuid.uuid4()), request_id=str(i), user_id=user_id)
+        for i in range(ops)
+    ]
+    for i, state in enumerate(states):
+        await timed(samples["create"], store.create(user_id, f"task-{i}", state))
+    for i, state in enumerate(states):
+        await timed(samples["get"], store.get(user_id, f"task-{i}"))
+        state.progress = 50
+        await timed(samples["put"], store.put(user_id, f"task-{i}", state))
+    for i in range(0, ops, 10):
+        batch = [(user_id, f"task-{j}", states[j]) for j in range(i, min(i + 10, ops))]
+        await timed(samples["apply_10"], store.apply(puts=batch))
+    list_user = f"{user_id}-list"
+    await store.apply(puts=[(list_user, f"task-{i}", states[i]) for i in range(min(100, ops))])
+    for _ in range(max(1, ops // 100)):
+        await timed(samples["list_100"], store.list(list_user))
+    for i in range(ops):
+        await timed(samples["delete"], store.delete(user_id, f"task-{i}"))
+    await store.apply(deletes=[(list_user, f"task-{i}") for i in range(min(100, ops))])
+    return {
+        op: {
+            "n": len(values),
+            "mean_ms": round(statistics.fmean(values), 4),
+            "p50_ms": round(percentile(values, 50), 4),
+            "p99_ms": round(percentile(values, 99), 4),
+        }
+        for op, values in samples.items()
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ops", type=int, default=1000)
+    parser.add_argument("--backends", nargs="+", default=["memory", "redis"])
+    args = parser.parse_args()
+
+    for backend in args.backends:
+        store = initialize_task_store(backend)
+        try:
+            results = await bench_store(store, args.ops)
+        except Exception as e:
+            print(f"[{backend}] skipped: {e}")
+            continue
+        finally:
+            await store.close()
+        print(f"\n[{backend}] {args.ops} ops")
+        print(f"{'op':<10}{'n':>7}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        for op, r in results.items():
+            print(f"{op:<10}{r['n']:>7}{r['mean_ms']:>10}{r['p50_ms']:>10}{r['p99_ms']:>10}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
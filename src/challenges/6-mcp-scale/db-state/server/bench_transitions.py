@@ -0,0 +1,116 @@
+"""Task state transitions under concurrent clients: read-check-write vs Lua (EVALSHA).
+
+    python bench_transitions.py --tasks 200 --clients 16
+
+Every client walks the same tasks in its own order and tries to start, tick
+and complete each of them, as competing do_task / complete_task calls would.
+Only one start per task should win; a start that wins twice is a lost update.
+Round trips are counted as commands or pipelines written to the socket.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timezone
+import redis.asyncio as redis
+from models import TaskState
+from task_store import RedisHashTaskStore, RedisTaskStore, TaskStore, initialize_redis_pool
+
+
+class CountingConnection(redis.Connection):
+    round_trips = 0
+
+    async def send_packed_command(self, command, check_health=True):
+        CountingConnection.round_trips += 1
+        await super().send_packed_command(command, check_health)
+
+
+def read_check_write(store):
+    """The generic TaskStore transition: GET, check in Python, then write"""
+    async def transition(transition, user_id, task_name, state):
+        return (await TaskStore.transition_many(store, [(transition, user_id, task_name, state, False)]))[0]
+    return transition
+
+
+def lua(store):
+    async def transition(transition, user_id, task_name, state):
+        return await store.transition(transition, user_id, task_name, state)
+    return transition
+
+
+async def run_client(transition, user_id: str, tasks: dict, latencies: list, starts: dict, counts: dict):
+    names = list(tasks)
+    random.shuffle(names)
+    for task_name in names:
+        state = tasks[task_name].model_copy()
+        for step in ("start", "tick", "complete"):
+            state.status = {"start": "in_progress", "tick": "in_progress", "complete": "completed"}[step]
+            state.progress = {"start": 0, "tick": 50, "complete": 100}[step]
+            state.updated_at = datetime.now(timezone.utc).isoformat()
+            begin = time.perf_counter()
+            result = await transition(step, user_id, task_name, state)
+            latencies.append((time.perf_counter() - begin) * 1000)
+            counts["transitions"] += 1
+            if not result.ok:
+                counts["conflicts"] += 1
+                break
+            if step == "start":
+                starts[task_name] = starts.get(task_name, 0) + 1
+
+
+async def run(store, transition, tasks: int, clients: int) -> dict:
+    user_id = f"bench-{uuid.uuid4()}"
+    states = {}
+    for i in range(tasks):
+        state = TaskState(task_id=str(uuid.uuid4()), request_id=str(i), user_id=user_id)
+        await store.create(user_id, f"task-{i}", state)
+        states[f"task-{i}"] = state
+
+    latencies, starts = [], {}
+    counts = {"transitions": 0, "conflicts": 0}
+    CountingConnection.round_trips = 0
+    begin = time.perf_counter()
+    await asyncio.gather(*(
+        run_client(transition, user_id, states, latencies, starts, counts) for _ in range(clients)
+    ))
+    elapsed = time.perf_counter() - begin
+    round_trips = CountingConnection.round_trips
+
+    await store.apply(deletes=[(user_id, task_name) for task_name in states])
+    latencies.sort()
+    return {
+        "ops_per_s": counts["transitions"] / elapsed,
+        "round_trips": round_trips / counts["transitions"],
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+        "conflicts": counts["conflicts"],
+        "lost_updates": sum(count - 1 for count in starts.values()),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=200)
+    parser.add_argument("--clients", type=int, default=16)
+    args = parser.parse_args()
+
+    pool = initialize_redis_pool()
+    pool.connection_class = CountingConnection
+    redis_client = redis.Redis(connection_pool=pool)
+    try:
+        print(f"{'layout':<8}{'transition':<18}{'ops/s':>9}{'RTT/op':>8}{'p50 ms':>9}{'p99 ms':>9}"
+              f"{'conflicts':>11}{'lost':>6}")
+        for name, store in (("json", RedisTaskStore(redis_client)), ("hash", RedisHashTaskStore(redis_client))):
+            for mode, transition in (("read-check-write", read_check_write(store)), ("lua", lua(store))):
+                r = await run(store, transition, args.tasks, args.clients)
+                print(f"{name:<8}{mode:<18}{r['ops_per_s']:>9.0f}{r['round_trips']:>8.2f}{r['p50_ms']:>9.3f}"
+                      f"{r['p99_ms']:>9.3f}{r['conflicts']:>11}{r['lost_updates']:>6}")
+    finally:
+        await redis_client.aclose()
+        await pool.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
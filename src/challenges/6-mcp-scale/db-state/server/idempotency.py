@@ -0,0 +1,114 @@
+import asyncio
+import json
+import time
+from typing import Dict, Optional, Tuple
+import redis.asyncio as redis
+
+PENDING = "__pending__"
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a different request"""
+
+
+class IdempotencyRecords:
+    """Short-lived dedup records that make retried writes return their first result.
+
+    The first call with a key reserves `idempotency:{user_id}:{key}` with
+    SET NX EX; it then runs and stores its response under the same key.
+    Retries within `ttl` seconds get that response back without writing. A
+    retry that arrives while the first call is still running waits for it.
+    Without a Redis client the records are kept in-process.
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis], ttl: int = 300, wait_timeout: float = 10.0):
+        self.redis_client = redis_client
+        self.ttl = ttl
+        self.wait_timeout = wait_timeout
+        self._local: Dict[str, Tuple[str, float]] = {}
+        self._local_writes = 0
+        self.reserved = 0
+        self.duplicates_suppressed = 0
+        self.conflicts = 0
+
+    @staticmethod
+    def key(user_id: str, idempotency_key: str) -> str:
+        return f"idempotency:{user_id}:{idempotency_key}"
+
+    async def _set_nx(self, key: str, value: str) -> bool:
+        if self.redis_client is not None:
+            return bool(await self.redis_client.set(key, value, nx=True, ex=self.ttl))
+        now = time.monotonic()
+        current = self._local.get(key)
+        if current is not None and current[1] > now:
+            return False
+        self._local[key] = (value, now + self.ttl)
+        self._local_writes += 1
+        if self._local_writes % 1024 == 0:
+            self._local = {k: v for k, v in self._local.items() if v[1] > now}
+        return True
+
+    async def _get(self, key: str) -> Optional[str]:
+        if self.redis_client is not None:
+            return await self.redis_client.get(key)
+        current = self._local.get(key)
+        if current is None or current[1] <= time.monotonic():
+            self._local.pop(key, None)
+            return None
+        return current[0]
+
+    async def _set(self, key: str, value: str):
+        if self.redis_client is not None:
+            await self.redis_client.set(key, value, ex=self.ttl)
+        else:
+            self._local[key] = (value, time.monotonic() + self.ttl)
+
+    async def _delete(self, key: str):
+        if self.redis_client is not None:
+            await self.redis_client.delete(key)
+        else:
+            self._local.pop(key, None)
+
+    async def reserve(self, user_id: str, idempotency_key: str, fingerprint: str) -> Optional[str]:
+        """Claim the key for a request; returns None to go ahead, or the response of the earlier call.
+
+        `fingerprint` identifies the request (e.g. its arguments); reusing a
+        key for a different request raises IdempotencyConflict.
+        """
+        key = self.key(user_id, idempotency_key)
+        pending = json.dumps({"fingerprint": fingerprint, "response": PENDING})
+        deadline = time.monotonic() + self.wait_timeout
+        while True:
+            if await self._set_nx(key, pending):
+                self.reserved += 1
+                return None
+            record = await self._get(key)
+            if record is None:
+                # Expired or released between the two calls; try to claim it again
+                continue
+            record = json.loads(record)
+            if record["fingerprint"] != fingerprint:
+                self.conflicts += 1
+                raise IdempotencyConflict(f"Idempotency key {idempotency_key!r} was used for a different request")
+            if record["response"] != PENDING:
+                self.duplicates_suppressed += 1
+                return record["response"]
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Request with idempotency key {idempotency_key!r} is still in progress")
+            await asyncio.sleep(0.05)
+
+    async def complete(self, user_id: str, idempotency_key: str, fingerprint: str, response: str):
+        """Store the response of a reserved request for its retries"""
+        await self._set(self.key(user_id, idempotency_key), json.dumps({"fingerprint": fingerprint, "response": response}))
+
+    async def release(self, user_id: str, idempotency_key: str):
+        """Drop a reservation whose request failed, so a retry runs it again"""
+        await self._delete(self.key(user_id, idempotency_key))
+
+    def stats(self) -> dict:
+        return {
+            "ttl_s": self.ttl,
+            "reserved": self.reserved,
+            "duplicates_suppressed": self.duplicates_suppressed,
+            "conflicts": self.conflicts,
+        }
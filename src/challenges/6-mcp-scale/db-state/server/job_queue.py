@@ -0,0 +1,192 @@
+import asyncio
+import os
+import socket
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import redis.asyncio as redis
+from mcp_logging import get_logger
+from redis.exceptions import ResponseError
+
+log = get_logger("job_queue")
+
+Job = Dict[str, str]
+# handler(job, reclaimed): reclaimed is True for a job taken over from a dead worker
+JobHandler = Callable[[Job, bool], Awaitable[None]]
+
+
+class JobQueue:
+    """Task jobs on a Redis Stream, consumed through a consumer group.
+
+    A job stays in the group's pending list until a worker acknowledges it.
+    Jobs whose worker died are claimed by another worker once they have been
+    idle for `claim_idle_ms`, so delivery is at-least-once. A job enqueued
+    with a `dedupe_key` is refused while another job with that key is still
+    queued or running. Jobs whose handler raised are moved to the
+    `<stream>:dead` stream instead of being retried.
+    """
+
+    def __init__(
+        self,
+        redis_client: redis.Redis,
+        stream: str = "tasks:jobs",
+        group: str = "task-workers",
+        max_length: int = 100_000,
+        claim_idle_ms: int = 120_000,
+        dedupe_ttl: int = 3600,
+    ):
+        self.redis_client = redis_client
+        self.stream = stream
+        self.group = group
+        self.max_length = max_length
+        self.claim_idle_ms = claim_idle_ms
+        # Upper bound on how long a lost marker blocks its key
+        self.dedupe_ttl = dedupe_ttl
+        self.dead_stream = f"{stream}:dead"
+        self._group_ready = False
+
+    async def ensure_group(self):
+        if self._group_ready:
+            return
+        try:
+            await self.redis_client.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    def dedupe_marker(self, dedupe_key: str) -> str:
+        return f"{self.stream}:queued:{dedupe_key}"
+
+    async def enqueue(self, job: Job, dedupe_key: Optional[str] = None) -> Optional[str]:
+        """Add a job; None if a job with the same `dedupe_key` is still queued or running"""
+        await self.ensure_group()
+        if dedupe_key is None:
+            return await self.redis_client.xadd(self.stream, job, maxlen=self.max_length, approximate=True)
+        marker = self.dedupe_marker(dedupe_key)
+        if not await self.redis_client.set(marker, "1", nx=True, ex=self.dedupe_ttl):
+            return None
+        try:
+            return await self.redis_client.xadd(
+                self.stream, {**job, "dedupe_key": dedupe_key}, maxlen=self.max_length, approximate=True
+            )
+        except Exception:
+            await self.redis_client.delete(marker)
+            raise
+
+    async def read(self, consumer: str, count: int = 1, block_ms: int = 5000) -> List[Tuple[str, Job]]:
+        await self.ensure_group()
+        response = await self.redis_client.xreadgroup(
+            self.group, consumer, {self.stream: ">"}, count=count, block=block_ms
+        )
+        return [(message_id, job) for _, messages in response or [] for message_id, job in messages]
+
+    async def reclaim(self, consumer: str, count: int = 10) -> List[Tuple[str, Job]]:
+        """Take over jobs left unacknowledged by a worker for longer than claim_idle_ms"""
+        await self.ensure_group()
+        _, messages, _ = await self.redis_client.xautoclaim(
+            self.stream, self.group, consumer, self.claim_idle_ms, start_id="0-0", count=count
+        )
+        # Entries trimmed from the stream come back without their fields
+        return [(message_id, job) for message_id, job in messages if job]
+
+    async def ack(self, message_id: str, job: Optional[Job] = None, error: Optional[str] = None):
+        """Remove a finished job; with `error`, keep a copy on the dead-letter stream"""
+        pipe = self.redis_client.pipeline(transaction=False)
+        if error is not None:
+            pipe.xadd(
+                self.dead_stream, {**(job or {}), "message_id": message_id, "error": error},
+                maxlen=self.max_length, approximate=True,
+            )
+        pipe.xack(self.stream, self.group, message_id)
+        pipe.xdel(self.stream, message_id)
+        if job and job.get("dedupe_key"):
+            pipe.delete(self.dedupe_marker(job["dedupe_key"]))
+        await pipe.execute()
+
+    async def stats(self) -> dict:
+        await self.ensure_group()
+        pending = await self.redis_client.xpending(self.stream, self.group)
+        return {
+            "stream": self.stream,
+            "length": await self.redis_client.xlen(self.stream),
+            "pending": pending["pending"],
+            "dead_letters": await self.redis_client.xlen(self.dead_stream),
+            "consumers": len(pending["consumers"]),
+        }
+
+
+class WorkerPool:
+    """A fixed number of async workers that consume a JobQueue and run `handler` per job"""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: JobHandler,
+        concurrency: int = 2,
+        consumer_prefix: Optional[str] = None,
+        reclaim_interval: float = 30.0,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.concurrency = concurrency
+        self.consumer_prefix = consumer_prefix or f"{socket.gethostname()}-{os.getpid()}"
+        self.reclaim_interval = reclaim_interval
+        self._workers: List[asyncio.Task] = []
+        self.jobs_done = 0
+        self.jobs_failed = 0
+        self.jobs_reclaimed = 0
+
+    async def start(self):
+        await self.queue.ensure_group()
+        self._workers = [
+            asyncio.create_task(self._work(f"{self.consumer_prefix}-{i}"))
+            for i in range(self.concurrency)
+        ]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def _work(self, consumer: str):
+        next_reclaim = 0.0
+        while True:
+            try:
+                messages, reclaimed = [], False
+                if time.monotonic() >= next_reclaim:
+                    messages = await self.queue.reclaim(consumer, count=1)
+                    self.jobs_reclaimed += len(messages)
+                    reclaimed = bool(messages)
+                    next_reclaim = time.monotonic() + self.reclaim_interval
+                if not messages:
+                    messages = await self.queue.read(consumer, count=1)
+                for message_id, job in messages:
+                    await self._run(message_id, job, reclaimed)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("queue error", consumer=consumer, error=str(e))
+                await asyncio.sleep(1)
+
+    async def _run(self, message_id: str, job: Job, reclaimed: bool = False):
+        error = None
+        try:
+            await self.handler(job, reclaimed)
+            self.jobs_done += 1
+        except Exception as e:
+            # The handler records the failure on the task. The job is not
+            # retried, so a poison job is not redelivered forever; it is kept
+            # on the dead-letter stream for inspection or a manual replay
+            self.jobs_failed += 1
+            error = str(e) or type(e).__name__
+            log.error("job failed", message_id=message_id, error=error)
+        await self.queue.ack(message_id, job, error)
+
+    def stats(self) -> dict:
+        return {
+            "workers": len(self._workers),
+            "jobs_done": self.jobs_done,
+            "jobs_failed": self.jobs_failed,
+            "jobs_reclaimed": self.jobs_reclaimed,
+        }
@@ -0,0 +1,172 @@
+"""Prometheus metrics for the db-state server, rendered in the text exposition format.
+
+Tool calls are timed by the instrument_tool decorator, Redis commands and
+round trips are counted by MetricsConnection and attributed to the tool whose
+call issued them (including background work that call started, such as the
+progress flushes it triggers), and a monitor task samples event-loop lag.
+"""
+import asyncio
+import contextvars
+import functools
+import time
+from typing import Dict, Iterable, Optional, Tuple
+import redis.asyncio as redis
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+REDIS_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+current_tool: contextvars.ContextVar[str] = contextvars.ContextVar("current_tool", default="none")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def format_labels(labels: Labels, extra: Labels = ()) -> str:
+    labels = labels + extra
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in labels) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name, self.help = name, help
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = tuple(sorted(labels.items()))
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self.values.items():
+            yield f"{self.name}{format_labels(labels)} {value:g}"
+
+
+class Gauge(Counter):
+    def set(self, value: float, **labels: str):
+        self.values[tuple(sorted(labels.items()))] = value
+
+    def dec(self, amount: float = 1.0, **labels: str):
+        self.inc(-amount, **labels)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        for labels, value in self.values.items():
+            yield f"{self.name}{format_labels(labels)} {value:g}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...]):
+        self.name, self.help, self.buckets = name, help, buckets
+        # Per label set: a count per bucket (non-cumulative), the sum and the total count
+        self.values: Dict[Labels, list] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        counts = self.values.get(key)
+        if counts is None:
+            counts = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[0][i] += 1
+                break
+        counts[1] += value
+        counts[2] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (bucket_counts, total, count) in self.values.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{format_labels(labels, (('le', f'{bound:g}'),))} {cumulative}"
+            yield f"{self.name}_bucket{format_labels(labels, (('le', '+Inf'),))} {count}"
+            yield f"{self.name}_sum{format_labels(labels)} {total:g}"
+            yield f"{self.name}_count{format_labels(labels)} {count}"
+
+
+tool_calls = Counter("mcp_tool_calls_total", "Tool calls by tool and outcome")
+tool_latency = Histogram("mcp_tool_latency_seconds", "Tool call latency", LATENCY_BUCKETS)
+tool_in_flight = Gauge("mcp_tool_in_flight", "Tool calls currently running")
+task_runs_in_flight = Gauge("db_state_task_runs_in_flight", "do_task runs in progress, foreground and queued")
+redis_commands = Counter("redis_commands_total", "Redis commands sent, by the tool that issued them")
+redis_round_trips = Histogram("redis_round_trip_seconds", "Time from sending to the first reply byte of a Redis round trip", REDIS_BUCKETS)
+event_loop_lag = Gauge("event_loop_lag_seconds", "How late the last event-loop lag probe woke up")
+event_loop_lag_histogram = Histogram("event_loop_lag_probe_seconds", "Event-loop lag probes", LAG_BUCKETS)
+
+REGISTRY = (
+    tool_calls, tool_latency, tool_in_flight, task_runs_in_flight,
+    redis_commands, redis_round_trips, event_loop_lag, event_loop_lag_histogram,
+)
+
+
+def instrument_tool(fn):
+    """Count, time and track in-flight calls of an MCP tool; goes under @mcp.tool()"""
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        token = current_tool.set(name)
+        tool_in_flight.inc(tool=name)
+        start = time.perf_counter()
+        status = "error"
+        try:
+            result = await fn(*args, **kwargs)
+            status = "ok"
+            return result
+        finally:
+            tool_latency.observe(time.perf_counter() - start, tool=name)
+            tool_calls.inc(tool=name, status=status)
+            tool_in_flight.dec(tool=name)
+            current_tool.reset(token)
+
+    return wrapper
+
+
+class MetricsConnection(redis.Connection):
+    """Redis connection that counts commands and times round trips per tool"""
+
+    _sent_at: Optional[float] = None
+
+    def pack_command(self, *args):
+        redis_commands.inc(tool=current_tool.get())
+        return super().pack_command(*args)
+
+    async def send_packed_command(self, command, check_health=True):
+        await super().send_packed_command(command, check_health)
+        self._sent_at = time.perf_counter()
+
+    async def read_response(self, *args, **kwargs):
+        response = await super().read_response(*args, **kwargs)
+        if self._sent_at is not None:
+            redis_round_trips.observe(time.perf_counter() - self._sent_at, tool=current_tool.get())
+            self._sent_at = None
+        return response
+
+
+def instrument_redis(redis_client: Optional[redis.Redis]):
+    """Make connections the client opens from now on report to the Redis metrics"""
+    if redis_client is not None:
+        redis_client.connection_pool.connection_class = MetricsConnection
+
+
+async def monitor_event_loop(interval: float = 0.5):
+    """Sleep `interval` in a loop and record how much later than asked each wakeup was"""
+    current_tool.set("none")
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lag = max(0.0, time.perf_counter() - start - interval)
+        event_loop_lag.set(lag)
+        event_loop_lag_histogram.observe(lag)
+
+
+async def metrics_endpoint(request: Request) -> PlainTextResponse:
+    lines = [line for metric in REGISTRY for line in metric.render()]
+    return PlainTextResponse("\n".join(lines) + "\n", media_type="text/plain; version=0.0.4")
@@ -0,0 +1,29 @@
+"""Migrate task state from the `user:{id}:tasks` JSON layout to per-task hashes.
+
+    python migrate_task_layout.py              # migrate and delete the old hashes
+    python migrate_task_layout.py --keep-source
+
+Run it before switching the replicas to TASK_STORE=redis-hash.
+"""
+import argparse
+import asyncio
+import redis.asyncio as redis
+from task_store import initialize_redis_pool, migrate_to_hash_layout
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--keep-source", action="store_true")
+    args = parser.parse_args()
+
+    redis_client = redis.Redis(connection_pool=initialize_redis_pool())
+    try:
+        migrated = await migrate_to_hash_layout(redis_client, args.batch_size, args.keep_source)
+        print(f"Migrated {migrated} tasks to the per-task hash layout")
+    finally:
+        await redis_client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,40 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Literal
+from pydantic import BaseModel, Field, PrivateAttr
+
+TaskStatus = Literal["pending", "in_progress", "completed", "failed"]
+
+class TaskState(BaseModel):
+    """Task state model stored in the task store"""
+    task_id: str
+    request_id: str
+    user_id: str
+    status: TaskStatus = Field(default="pending")
+    progress: int = Field(default=0, ge=0, le=100)  # Progress 0-100%
+    result: Optional[str] = Field(default=None)
+    error: Optional[str] = Field(default=None)
+    created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    updated_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    # Field values as last read from / written to the store, for field-level updates
+    _persisted: Optional[Dict[str, Any]] = PrivateAttr(default=None)
+
+    def mark_persisted(self):
+        self._persisted = self.model_dump()
+
+    def changed_fields(self) -> Dict[str, Any]:
+        """Fields that differ from the stored copy; every field if it was never stored"""
+        current = self.model_dump()
+        if self._persisted is None:
+            return current
+        return {name: value for name, value in current.items() if self._persisted.get(name) != value}
+
+class TaskEntry(BaseModel):
+    """A named task in a user's task list"""
+    name: str
+    task: TaskState
+
+class TaskPage(BaseModel):
+    """One page of a user's tasks; pass next_cursor back to fetch the next page"""
+    user_id: str
+    tasks: List[TaskEntry]
+    next_cursor: Optional[str] = Field(default=None, description="Cursor for the next page, null when there are no more tasks")
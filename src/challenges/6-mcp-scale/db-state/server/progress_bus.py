@@ -0,0 +1,111 @@
+import asyncio
+import contextlib
+import json
+from typing import Dict, Optional, Set
+import redis.asyncio as redis
+from mcp_logging import get_logger
+
+log = get_logger("progress_bus")
+
+
+class ProgressBus:
+    """Task progress events fanned out across replicas over Redis pub/sub.
+
+    Events for a task go to the `task:{task_id}:progress` channel. Each
+    replica holds a single pub/sub connection no matter how many watchers it
+    serves: local subscribers get an asyncio.Queue, and the channel is only
+    subscribed in Redis while at least one local watcher needs it.
+    Without a Redis client, events are delivered in-process only.
+    """
+
+    def __init__(self, redis_client: Optional[redis.Redis], queue_size: int = 64):
+        self.redis_client = redis_client
+        self.queue_size = queue_size
+        self._watchers: Dict[str, Set[asyncio.Queue]] = {}
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self.events_published = 0
+        self.events_delivered = 0
+        self.events_dropped = 0
+
+    @staticmethod
+    def channel(task_id: str) -> str:
+        return f"task:{task_id}:progress"
+
+    async def publish(self, task_id: str, event: dict):
+        self.events_published += 1
+        if self.redis_client is None:
+            self._dispatch(self.channel(task_id), event)
+            return
+        await self.redis_client.publish(self.channel(task_id), json.dumps(event))
+
+    @contextlib.asynccontextmanager
+    async def subscribe(self, task_id: str):
+        """Yield a queue that receives every event published for the task while the context is open"""
+        channel = self.channel(task_id)
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        async with self._lock:
+            watchers = self._watchers.setdefault(channel, set())
+            watchers.add(queue)
+            if len(watchers) == 1 and self.redis_client is not None:
+                await self._redis_subscribe(channel)
+        try:
+            yield queue
+        finally:
+            async with self._lock:
+                watchers = self._watchers.get(channel, set())
+                watchers.discard(queue)
+                if not watchers:
+                    self._watchers.pop(channel, None)
+                    if self._pubsub is not None:
+                        await self._pubsub.unsubscribe(channel)
+
+    async def _redis_subscribe(self, channel: str):
+        if self._pubsub is None:
+            self._pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(channel)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning("progress bus error", error=str(e))
+                await asyncio.sleep(1)
+                continue
+            if message is None:
+                if not self._watchers:
+                    await asyncio.sleep(0.1)
+                continue
+            self._dispatch(message["channel"], json.loads(message["data"]))
+
+    def _dispatch(self, channel: str, event: dict):
+        for queue in self._watchers.get(channel, ()):
+            if queue.full():
+                # Progress is latest-wins, so a slow watcher loses its oldest event
+                queue.get_nowait()
+                self.events_dropped += 1
+            queue.put_nowait(event)
+            self.events_delivered += 1
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+
+    def stats(self) -> dict:
+        return {
+            "watched_tasks": len(self._watchers),
+            "watchers": sum(len(watchers) for watchers in self._watchers.values()),
+            "events_published": self.events_published,
+            "events_delivered": self.events_delivered,
+            "events_dropped": self.events_dropped,
+        }
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from typing import Dict, Optional, Set, Tuple
+from mcp_logging import get_logger
+from models import TaskState
+from task_store import TaskStore, TransitionResult
+
+log = get_logger("progress_writer")
+
+
+class ProgressWriter:
+    """Write-behind buffer that coalesces task progress ticks into batched flushes.
+
+    Non-terminal updates only replace the pending value for their task, so a
+    task that ticks many times between flushes costs a single write. Every
+    flush sends all pending writes to the store in one round trip as "tick"
+    transitions, which only apply while the task is still in progress. Terminal
+    states (completed / failed) bypass the buffer and are written immediately.
+    A flush that fails puts its batch back, so the next one retries it.
+    """
+
+    def __init__(self, task_store: TaskStore, flush_interval: float = 0.5):
+        self.task_store = task_store
+        self.flush_interval = flush_interval
+        self._pending: Dict[Tuple[str, str], TaskState] = {}
+        self._lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._conflicted: Set[Tuple[str, str]] = set()
+        self.conflicts = 0
+        self.updates_received = 0
+        self.unbatched_commands = 0
+        self.commands_sent = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    def _ensure_flusher(self):
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                # The batch is back in _pending; keep flushing once the store recovers
+                log.warning("progress flush failed", error=str(e), pending=len(self._pending))
+
+    def update(self, user_id: str, task_name: str, state: TaskState):
+        """Buffer a non-terminal state; it is written on the next flush."""
+        self.updates_received += 1
+        self.unbatched_commands += 1
+        self._pending[(user_id, task_name)] = state.model_copy()
+        self._ensure_flusher()
+
+    async def finish(self, user_id: str, task_name: str, state: TaskState, remove: bool = False) -> TransitionResult:
+        """Write a terminal state immediately, superseding any buffered tick for the task."""
+        self.updates_received += 1
+        self.unbatched_commands += 1
+        transition = "fail" if state.status == "failed" else "complete"
+        async with self._lock:
+            self._pending.pop((user_id, task_name), None)
+            self._conflicted.discard((user_id, task_name))
+            results = await self._execute([(transition, user_id, task_name, state, remove)])
+        return results[0]
+
+    def take_conflict(self, user_id: str, task_name: str) -> bool:
+        """True once if a buffered tick for the task was rejected because its state changed elsewhere"""
+        if (user_id, task_name) in self._conflicted:
+            self._conflicted.discard((user_id, task_name))
+            return True
+        return False
+
+    async def flush(self):
+        """Send every buffered write in one round trip."""
+        async with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            ticks = [("tick", user_id, task_name, state, False) for (user_id, task_name), state in pending.items()]
+            try:
+                results = await self._execute(ticks)
+            except Exception:
+                self.failed_flushes += 1
+                # Ticks buffered while this flush ran are newer; keep those
+                for key, state in pending.items():
+                    self._pending.setdefault(key, state)
+                raise
+            for (_, user_id, task_name, _, _), result in zip(ticks, results):
+                if not result.ok:
+                    self._conflicted.add((user_id, task_name))
+
+    async def _execute(self, transitions):
+        start = time.perf_counter()
+        results = await self.task_store.transition_many(transitions)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.conflicts += sum(not result.ok for result in results)
+        self.commands_sent += len(transitions)
+        self.flushes += 1
+        self.last_flush_ms = elapsed_ms
+        self.max_flush_ms = max(self.max_flush_ms, elapsed_ms)
+        self.total_flush_ms += elapsed_ms
+        return results
+
+    async def close(self):
+        """Stop the background flusher and write anything still buffered."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "flush_interval_s": self.flush_interval,
+            "updates_received": self.updates_received,
+            "redis_commands_sent": self.commands_sent,
+            "redis_ops_saved": self.unbatched_commands - self.commands_sent - len(self._pending),
+            "round_trips": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "conflicts": self.conflicts,
+            "pending": len(self._pending),
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_flush_ms": round(self.total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+        }
@@ -1,43 +1,65 @@
 import asyncio
+import contextlib
 import json
 import os
 import uuid
 from datetime import datetime, timezone
-from typing import Optional, Literal
-import redis.asyncio as redis
+from typing import Optional
 from mcp.server.fastmcp import FastMCP, Context
-from pydantic import BaseModel, Field
-
-class TaskState(BaseModel):
-    """Task state model stored in Redis"""
-    task_id: str
-    request_id: str
-    user_id: str
-    status: Literal["pending", "in_progress", "completed", "failed"] = Field(default="pending")
-    progress: int = Field(default=0, ge=0, le=100)  # Progress 0-100%
-    result: Optional[str] = Field(default=None)
-    error: Optional[str] = Field(default=None)
-    created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
-    updated_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
-
-def initialize_redis():
-    """Initialize Redis client"""
-    return redis.Redis(
-        host=os.getenv("REDIS_HOST", "localhost"),
-        port=int(os.getenv("REDIS_PORT", 6379)),
-        decode_responses=True
-    )
+from pydantic import Field
+from models import TaskEntry, TaskPage, TaskState, TaskStatus
+from idempotency import IdempotencyConflict, IdempotencyRecords
+from job_queue import JobQueue, WorkerPool
+from mcp_logging import get_logger
+from metrics import instrument_redis, instrument_tool, metrics_endpoint, monitor_event_loop, task_runs_in_flight
+from progress_bus import ProgressBus
+from progress_writer import ProgressWriter
+from task_cache import CachedTaskStore, wrap_with_cache
+from task_store import TransitionResult, initialize_task_store, shared_redis_client
 
-redis_client = initialize_redis()
+# TASK_LIST_CACHE=1 caches list reads per replica, invalidated over Redis pub/sub
+task_store = wrap_with_cache(initialize_task_store())
+instrument_redis(getattr(task_store, "redis_client", None))
+progress_writer = ProgressWriter(
+    task_store,
+    flush_interval=float(os.getenv("PROGRESS_FLUSH_INTERVAL", 0.5))
+)
+progress_bus = ProgressBus(getattr(task_store, "redis_client", None))
+# TASK_QUEUE=redis lets do_task(background=True) hand work to a Redis Streams
+# worker pool; TASK_WORKERS of them run in this process (0 = use worker.py only)
+job_queue = JobQueue(shared_redis_client()) if os.getenv("TASK_QUEUE", "off") == "redis" else None
+TASK_STEP_SECONDS = float(os.getenv("TASK_STEP_SECONDS", 5))
+# Completed / failed tasks are deleted this many seconds after their last update
+FINISHED_TASK_TTL = float(os.getenv("FINISHED_TASK_TTL", 3600))
+TASK_CLEANUP_INTERVAL = float(os.getenv("TASK_CLEANUP_INTERVAL", 60))
+# Retried create_task calls with the same idempotency key within this window return the first result
+idempotency_records = IdempotencyRecords(
+    getattr(task_store, "redis_client", None),
+    ttl=int(os.getenv("IDEMPOTENCY_TTL", 300))
+)
 
 mcp = FastMCP("mcp-db-state", stateless_http=True)
+log = get_logger("db_state")
 
 
 @mcp.tool()
-async def create_task(task_name: str, ctx: Context) -> str:
+@instrument_tool
+async def create_task(
+    task_name: str,
+    ctx: Context,
+    idempotency_key: Optional[str] = Field(default=None, description="Reuse the same key when retrying, so the task is only created once; the Idempotency-Key header works too"),
+) -> str:
     """Create a new task for the user"""
     user_id = ctx.request_context.request.headers.get("X-User-ID")
     request_id = ctx.request_id
+    idempotency_key = idempotency_key or ctx.request_context.request.headers.get("Idempotency-Key")
+    if idempotency_key:
+        try:
+            previous = await idempotency_records.reserve(user_id, idempotency_key, task_name)
+        except (IdempotencyConflict, TimeoutError) as e:
+            return str(e)
+        if previous is not None:
+            return previous
     
     task_state = TaskState(
         task_id=str(uuid.uuid4()),
@@ -46,85 +68,222 @@ async def create_task(task_name: str, ctx: Context) -> str:
         status="pending"
     )
     
-    result = await redis_client.hset(
-        f"user:{user_id}:tasks",
-        task_name,
-        task_state.model_dump_json()
-    )
-    return f"Task '{task_name}' created for user {user_id}. Redis HSET returned: {result} (1=new, 0=updated)"
-    
-@mcp.tool()
-async def do_task(task_name: str, ctx: Context) -> str:
-    """Execute a task with progress simulation"""
-    user_id = ctx.request_context.request.headers.get("X-User-ID")
-    request_id = ctx.request_id
-    task_data = await redis_client.hget(f"user:{user_id}:tasks", task_name)
-    task_state = TaskState(**json.loads(task_data))
-    
-    if task_state.status == "completed":
-        return f"Task '{task_name}' is already completed"
+    try:
+        is_new = await task_store.create(user_id, task_name, task_state)
+    except Exception:
+        if idempotency_key:
+            await idempotency_records.release(user_id, idempotency_key)
+        raise
+    response = f"Task '{task_name}' created for user {user_id}. Store returned: {int(is_new)} (1=new, 0=updated)"
+    if idempotency_key:
+        await idempotency_records.complete(user_id, idempotency_key, task_name, response)
+    return response
     
+async def publish_progress(task_state: TaskState, message: str):
+    await progress_bus.publish(task_state.task_id, {
+        "status": task_state.status,
+        "progress": task_state.progress,
+        "message": message
+    })
+
+async def run_task(user_id: str, task_name: str, task_state: TaskState, notify, remove: bool, resume: bool = False) -> TransitionResult:
+    """Run a task to completion, reporting each progress step through `notify`.
+
+    Returns the result of the final transition; it is a conflict when another
+    request started, completed or replaced the task first. With `resume`, a
+    task left in_progress by a crashed worker is restarted instead.
+    """
+    task_runs_in_flight.inc()
+    try:
+        return await _run_task(user_id, task_name, task_state, notify, remove, resume)
+    finally:
+        task_runs_in_flight.dec()
+
+async def _run_task(user_id: str, task_name: str, task_state: TaskState, notify, remove: bool, resume: bool) -> TransitionResult:
     task_state.status = "in_progress"
     task_state.updated_at = datetime.now(timezone.utc).isoformat()
-    
-    await redis_client.hset(
-        f"user:{user_id}:tasks",
-        task_name,
-        task_state.model_dump_json()
-    )
+    started = await task_store.transition("resume" if resume else "start", user_id, task_name, task_state)
+    if not started.ok:
+        return started
     
     max_steps = 3
     for i in range(max_steps):
         task_state.progress = i
         task_state.updated_at = datetime.now(timezone.utc).isoformat()
-        await redis_client.hset(
-            f"user:{user_id}:tasks",
-            task_name,
-            task_state.model_dump_json()
-        )
-        await ctx.info(f"Task '{task_name}' progress step {i} of {max_steps}")    
-        await asyncio.sleep(5)
+        progress_writer.update(user_id, task_name, task_state)
+        message = f"Task '{task_name}' progress step {i} of {max_steps}"
+        await publish_progress(task_state, message)
+        await notify(message)    
+        await asyncio.sleep(TASK_STEP_SECONDS)
+        if progress_writer.take_conflict(user_id, task_name):
+            # Completed or replaced elsewhere while running
+            current = await task_store.get(user_id, task_name)
+            return TransitionResult(False, current.status if current else None)
     
     task_state.status = "completed"
     task_state.updated_at = datetime.now(timezone.utc).isoformat()  
-    await redis_client.hset(
-        f"user:{user_id}:tasks",
-        task_name,
-        task_state.model_dump_json()
-    )
+    finished = await progress_writer.finish(user_id, task_name, task_state, remove=remove)
+    if finished.ok:
+        await publish_progress(task_state, f"Task '{task_name}' completed")
+    return finished
+
+def conflict_message(task_name: str, result: TransitionResult) -> str:
+    if result.status is None:
+        return f"Task '{task_name}' no longer exists"
+    return f"Task '{task_name}' is already {result.status.replace('_', ' ')}"
+
+async def execute_job(job: dict, reclaimed: bool = False):
+    """Worker handler for a task queued by do_task(background=True).
+
+    Only a job reclaimed from a dead worker may restart a task that is
+    in_progress; any other job for a running task is a conflict and skipped.
+    """
+    user_id, task_name = job["user_id"], job["task_name"]
+    task_state = await task_store.get(user_id, task_name)
+    # Jobs for tasks replaced or completed since they were queued are skipped
+    if task_state is None or task_state.task_id != job["task_id"] or task_state.status == "completed":
+        return
+
+    async def notify(message: str):
+        log.debug("job progress", task_id=job["task_id"], message=message)
+
+    try:
+        # Finished background tasks stay in the store so get_task_status can report them
+        result = await run_task(user_id, task_name, task_state, notify, remove=False, resume=reclaimed)
+        if not result.ok:
+            log.info("job skipped", task_id=job["task_id"], reason=conflict_message(task_name, result))
+    except Exception as e:
+        task_state.status = "failed"
+        task_state.error = str(e)
+        task_state.updated_at = datetime.now(timezone.utc).isoformat()
+        if (await progress_writer.finish(user_id, task_name, task_state)).ok:
+            await publish_progress(task_state, f"Task '{task_name}' failed: {e}")
+        raise
+
+worker_pool = WorkerPool(job_queue, execute_job, concurrency=int(os.getenv("TASK_WORKERS", 2))) if job_queue else None
+
+@mcp.tool()
+@instrument_tool
+async def do_task(
+    task_name: str,
+    ctx: Context,
+    background: bool = Field(default=False, description="Queue the task and return its id right away; poll it with get_task_status"),
+) -> str:
+    """Execute a task with progress simulation"""
+    user_id = ctx.request_context.request.headers.get("X-User-ID")
+    request_id = ctx.request_id
+    task_state = await task_store.get(user_id, task_name)
+    if task_state is None:
+        return f"No such task '{task_name}' found for user {user_id}"
+    
+    if task_state.status == "completed":
+        return f"Task '{task_name}' is already completed"
+    
+    if background:
+        if job_queue is None:
+            return "Background execution is disabled on this server (set TASK_QUEUE=redis)"
+        if task_state.status == "in_progress":
+            return f"Task '{task_name}' is already in progress"
+        # One queued job per task id; a second do_task(background=True) is refused until it finishes
+        queued = await job_queue.enqueue(
+            {"user_id": user_id, "task_name": task_name, "task_id": task_state.task_id},
+            dedupe_key=task_state.task_id,
+        )
+        if queued is None:
+            return f"Task '{task_name}' is already queued"
+        return json.dumps({
+            "status": "queued",
+            "message": f"Task '{task_name}' queued, poll get_task_status for progress",
+            "task_id": task_state.task_id,
+            "task_name": task_name
+        }, indent=2)
+    
+    result = await run_task(user_id, task_name, task_state, ctx.info, remove=True)
+    if not result.ok:
+        return conflict_message(task_name, result)
+    return f"Task '{task_name}' completed and removed from the task store"
+
+@mcp.tool()
+@instrument_tool
+async def get_task_status(task_name: str, ctx: Context) -> str:
+    """Get the current status and progress of a task"""
+    user_id = ctx.request_context.request.headers.get("X-User-ID")
+    task_state = await task_store.get(user_id, task_name)
+    if task_state is None:
+        return json.dumps({
+            "status": "error",
+            "message": f"No such task '{task_name}' found for user {user_id}"
+        }, indent=2)
+    return json.dumps({
+        "status": "success",
+        "task_name": task_name,
+        "task": task_state.model_dump()
+    }, indent=2)
+
+@mcp.tool()
+@instrument_tool
+async def watch_task(
+    task_name: str,
+    ctx: Context,
+    timeout: float = Field(default=300, gt=0, le=3600, description="Stop watching after this many seconds"),
+) -> str:
+    """Stream progress notifications for a task running on any replica until it finishes"""
+    user_id = ctx.request_context.request.headers.get("X-User-ID")
+    task_state = await task_store.get(user_id, task_name)
+    if task_state is None:
+        return f"No such task '{task_name}' found for user {user_id}"
     
-    await redis_client.hdel(f"user:{user_id}:tasks", task_name)
-    return f"Task '{task_name}' completed and removed from Redis"
+    meta = ctx.request_context.meta
+    progress_token = meta.progressToken if meta else None
+    async with progress_bus.subscribe(task_state.task_id) as events:
+        # Re-read after subscribing so a task that finished in between is not missed
+        task_state = await task_store.get(user_id, task_name) or task_state
+        status, progress = task_state.status, task_state.progress
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while status not in ("completed", "failed"):
+            try:
+                event = await asyncio.wait_for(events.get(), deadline - loop.time())
+            except asyncio.TimeoutError:
+                return f"Task '{task_name}' still {status} at {progress}% after watching for {timeout:g}s"
+            status, progress = event["status"], event["progress"]
+            if progress_token is not None:
+                # Tied to this request so it reaches the client without a standalone SSE stream
+                await ctx.session.send_progress_notification(
+                    progress_token, progress, 100, event["message"], related_request_id=ctx.request_id
+                )
+            await ctx.info(event["message"])
+    return f"Task '{task_name}' {status}"
 
 @mcp.tool()
+@instrument_tool
 async def complete_task(task_name: str, ctx: Context) -> str:
     """Mark a task as completed manually"""
     user_id = ctx.request_context.request.headers.get("X-User-ID")
     request_id = ctx.request_id
     
-    # Get task from Redis
-    task_data = await redis_client.hget(f"user:{user_id}:tasks", task_name)
-    if not task_data:
+    task_state = await task_store.get(user_id, task_name)
+    if task_state is None:
         return json.dumps({
             "status": "error",
             "message": f"No such task '{task_name}' found for user {user_id}"
         }, indent=2)
     
-    task_state = TaskState(**json.loads(task_data))
-    
     # Update task to completed
     task_state.status = "completed"
     task_state.progress = 100
     task_state.result = f"Task '{task_name}' manually completed"
     task_state.updated_at = datetime.now(timezone.utc).isoformat()
     
-    # Update in Redis
-    await redis_client.hset(
-        f"user:{user_id}:tasks",
-        task_name,
-        task_state.model_dump_json()
-    )
-    await redis_client.set(f"task:{task_state.task_id}", task_state.model_dump_json(), ex=3600)
+    # Update in the task store, superseding any progress tick still buffered for this task
+    result = await progress_writer.finish(user_id, task_name, task_state)
+    if not result.ok:
+        return json.dumps({
+            "status": "error",
+            "message": conflict_message(task_name, result)
+        }, indent=2)
+    await task_store.save_snapshot(task_state, ttl=3600)
+    await publish_progress(task_state, task_state.result)
     
     return json.dumps({
         "status": "success",
@@ -136,26 +295,117 @@ async def complete_task(task_name: str, ctx: Context) -> str:
         
 
 @mcp.tool()
-async def list_tasks(ctx: Context) -> str:
-    """List all tasks for the current user"""
+@instrument_tool
+async def list_tasks(
+    ctx: Context,
+    cursor: Optional[str] = Field(default=None, description="next_cursor from the previous page; omit for the first page"),
+    limit: int = Field(default=20, ge=1, le=100, description="Maximum number of tasks to return"),
+    status: Optional[TaskStatus] = Field(default=None, description="Only return tasks with this status"),
+) -> TaskPage:
+    """List the current user's tasks, one page at a time"""
     user_id = ctx.request_context.request.headers.get("X-User-ID")
-    tasks = await redis_client.hgetall(f"user:{user_id}:tasks")
-    
-    task_list = []
-    for task_name, task_data in tasks.items():
-        task_state = TaskState(**json.loads(task_data))
-        task_list.append({
-            "name": task_name,
-            "task": task_state.model_dump()
-        })
-    
-    return f"Found {len(task_list)} tasks for user {user_id}: {task_list}"
+    items, next_cursor = await task_store.page(user_id, cursor=cursor, limit=limit, status=status)
+    return TaskPage(
+        user_id=user_id,
+        tasks=[TaskEntry(name=task_name, task=task_state) for task_name, task_state in items],
+        next_cursor=next_cursor
+    )
+
+@mcp.tool()
+@instrument_tool
+async def list_recent_tasks(
+    ctx: Context,
+    limit: int = Field(default=10, ge=1, le=100, description="Maximum number of tasks to return"),
+    status: Optional[TaskStatus] = Field(default=None, description="Only return tasks with this status"),
+) -> TaskPage:
+    """List the current user's most recently updated tasks, newest first, optionally of one status"""
+    user_id = ctx.request_context.request.headers.get("X-User-ID")
+    items = await task_store.recent(user_id, limit=limit, status=status)
+    return TaskPage(
+        user_id=user_id,
+        tasks=[TaskEntry(name=task_name, task=task_state) for task_name, task_state in items]
+    )
+
+@mcp.tool()
+@instrument_tool
+async def get_progress_writer_stats() -> str:
+    """Report Redis ops saved by progress coalescing and the flush latency"""
+    return json.dumps(progress_writer.stats(), indent=2)
+        
+        
+@mcp.tool()
+@instrument_tool
+async def get_task_cache_stats() -> str:
+    """Report hit rate, evictions and staleness of this replica's task list cache"""
+    if not isinstance(task_store, CachedTaskStore):
+        return json.dumps({"enabled": False}, indent=2)
+    return json.dumps({"enabled": True, **task_store.stats()}, indent=2)
+        
+        
+@mcp.tool()
+@instrument_tool
+async def get_idempotency_stats() -> str:
+    """Report how many retried create_task calls were answered from their dedup record"""
+    return json.dumps(idempotency_records.stats(), indent=2)
         
         
+@mcp.tool()
+@instrument_tool
+async def get_queue_stats() -> str:
+    """Report the background job queue length, pending jobs and worker counters"""
+    if job_queue is None:
+        return json.dumps({"enabled": False}, indent=2)
+    stats = {"enabled": True, **await job_queue.stats()}
+    if worker_pool is not None:
+        stats.update(worker_pool.stats())
+    return json.dumps(stats, indent=2)
+
+
+async def cleanup_finished_tasks():
+    """Periodically delete finished tasks older than FINISHED_TASK_TTL.
+
+    Every replica runs this; deletes are idempotent, so overlapping runs are harmless.
+    """
+    while True:
+        await asyncio.sleep(TASK_CLEANUP_INTERVAL)
+        try:
+            removed = await task_store.expire_finished(FINISHED_TASK_TTL)
+            if removed:
+                log.info("finished tasks removed", removed=removed, ttl_s=FINISHED_TASK_TTL)
+        except Exception as e:
+            log.warning("finished task cleanup failed", error=str(e))
+
+def create_app():
+    """Streamable HTTP app with /metrics that also runs the in-process workers and task cleanup for its lifetime"""
+    app = mcp.streamable_http_app()
+    app.add_route("/metrics", metrics_endpoint)
+    mcp_lifespan = app.router.lifespan_context
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        async with mcp_lifespan(app):
+            if worker_pool is not None and worker_pool.concurrency > 0:
+                await worker_pool.start()
+            cleanup = asyncio.create_task(cleanup_finished_tasks())
+            loop_monitor = asyncio.create_task(monitor_event_loop())
+            try:
+                yield
+            finally:
+                cleanup.cancel()
+                loop_monitor.cancel()
+                if worker_pool is not None:
+                    await worker_pool.stop()
+                await progress_writer.close()
+                await progress_bus.close()
+                await task_store.close()
+
+    app.router.lifespan_context = lifespan
+    return app
+
 def main():
     import uvicorn
-    app = mcp.streamable_http_app
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    app = create_app()
+    uvicorn.run(app, host=os.getenv("UVICORN_HOST", "0.0.0.0"), port=int(os.getenv("UVICORN_PORT", 8000)))
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,287 @@
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from mcp_logging import get_logger
+from models import TaskState
+from task_store import TaskKey, TaskStore, Transition, TransitionResult
+
+INVALIDATION_CHANNEL = "tasks:invalidate"
+
+log = get_logger("task_cache")
+
+
+def measure(value: Any) -> int:
+    """Approximate bytes held by a cached list read: its tasks as JSON plus container overhead"""
+    if isinstance(value, TaskState):
+        return len(value.model_dump_json())
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(measure(k) + measure(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(measure(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class CachedTaskStore(TaskStore):
+    """Per-replica LRU read-through cache of task list reads in front of another store.
+
+    page(), recent() and list() results are cached per user, bounded to
+    `max_entries` and roughly `max_bytes` across all users. Every write through this store drops the
+    user's entries locally and announces the user on INVALIDATION_CHANNEL, so
+    the other replicas drop theirs too. Entries also expire after `ttl`
+    seconds in case an invalidation is missed. Single-task reads are not cached.
+    """
+
+    def __init__(
+        self, store: TaskStore, max_entries: int = 1024, max_bytes: int = 16 * 1024 * 1024, ttl: float = 30.0
+    ):
+        self.store = store
+        self.redis_client = getattr(store, "redis_client", None)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.replica_id = uuid.uuid4().hex
+        self._entries: "OrderedDict[Tuple, Tuple[Any, float, int]]" = OrderedDict()
+        self.bytes_used = 0
+        self._user_keys: Dict[str, Set[Tuple]] = {}
+        # Bumped on every invalidation, so a read that raced a write is not cached
+        self._generations: Dict[str, int] = {}
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribed = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.expirations = 0
+        self.local_invalidations = 0
+        self.remote_invalidations = 0
+        self.invalidation_messages = 0
+        self.total_hit_age_ms = 0.0
+        self.max_hit_age_ms = 0.0
+        self.total_invalidation_lag_ms = 0.0
+        self.max_invalidation_lag_ms = 0.0
+
+    # Cached reads
+
+    async def _cached(self, user_id: str, key: Tuple, load):
+        self._ensure_listener()
+        key = (user_id, *key)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None:
+            value, cached_at, _ = entry
+            if now - cached_at <= self.ttl:
+                self._entries.move_to_end(key)
+                age_ms = (now - cached_at) * 1000
+                self.hits += 1
+                self.total_hit_age_ms += age_ms
+                self.max_hit_age_ms = max(self.max_hit_age_ms, age_ms)
+                return value
+            self.expirations += 1
+            self._drop(key)
+        self.misses += 1
+        generation = self._generations.get(user_id, 0)
+        value = await load()
+        # Until this replica hears invalidations, nothing it reads may be cached
+        listening = self.redis_client is None or self._subscribed
+        if listening and self._generations.get(user_id, 0) == generation:
+            self._store(key, value)
+        return value
+
+    def _store(self, key: Tuple, value: Any):
+        size = measure(key) + measure(value)
+        if size > self.max_bytes:
+            # Would evict everything else and still not fit
+            return
+        self._drop(key)
+        self._entries[key] = (value, time.monotonic(), size)
+        self.bytes_used += size
+        self._user_keys.setdefault(key[0], set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+        while self.bytes_used > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evicted_bytes += 1
+
+    def _drop(self, key: Tuple):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes_used -= entry[2]
+        keys = self._user_keys.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[key[0]]
+
+    async def page(self, user_id: str, cursor: Optional[str] = None, limit: int = 20, status: Optional[str] = None):
+        return await self._cached(
+            user_id, ("page", cursor, limit, status), lambda: self.store.page(user_id, cursor, limit, status)
+        )
+
+    async def recent(self, user_id: str, limit: int = 10, status: Optional[str] = None) -> List[Tuple[str, TaskState]]:
+        return await self._cached(
+            user_id, ("recent", limit, status), lambda: self.store.recent(user_id, limit, status)
+        )
+
+    async def list(self, user_id: str) -> Dict[str, TaskState]:
+        return await self._cached(user_id, ("list",), lambda: self.store.list(user_id))
+
+    # Writes invalidate
+
+    def invalidate_local(self, user_ids: Iterable[str]):
+        for user_id in user_ids:
+            self._generations[user_id] = self._generations.get(user_id, 0) + 1
+            for key in list(self._user_keys.get(user_id, ())):
+                self._drop(key)
+
+    async def invalidate(self, user_ids: Iterable[str]):
+        user_ids = sorted(set(user_ids))
+        if not user_ids:
+            return
+        self.local_invalidations += len(user_ids)
+        self.invalidate_local(user_ids)
+        if self.redis_client is not None:
+            await self.redis_client.publish(INVALIDATION_CHANNEL, json.dumps({
+                "origin": self.replica_id,
+                "users": user_ids,
+                "sent_at": time.time(),
+            }))
+
+    async def create(self, user_id: str, task_name: str, state: TaskState) -> bool:
+        is_new = await self.store.create(user_id, task_name, state)
+        await self.invalidate([user_id])
+        return is_new
+
+    async def transition_many(self, transitions: Iterable[Transition]) -> List[TransitionResult]:
+        transitions = list(transitions)
+        results = await self.store.transition_many(transitions)
+        await self.invalidate(
+            user_id for (_, user_id, _, _, _), result in zip(transitions, results) if result.ok
+        )
+        return results
+
+    async def apply(self, puts: Iterable[Tuple[str, str, TaskState]] = (), deletes: Iterable[TaskKey] = ()) -> None:
+        puts, deletes = list(puts), list(deletes)
+        await self.store.apply(puts=puts, deletes=deletes)
+        await self.invalidate([user_id for user_id, _, _ in puts] + [user_id for user_id, _ in deletes])
+
+    # Everything else goes straight to the wrapped store
+
+    async def get(self, user_id: str, task_name: str) -> Optional[TaskState]:
+        return await self.store.get(user_id, task_name)
+
+    async def get_many(self, user_id: str, task_names: List[str]) -> List[Tuple[str, TaskState]]:
+        return await self.store.get_many(user_id, task_names)
+
+    async def recent_names(self, user_id: str, limit: int, status: Optional[str] = None) -> List[str]:
+        return await self.store.recent_names(user_id, limit, status)
+
+    async def finished_before(self, cutoff: float, limit: int) -> List[TaskKey]:
+        return await self.store.finished_before(cutoff, limit)
+
+    async def save_snapshot(self, state: TaskState, ttl: int) -> None:
+        await self.store.save_snapshot(state, ttl)
+
+    async def get_snapshot(self, task_id: str) -> Optional[TaskState]:
+        return await self.store.get_snapshot(task_id)
+
+    async def scan_raw(self, user_id: str, cursor: int, count: int) -> Tuple[int, List[Tuple[str, Any]]]:
+        return await self.store.scan_raw(user_id, cursor, count)
+
+    def decode(self, task_data: Any) -> Optional[TaskState]:
+        return self.store.decode(task_data)
+
+    def has_status(self, task_data: Any, status: str) -> bool:
+        return self.store.has_status(task_data, status)
+
+    # Invalidations from other replicas
+
+    def _ensure_listener(self):
+        if self.redis_client is None:
+            return
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self):
+        self._pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(INVALIDATION_CHANNEL)
+        self._subscribed = True
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Entries cached while we cannot hear invalidations could go stale
+                log.warning("task cache invalidation error", error=str(e))
+                self.clear()
+                await asyncio.sleep(1)
+                continue
+            if message is None:
+                continue
+            event = json.loads(message["data"])
+            if event["origin"] == self.replica_id:
+                continue
+            lag_ms = max(0.0, (time.time() - event["sent_at"]) * 1000)
+            self.remote_invalidations += len(event["users"])
+            self.invalidation_messages += 1
+            self.total_invalidation_lag_ms += lag_ms
+            self.max_invalidation_lag_ms = max(self.max_invalidation_lag_ms, lag_ms)
+            self.invalidate_local(event["users"])
+
+    def clear(self):
+        self.invalidate_local(list(self._user_keys))
+
+    async def close(self):
+        self._subscribed = False
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        if self._pubsub is not None:
+            await self._pubsub.aclose()
+            self._pubsub = None
+        await self.store.close()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "bytes_used": self.bytes_used,
+            "max_bytes": self.max_bytes,
+            "cached_users": len(self._user_keys),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+            "expirations": self.expirations,
+            "local_invalidations": self.local_invalidations,
+            "remote_invalidations": self.remote_invalidations,
+            # How old the lists served from cache were, and how long other
+            # replicas' writes took to reach this one: the staleness window
+            "avg_hit_age_ms": round(self.total_hit_age_ms / self.hits, 3) if self.hits else 0.0,
+            "max_hit_age_ms": round(self.max_hit_age_ms, 3),
+            "avg_invalidation_lag_ms": round(
+                self.total_invalidation_lag_ms / self.invalidation_messages, 3
+            ) if self.invalidation_messages else 0.0,
+            "max_invalidation_lag_ms": round(self.max_invalidation_lag_ms, 3),
+        }
+
+
+def wrap_with_cache(store: TaskStore) -> TaskStore:
+    """Put a CachedTaskStore in front of `store` when TASK_LIST_CACHE=1"""
+    if os.getenv("TASK_LIST_CACHE", "0") != "1":
+        return store
+    return CachedTaskStore(
+        store,
+        max_entries=int(os.getenv("TASK_LIST_CACHE_SIZE", 1024)),
+        max_bytes=int(os.getenv("TASK_LIST_CACHE_MAX_BYTES", 16 * 1024 * 1024)),
+        ttl=float(os.getenv("TASK_LIST_CACHE_TTL", 30)),
+    )
@@ -0,0 +1,667 @@
+import heapq
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from itertools import islice
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, get_args
+import redis.asyncio as redis
+from redis.exceptions import NoScriptError
+from models import TaskState, TaskStatus
+from transition_scripts import TRANSITIONS, build_script
+
+TaskKey = Tuple[str, str]  # (user_id, task_name)
+TASK_STATUSES = get_args(TaskStatus)
+FINISHED_STATUSES = ("completed", "failed")
+# (transition name, user_id, task_name, new state, remove the task instead of storing it)
+Transition = Tuple[str, str, str, TaskState, bool]
+
+
+class TransitionResult(NamedTuple):
+    ok: bool
+    status: Optional[str]  # the new status, or on conflict the current one (None if the task is missing)
+    created: bool = False
+
+
+def index_score(state: TaskState) -> float:
+    """Sort key of a task in the recency and status indexes: its updated_at as epoch seconds"""
+    return datetime.fromisoformat(state.updated_at).timestamp()
+
+
+def parse_cursor(cursor: Optional[str]) -> Tuple[int, int]:
+    """Split a page cursor "<scan cursor>:<offset in that scan batch>" into its parts"""
+    if not cursor:
+        return 0, 0
+    try:
+        scan_cursor, _, offset = cursor.partition(":")
+        return int(scan_cursor), int(offset or 0)
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+
+
+class TaskStore(ABC):
+    """Storage interface for task state, keyed by user id and task name"""
+
+    @abstractmethod
+    async def create(self, user_id: str, task_name: str, state: TaskState) -> bool:
+        """Store a task; returns True if it is new, False if it replaced an existing one"""
+
+    @abstractmethod
+    async def get(self, user_id: str, task_name: str) -> Optional[TaskState]:
+        """Fetch a single task, or None if it does not exist"""
+
+    @abstractmethod
+    async def list(self, user_id: str) -> Dict[str, TaskState]:
+        """Fetch every task of a user, keyed by task name"""
+
+    @abstractmethod
+    async def get_many(self, user_id: str, task_names: List[str]) -> List[Tuple[str, TaskState]]:
+        """Fetch several tasks of a user in one round trip, skipping those that no longer exist"""
+
+    @abstractmethod
+    async def recent_names(self, user_id: str, limit: int, status: Optional[str] = None) -> List[str]:
+        """Names of the user's most recently updated tasks, newest first, optionally of one status"""
+
+    @abstractmethod
+    async def finished_before(self, cutoff: float, limit: int) -> List[TaskKey]:
+        """Completed or failed tasks of any user last updated before `cutoff` (epoch seconds)"""
+
+    @abstractmethod
+    async def apply(
+        self,
+        puts: Iterable[Tuple[str, str, TaskState]] = (),
+        deletes: Iterable[TaskKey] = (),
+    ) -> None:
+        """Write and delete a batch of tasks, and their index entries, atomically in one round trip"""
+
+    @abstractmethod
+    async def save_snapshot(self, state: TaskState, ttl: int) -> None:
+        """Keep a standalone copy of a task, addressable by task id, for `ttl` seconds"""
+
+    @abstractmethod
+    async def get_snapshot(self, task_id: str) -> Optional[TaskState]:
+        """Fetch a snapshot written by save_snapshot, or None once it expired"""
+
+    @abstractmethod
+    async def scan_raw(self, user_id: str, cursor: int, count: int) -> Tuple[int, List[Tuple[str, Any]]]:
+        """One incremental scan step over a user's tasks as (name, stored value) pairs.
+
+        Returns the next scan cursor (0 once the scan is complete). Like HSCAN,
+        `count` is only a hint and a step may return more or fewer entries.
+        """
+
+    def decode(self, task_data: Any) -> Optional[TaskState]:
+        """Build a TaskState from a value returned by scan_raw"""
+        return TaskState.model_validate_json(task_data)
+
+    def has_status(self, task_data: Any, status: str) -> bool:
+        """Cheap status check on a value returned by scan_raw, before paying for decode"""
+        return f'"status":"{status}"' in task_data
+
+    async def page(
+        self,
+        user_id: str,
+        cursor: Optional[str] = None,
+        limit: int = 20,
+        status: Optional[str] = None,
+    ) -> Tuple[List[Tuple[str, TaskState]], Optional[str]]:
+        """Return up to `limit` tasks and the cursor of the next page (None when done).
+
+        Only one scan batch is held at a time and only the tasks placed on the
+        page are validated, so memory stays flat however many tasks a user has.
+        Scan batches can be larger than the page, so the cursor also records
+        the offset inside the batch to resume from.
+        """
+        scan_cursor, offset = parse_cursor(cursor)
+        items: List[Tuple[str, TaskState]] = []
+        while True:
+            next_scan_cursor, batch = await self.scan_raw(user_id, scan_cursor, count=max(limit, 10))
+            for index in range(offset, len(batch)):
+                task_name, task_data = batch[index]
+                if status and not self.has_status(task_data, status):
+                    continue
+                if len(items) == limit:
+                    return items, f"{scan_cursor}:{index}"
+                task_state = self.decode(task_data)
+                if task_state is None or (status and task_state.status != status):
+                    continue
+                items.append((task_name, task_state))
+            if next_scan_cursor == 0:
+                return items, None
+            scan_cursor, offset = next_scan_cursor, 0
+
+    async def transition(
+        self, transition: str, user_id: str, task_name: str, state: TaskState, remove: bool = False
+    ) -> TransitionResult:
+        """Move a task to `state` if its stored status allows the transition (see TRANSITIONS).
+
+        Every transition except create also requires the stored task id to
+        match `state.task_id`, so a task replaced in the meantime is a conflict.
+        """
+        return (await self.transition_many([(transition, user_id, task_name, state, remove)]))[0]
+
+    async def transition_many(self, transitions: Iterable[Transition]) -> List[TransitionResult]:
+        """Apply several transitions, each checked and written on its own.
+
+        This read-check-write version is only atomic for the in-memory store,
+        which never yields between the steps; the Redis stores replace it with
+        one Lua script per transition.
+        """
+        results = []
+        for transition, user_id, task_name, state, remove in transitions:
+            allowed = TRANSITIONS[transition]
+            current = await self.get(user_id, task_name)
+            if allowed is not None and (
+                current is None or current.task_id != state.task_id or current.status not in allowed
+            ):
+                results.append(TransitionResult(False, current.status if current else None))
+                continue
+            if remove:
+                await self.apply(deletes=[(user_id, task_name)])
+            else:
+                await self.apply(puts=[(user_id, task_name, state)])
+            results.append(TransitionResult(True, state.status, current is None))
+        return results
+
+    async def recent(self, user_id: str, limit: int = 10, status: Optional[str] = None) -> List[Tuple[str, TaskState]]:
+        """The user's most recently updated tasks, newest first, through the recency / status index"""
+        return await self.get_many(user_id, await self.recent_names(user_id, limit, status))
+
+    async def expire_finished(self, ttl: float, batch_size: int = 500) -> int:
+        """Delete tasks that finished more than `ttl` seconds ago; returns how many were removed"""
+        removed = 0
+        while True:
+            expired = await self.finished_before(time.time() - ttl, batch_size)
+            if not expired:
+                return removed
+            # A task restarted after this read gets a new score and leaves the
+            # finished index, so the window for deleting a live task is tiny
+            await self.apply(deletes=expired)
+            removed += len(expired)
+
+    async def put(self, user_id: str, task_name: str, state: TaskState) -> None:
+        await self.apply(puts=[(user_id, task_name, state)])
+
+    async def delete(self, user_id: str, task_name: str) -> None:
+        await self.apply(deletes=[(user_id, task_name)])
+
+    async def close(self) -> None:
+        pass
+
+
+def initialize_redis_pool() -> redis.BlockingConnectionPool:
+    """Shared Redis connection pool.
+
+    A blocking pool makes bursts wait for a free connection instead of opening
+    unbounded sockets, and keepalive / health checks drop dead connections
+    before a tool call hits them.
+    """
+    return redis.BlockingConnectionPool(
+        host=os.getenv("REDIS_HOST", "localhost"),
+        port=int(os.getenv("REDIS_PORT", 6379)),
+        max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", 64)),
+        timeout=float(os.getenv("REDIS_POOL_TIMEOUT", 5)),
+        socket_connect_timeout=float(os.getenv("REDIS_CONNECT_TIMEOUT", 2)),
+        socket_keepalive=True,
+        health_check_interval=30,
+        decode_responses=True,
+    )
+
+
+_shared_redis_client: Optional[redis.Redis] = None
+
+
+def shared_redis_client() -> redis.Redis:
+    """Process-wide Redis client on the shared pool, for the task store and everything next to it"""
+    global _shared_redis_client
+    if _shared_redis_client is None:
+        _shared_redis_client = redis.Redis(connection_pool=initialize_redis_pool())
+    return _shared_redis_client
+
+
+class RedisTaskIndex:
+    """Sorted-set indexes kept in the same MULTI as the task writes of either Redis layout.
+
+    - user:{id}:tasks:recent             task names scored by updated_at
+    - user:{id}:tasks:status:{status}    the same, one set per status
+    - tasks:finished                     [user_id, task_name] of completed / failed tasks, for TTL cleanup
+    """
+
+    FINISHED_KEY = "tasks:finished"
+
+    @staticmethod
+    def recent_key(user_id: str) -> str:
+        return f"user:{user_id}:tasks:recent"
+
+    @staticmethod
+    def status_key(user_id: str, status: str) -> str:
+        return f"user:{user_id}:tasks:status:{status}"
+
+    @staticmethod
+    def finished_member(user_id: str, task_name: str) -> str:
+        return json.dumps([user_id, task_name])
+
+    def keys(self, user_id: str) -> List[str]:
+        """Index keys in the order the transition scripts expect them"""
+        return [
+            self.recent_key(user_id),
+            *(self.status_key(user_id, status) for status in TASK_STATUSES),
+            self.FINISHED_KEY,
+        ]
+
+    def add(self, pipe, user_id: str, task_name: str, state: TaskState):
+        score = index_score(state)
+        pipe.zadd(self.recent_key(user_id), {task_name: score})
+        for status in TASK_STATUSES:
+            if status == state.status:
+                pipe.zadd(self.status_key(user_id, status), {task_name: score})
+            else:
+                pipe.zrem(self.status_key(user_id, status), task_name)
+        if state.status in FINISHED_STATUSES:
+            pipe.zadd(self.FINISHED_KEY, {self.finished_member(user_id, task_name): score})
+        else:
+            pipe.zrem(self.FINISHED_KEY, self.finished_member(user_id, task_name))
+
+    def remove(self, pipe, user_id: str, task_name: str):
+        pipe.zrem(self.recent_key(user_id), task_name)
+        for status in TASK_STATUSES:
+            pipe.zrem(self.status_key(user_id, status), task_name)
+        pipe.zrem(self.FINISHED_KEY, self.finished_member(user_id, task_name))
+
+    async def recent_names(self, redis_client: redis.Redis, user_id: str, limit: int, status: Optional[str]) -> List[str]:
+        key = self.status_key(user_id, status) if status else self.recent_key(user_id)
+        return await redis_client.zrevrange(key, 0, limit - 1)
+
+    async def finished_before(self, redis_client: redis.Redis, cutoff: float, limit: int) -> List[TaskKey]:
+        members = await redis_client.zrangebyscore(self.FINISHED_KEY, "-inf", f"({cutoff}", start=0, num=limit)
+        return [tuple(json.loads(member)) for member in members]
+
+
+def register_transition_scripts(redis_client: redis.Redis, layout: str) -> Dict[str, Any]:
+    return {
+        transition: redis_client.register_script(build_script(layout, transition, TASK_STATUSES))
+        for transition in TRANSITIONS
+    }
+
+
+async def run_transition_scripts(redis_client: redis.Redis, calls: List[Tuple[Any, List[str], List[Any]]]) -> List[TransitionResult]:
+    """EVALSHA each (script, keys, args) call; several calls share one pipelined round trip"""
+    if not calls:
+        return []
+    if len(calls) == 1:
+        script, keys, args = calls[0]
+        # Script.__call__ loads the script and retries on NOSCRIPT
+        replies = [await script(keys=keys, args=args)]
+    else:
+        pipe = redis_client.pipeline(transaction=False)
+        for script, keys, args in calls:
+            pipe.evalsha(script.sha, len(keys), *keys, *args)
+        replies = await pipe.execute(raise_on_error=False)
+        for i, reply in enumerate(replies):
+            # Only scripts that never ran are retried, after Redis lost its script cache
+            if isinstance(reply, NoScriptError):
+                script, keys, args = calls[i]
+                replies[i] = await script(keys=keys, args=args)
+            elif isinstance(reply, Exception):
+                raise reply
+    return [
+        TransitionResult(True, reply[1], bool(reply[2])) if reply[0] == 1
+        else TransitionResult(False, reply[1] or None)
+        for reply in replies
+    ]
+
+
+class RedisTaskStore(TaskStore):
+    """Tasks stored as JSON values in the `user:{user_id}:tasks` hash"""
+
+    def __init__(self, redis_client: redis.Redis):
+        self.redis_client = redis_client
+        self.index = RedisTaskIndex()
+        self.scripts = register_transition_scripts(redis_client, "json")
+
+    @staticmethod
+    def user_key(user_id: str) -> str:
+        return f"user:{user_id}:tasks"
+
+    async def create(self, user_id: str, task_name: str, state: TaskState) -> bool:
+        return (await self.transition("create", user_id, task_name, state)).created
+
+    async def transition_many(self, transitions: Iterable[Transition]) -> List[TransitionResult]:
+        calls = [
+            (
+                self.scripts[transition],
+                [self.user_key(user_id), *self.index.keys(user_id)],
+                [
+                    task_name, state.task_id, "" if remove else state.model_dump_json(), state.status,
+                    index_score(state), self.index.finished_member(user_id, task_name), int(remove),
+                ],
+            )
+            for transition, user_id, task_name, state, remove in transitions
+        ]
+        return await run_transition_scripts(self.redis_client, calls)
+
+    async def get(self, user_id: str, task_name: str) -> Optional[TaskState]:
+        task_data = await self.redis_client.hget(self.user_key(user_id), task_name)
+        return TaskState.model_validate_json(task_data) if task_data else None
+
+    async def list(self, user_id: str) -> Dict[str, TaskState]:
+        tasks = await self.redis_client.hgetall(self.user_key(user_id))
+        return {name: TaskState.model_validate_json(data) for name, data in tasks.items()}
+
+    async def get_many(self, user_id: str, task_names: List[str]) -> List[Tuple[str, TaskState]]:
+        if not task_names:
+            return []
+        values = await self.redis_client.hmget(self.user_key(user_id), task_names)
+        return [
+            (task_name, TaskState.model_validate_json(task_data))
+            for task_name, task_data in zip(task_names, values) if task_data
+        ]
+
+    async def recent_names(self, user_id: str, limit: int, status: Optional[str] = None) -> List[str]:
+        return await self.index.recent_names(self.redis_client, user_id, limit, status)
+
+    async def finished_before(self, cutoff: float, limit: int) -> List[TaskKey]:
+        return await self.index.finished_before(self.redis_client, cutoff, limit)
+
+    async def scan_raw(self, user_id: str, cursor: int, count: int) -> Tuple[int, List[Tuple[str, str]]]:
+        next_cursor, tasks = await self.redis_client.hscan(self.user_key(user_id), cursor, count=count)
+        return int(next_cursor), list(tasks.items())
+
+    async def apply(self, puts=(), deletes=()) -> None:
+        pipe = self.redis_client.pipeline(transaction=True)
+        for user_id, task_name, state in puts:
+            pipe.hset(self.user_key(user_id), task_name, state.model_dump_json())
+            self.index.add(pipe, user_id, task_name, state)
+        for user_id, task_name in deletes:
+            pipe.hdel(self.user_key(user_id), task_name)
+            self.index.remove(pipe, user_id, task_name)
+        if len(pipe):
+            await pipe.execute()
+
+    async def save_snapshot(self, state: TaskState, ttl: int) -> None:
+        await self.redis_client.set(f"task:{state.task_id}", state.model_dump_json(), ex=ttl)
+
+    async def get_snapshot(self, task_id: str) -> Optional[TaskState]:
+        task_data = await self.redis_client.get(f"task:{task_id}")
+        return TaskState.model_validate_json(task_data) if task_data else None
+
+    async def close(self) -> None:
+        await self.redis_client.aclose()
+        await self.redis_client.connection_pool.disconnect()
+
+
+class RedisHashTaskStore(TaskStore):
+    """One Redis hash per task (`user:{user_id}:task:{task_name}`), plus a set of task names per user.
+
+    Writes send only the fields that changed since the state was read or last
+    written, so a progress tick is an HSET of `progress` and `updated_at`
+    instead of the whole JSON document. Reads rebuild TaskState from the hash
+    fields without a JSON parse. Fields that are None are stored as absent.
+    """
+
+    def __init__(self, redis_client: redis.Redis):
+        self.redis_client = redis_client
+        self.index = RedisTaskIndex()
+        self.scripts = register_transition_scripts(redis_client, "hash")
+
+    @staticmethod
+    def task_key(user_id: str, task_name: str) -> str:
+        return f"user:{user_id}:task:{task_name}"
+
+    @staticmethod
+    def names_key(user_id: str) -> str:
+        return f"user:{user_id}:task_names"
+
+    @staticmethod
+    def encode(fields: Dict[str, Any]) -> Tuple[Dict[str, str], List[str]]:
+        """Split fields into values to HSET and None fields to HDEL"""
+        values = {name: str(value) for name, value in fields.items() if value is not None}
+        missing = [name for name, value in fields.items() if value is None]
+        return values, missing
+
+    def decode(self, task_data: Dict[str, str]) -> Optional[TaskState]:
+        # A partial update racing a delete can leave a hash without its identity fields
+        if not task_data or "task_id" not in task_data:
+            return None
+        task_state = TaskState.model_validate(task_data)
+        task_state.mark_persisted()
+        return task_state
+
+    def has_status(self, task_data: Dict[str, str], status: str) -> bool:
+        return task_data.get("status") == status
+
+    async def create(self, user_id: str, task_name: str, state: TaskState) -> bool:
+        return (await self.transition("create", user_id, task_name, state)).created
+
+    async def transition_many(self, transitions: Iterable[Transition]) -> List[TransitionResult]:
+        transitions = list(transitions)
+        calls = []
+        for transition, user_id, task_name, state, remove in transitions:
+            reset = transition == "create"
+            # A removal only deletes the hash, so no fields are sent
+            values, missing = ({}, []) if remove else self.encode(state.model_dump() if reset else state.changed_fields())
+            pairs = [item for field in values.items() for item in field]
+            calls.append((
+                self.scripts[transition],
+                [self.task_key(user_id, task_name), self.names_key(user_id), *self.index.keys(user_id)],
+                [
+                    task_name, state.task_id, state.status, index_score(state),
+                    self.index.finished_member(user_id, task_name), int(remove), int(reset),
+                    len(values), *pairs, *([] if reset else missing),
+                ],
+            ))
+        results = await run_transition_scripts(self.redis_client, calls)
+        for (_, _, _, state, _), result in zip(transitions, results):
+            if result.ok:
+                state.mark_persisted()
+        return results
+
+    async def get(self, user_id: str, task_name: str) -> Optional[TaskState]:
+        return self.decode(await self.redis_client.hgetall(self.task_key(user_id, task_name)))
+
+    async def _fetch(self, user_id: str, task_names) -> List[Tuple[str, Dict[str, str]]]:
+        pipe = self.redis_client.pipeline(transaction=False)
+        for task_name in task_names:
+            pipe.hgetall(self.task_key(user_id, task_name))
+        return list(zip(task_names, await pipe.execute())) if task_names else []
+
+    async def get_many(self, user_id: str, task_names: List[str]) -> List[Tuple[str, TaskState]]:
+        tasks = []
+        for task_name, task_data in await self._fetch(user_id, task_names):
+            task_state = self.decode(task_data)
+            if task_state is not None:
+                tasks.append((task_name, task_state))
+        return tasks
+
+    async def recent_names(self, user_id: str, limit: int, status: Optional[str] = None) -> List[str]:
+        return await self.index.recent_names(self.redis_client, user_id, limit, status)
+
+    async def finished_before(self, cutoff: float, limit: int) -> List[TaskKey]:
+        return await self.index.finished_before(self.redis_client, cutoff, limit)
+
+    async def list(self, user_id: str) -> Dict[str, TaskState]:
+        task_names = list(await self.redis_client.smembers(self.names_key(user_id)))
+        tasks = {}
+        for task_name, task_data in await self._fetch(user_id, task_names):
+            task_state = self.decode(task_data)
+            if task_state is not None:
+                tasks[task_name] = task_state
+        return tasks
+
+    async def scan_raw(self, user_id: str, cursor: int, count: int) -> Tuple[int, List[Tuple[str, Dict[str, str]]]]:
+        next_cursor, task_names = await self.redis_client.sscan(self.names_key(user_id), cursor, count=count)
+        return int(next_cursor), await self._fetch(user_id, list(task_names))
+
+    async def apply(self, puts=(), deletes=()) -> None:
+        puts = list(puts)
+        pipe = self.redis_client.pipeline(transaction=True)
+        for user_id, task_name, state in puts:
+            key = self.task_key(user_id, task_name)
+            values, missing = self.encode(state.changed_fields())
+            if values:
+                pipe.hset(key, mapping=values)
+            if missing:
+                pipe.hdel(key, *missing)
+            if state._persisted is None:
+                pipe.sadd(self.names_key(user_id), task_name)
+            self.index.add(pipe, user_id, task_name, state)
+        for user_id, task_name in deletes:
+            pipe.delete(self.task_key(user_id, task_name))
+            pipe.srem(self.names_key(user_id), task_name)
+            self.index.remove(pipe, user_id, task_name)
+        if len(pipe):
+            await pipe.execute()
+        for _, _, state in puts:
+            state.mark_persisted()
+
+    async def save_snapshot(self, state: TaskState, ttl: int) -> None:
+        await self.redis_client.set(f"task:{state.task_id}", state.model_dump_json(), ex=ttl)
+
+    async def get_snapshot(self, task_id: str) -> Optional[TaskState]:
+        task_data = await self.redis_client.get(f"task:{task_id}")
+        return TaskState.model_validate_json(task_data) if task_data else None
+
+    async def close(self) -> None:
+        await self.redis_client.aclose()
+        await self.redis_client.connection_pool.disconnect()
+
+
+async def migrate_to_hash_layout(redis_client: redis.Redis, batch_size: int = 500, keep_source: bool = False) -> int:
+    """Copy every `user:{id}:tasks` JSON hash into the per-task hash layout.
+
+    Safe to re-run: tasks and their index entries are rewritten from the
+    source each time, which also indexes tasks written before the indexes
+    existed. The source
+    hash is deleted once all of its tasks were copied, unless `keep_source`.
+    Returns the number of tasks migrated.
+    """
+    hash_store = RedisHashTaskStore(redis_client)
+    migrated = 0
+    async for key in redis_client.scan_iter(match="user:*:tasks", count=batch_size):
+        if ":task:" in key:
+            continue  # a per-task hash whose task name ends in ":tasks"
+        user_id = key[len("user:"):-len(":tasks")]
+        cursor = 0
+        while True:
+            cursor, tasks = await redis_client.hscan(key, cursor, count=batch_size)
+            pipe = redis_client.pipeline(transaction=False)
+            for task_name, task_data in tasks.items():
+                task_state = TaskState.model_validate_json(task_data)
+                values, _ = hash_store.encode(task_state.model_dump())
+                pipe.delete(hash_store.task_key(user_id, task_name))
+                pipe.hset(hash_store.task_key(user_id, task_name), mapping=values)
+                pipe.sadd(hash_store.names_key(user_id), task_name)
+                hash_store.index.add(pipe, user_id, task_name, task_state)
+            if tasks:
+                await pipe.execute()
+            migrated += len(tasks)
+            if int(cursor) == 0:
+                break
+        if not keep_source:
+            await redis_client.delete(key)
+    return migrated
+
+
+class InMemoryTaskStore(TaskStore):
+    """Process-local stand-in for RedisTaskStore with the same semantics.
+
+    Values are kept serialized, like in Redis, so callers never share mutable
+    TaskState objects with the store.
+    """
+
+    def __init__(self):
+        self._users: Dict[str, Dict[str, str]] = {}
+        # (status, updated_at score) per task, standing in for the Redis sorted-set indexes
+        self._index: Dict[str, Dict[str, Tuple[str, float]]] = {}
+        self._snapshots: Dict[str, Tuple[str, float]] = {}
+
+    async def create(self, user_id: str, task_name: str, state: TaskState) -> bool:
+        tasks = self._users.setdefault(user_id, {})
+        is_new = task_name not in tasks
+        tasks[task_name] = state.model_dump_json()
+        self._index.setdefault(user_id, {})[task_name] = (state.status, index_score(state))
+        return is_new
+
+    async def get_many(self, user_id: str, task_names: List[str]) -> List[Tuple[str, TaskState]]:
+        tasks = self._users.get(user_id, {})
+        return [
+            (task_name, TaskState.model_validate_json(tasks[task_name]))
+            for task_name in task_names if task_name in tasks
+        ]
+
+    async def recent_names(self, user_id: str, limit: int, status: Optional[str] = None) -> List[str]:
+        entries = (
+            (score, task_name)
+            for task_name, (task_status, score) in self._index.get(user_id, {}).items()
+            if status is None or task_status == status
+        )
+        return [task_name for _, task_name in heapq.nlargest(limit, entries)]
+
+    async def finished_before(self, cutoff: float, limit: int) -> List[TaskKey]:
+        entries = (
+            (score, user_id, task_name)
+            for user_id, index in self._index.items()
+            for task_name, (status, score) in index.items()
+            if status in FINISHED_STATUSES and score < cutoff
+        )
+        return [(user_id, task_name) for _, user_id, task_name in heapq.nsmallest(limit, entries)]
+
+    async def get(self, user_id: str, task_name: str) -> Optional[TaskState]:
+        task_data = self._users.get(user_id, {}).get(task_name)
+        return TaskState.model_validate_json(task_data) if task_data else None
+
+    async def list(self, user_id: str) -> Dict[str, TaskState]:
+        tasks = self._users.get(user_id, {})
+        return {name: TaskState.model_validate_json(data) for name, data in tasks.items()}
+
+    async def scan_raw(self, user_id: str, cursor: int, count: int) -> Tuple[int, List[Tuple[str, str]]]:
+        # The scan cursor is a position in insertion order; entries added or
+        # removed mid-scan may be missed or repeated, as with HSCAN
+        tasks = self._users.get(user_id, {})
+        batch = list(islice(tasks.items(), cursor, cursor + count))
+        next_cursor = cursor + count
+        return (next_cursor if next_cursor < len(tasks) else 0), batch
+
+    async def apply(self, puts=(), deletes=()) -> None:
+        for user_id, task_name, state in puts:
+            self._users.setdefault(user_id, {})[task_name] = state.model_dump_json()
+            self._index.setdefault(user_id, {})[task_name] = (state.status, index_score(state))
+        for user_id, task_name in deletes:
+            tasks = self._users.get(user_id)
+            if tasks is not None:
+                tasks.pop(task_name, None)
+                self._index[user_id].pop(task_name, None)
+                if not tasks:
+                    del self._users[user_id]
+                    del self._index[user_id]
+
+    async def save_snapshot(self, state: TaskState, ttl: int) -> None:
+        now = time.monotonic()
+        self._snapshots[state.task_id] = (state.model_dump_json(), now + ttl)
+        if len(self._snapshots) % 1024 == 0:
+            # Expired snapshots are otherwise only dropped when read
+            for task_id in [k for k, (_, exp) in self._snapshots.items() if exp <= now]:
+                del self._snapshots[task_id]
+
+    async def get_snapshot(self, task_id: str) -> Optional[TaskState]:
+        entry = self._snapshots.get(task_id)
+        if entry is None:
+            return None
+        task_data, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._snapshots[task_id]
+            return None
+        return TaskState.model_validate_json(task_data)
+
+
+def initialize_task_store(backend: Optional[str] = None) -> TaskStore:
+    """Build the task store selected by TASK_STORE (redis | redis-hash | memory)"""
+    backend = backend or os.getenv("TASK_STORE", "redis")
+    if backend == "memory":
+        return InMemoryTaskStore()
+    if backend == "redis":
+        return RedisTaskStore(shared_redis_client())
+    if backend == "redis-hash":
+        return RedisHashTaskStore(shared_redis_client())
+    raise ValueError(f"Unknown TASK_STORE backend: {backend}")
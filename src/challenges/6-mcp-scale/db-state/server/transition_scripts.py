@@ -0,0 +1,121 @@
+"""Lua sources for atomic task state transitions.
+
+Each transition (create, start, resume, tick, complete, fail) is its own script: it
+checks the current status and task id, writes the new state and maintains
+the recency / status / finished indexes in one EVALSHA. A script returns
+{1, new_status, created} on success and {0, current_status} on conflict,
+with an empty current_status when the task does not exist.
+
+Index keys come last in KEYS, in this order: recent, one status set per
+status in TASK_STATUSES, finished.
+"""
+from typing import Dict, Optional, Sequence, Tuple
+
+# Statuses a task may be in for each transition to apply; None means unconditional
+TRANSITIONS: Dict[str, Optional[Tuple[str, ...]]] = {
+    "create": None,
+    "start": ("pending", "failed"),
+    # Only for a queued job reclaimed after its worker died, which finds its task still in_progress
+    "resume": ("pending", "in_progress", "failed"),
+    "tick": ("in_progress",),
+    "complete": ("pending", "in_progress", "failed"),
+    "fail": ("pending", "in_progress"),
+}
+
+INDEX_LUA = """
+local function reindex(first, task_name, status, score, member, remove)
+  local finished = first + 1 + #STATUSES
+  if remove then
+    redis.call('ZREM', KEYS[first], task_name)
+    for i = 1, #STATUSES do redis.call('ZREM', KEYS[first + i], task_name) end
+    redis.call('ZREM', KEYS[finished], member)
+    return
+  end
+  redis.call('ZADD', KEYS[first], score, task_name)
+  for i, s in ipairs(STATUSES) do
+    if s == status then
+      redis.call('ZADD', KEYS[first + i], score, task_name)
+    else
+      redis.call('ZREM', KEYS[first + i], task_name)
+    end
+  end
+  if status == 'completed' or status == 'failed' then
+    redis.call('ZADD', KEYS[finished], score, member)
+  else
+    redis.call('ZREM', KEYS[finished], member)
+  end
+end
+"""
+
+# KEYS: user hash, index keys
+# ARGV: task name, expected task id, state JSON, new status, score, finished member, remove
+JSON_LAYOUT_LUA = """
+local task_name, expected_id, value, status, score, member = ARGV[1], ARGV[2], ARGV[3], ARGV[4], ARGV[5], ARGV[6]
+local remove = ARGV[7] == '1'
+{check}
+local created = 0
+if remove then
+  redis.call('HDEL', KEYS[1], task_name)
+else
+  created = redis.call('HSET', KEYS[1], task_name, value)
+end
+reindex(2, task_name, status, score, member, remove)
+return {{1, status, created}}
+"""
+
+JSON_LAYOUT_CHECK = """
+local current = redis.call('HGET', KEYS[1], task_name)
+if not current then return {0, ''} end
+local state = cjson.decode(current)
+if state['task_id'] ~= expected_id or not ALLOWED[state['status']] then
+  return {0, state['status']}
+end
+"""
+
+# KEYS: task hash, user's task name set, index keys
+# ARGV: task name, expected task id, new status, score, finished member, remove,
+#       reset (rewrite the whole hash), number of field/value pairs, the pairs,
+#       then fields to delete
+HASH_LAYOUT_LUA = """
+local task_name, expected_id, status, score, member = ARGV[1], ARGV[2], ARGV[3], ARGV[4], ARGV[5]
+local remove = ARGV[6] == '1'
+{check}
+local created = 0
+if remove then
+  redis.call('DEL', KEYS[1])
+  redis.call('SREM', KEYS[2], task_name)
+else
+  if ARGV[7] == '1' then redis.call('DEL', KEYS[1]) end
+  local pairs_end = 8 + 2 * tonumber(ARGV[8])
+  if pairs_end > 8 then redis.call('HSET', KEYS[1], unpack(ARGV, 9, pairs_end)) end
+  if #ARGV > pairs_end then redis.call('HDEL', KEYS[1], unpack(ARGV, pairs_end + 1, #ARGV)) end
+  created = redis.call('SADD', KEYS[2], task_name)
+end
+reindex(3, task_name, status, score, member, remove)
+return {{1, status, created}}
+"""
+
+HASH_LAYOUT_CHECK = """
+local current = redis.call('HMGET', KEYS[1], 'task_id', 'status')
+if not current[1] then return {0, ''} end
+if current[1] ~= expected_id or not ALLOWED[current[2]] then
+  return {0, current[2]}
+end
+"""
+
+
+def lua_set(values: Sequence[str]) -> str:
+    return "{" + ", ".join(f"['{value}'] = true" for value in values) + "}"
+
+
+def build_script(layout: str, transition: str, statuses: Sequence[str]) -> str:
+    """Lua source of one transition for the "json" or "hash" storage layout"""
+    body, check = {
+        "json": (JSON_LAYOUT_LUA, JSON_LAYOUT_CHECK),
+        "hash": (HASH_LAYOUT_LUA, HASH_LAYOUT_CHECK),
+    }[layout]
+    allowed = TRANSITIONS[transition]
+    header = "local STATUSES = {" + ", ".join(f"'{status}'" for status in statuses) + "}\n"
+    if allowed is not None:
+        header += f"local ALLOWED = {lua_set(allowed)}\n"
+    return header + INDEX_LUA + body.format(check=check if allowed is not None else "")
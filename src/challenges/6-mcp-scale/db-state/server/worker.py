@@ -0,0 +1,26 @@
+"""Standalone worker process for tasks queued by do_task(background=True).
+
+    TASK_QUEUE=redis TASK_WORKERS=8 python worker.py
+
+Run MCP replicas with TASK_WORKERS=0 to move all task execution here.
+"""
+import asyncio
+from server import job_queue, log, progress_bus, progress_writer, task_store, worker_pool
+
+
+async def main():
+    if job_queue is None:
+        raise SystemExit("Set TASK_QUEUE=redis to run queue workers")
+    await worker_pool.start()
+    log.info("workers started", workers=worker_pool.concurrency, consumer_prefix=worker_pool.consumer_prefix)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await worker_pool.stop()
+        await progress_writer.close()
+        await progress_bus.close()
+        await task_store.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,32 @@
+from typing import Dict, List, Literal
+from pydantic import BaseModel, Field
+
+
+class CartOp(BaseModel):
+    op: Literal["add", "remove"]
+    item: str
+    quantity: int = Field(ge=1)
+
+
+class Cart(BaseModel):
+    items: Dict[str, int]
+    applied: int = Field(description="Number of operations applied")
+
+
+def apply_ops(items: Dict[str, int], ops: List[CartOp]) -> Dict[str, int]:
+    """Apply ops in order to a copy of `items`, the same way add_to_cart / remove_from_cart would.
+
+    Raises ValueError, leaving `items` untouched, if any op removes an item
+    that is not in the cart at that point.
+    """
+    cart = dict(items)
+    for i, op in enumerate(ops):
+        if op.op == "add":
+            cart[op.item] = cart.get(op.item, 0) + op.quantity
+        elif op.item not in cart:
+            raise ValueError(f"Operation {i}: {op.item!r} is not in the cart; no operations were applied")
+        elif op.quantity >= cart[op.item]:
+            del cart[op.item]
+        else:
+            cart[op.item] -= op.quantity
+    return cart
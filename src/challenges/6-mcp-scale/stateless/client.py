@@ -1,10 +1,20 @@
 import asyncio
+import sys
+import time
+import uuid
 from mcp.client.streamable_http import streamablehttp_client
 from mcp import ClientSession
+from mcp_session_pool import SessionPool
+
+URL = "http://localhost:8000/mcp"
+
+def cart_headers() -> dict:
+    # Names the cart; with --workers N the server runs stateless and issues no mcp-session-id
+    return {"X-Session-ID": str(uuid.uuid4())}
 
 async def stateful_shopping_cart():
     """Test the stateful shopping cart server - session state is maintained."""
-    async with streamablehttp_client("http://localhost:8000/mcp") as (read_stream, write_stream, _):
+    async with streamablehttp_client(URL, headers=cart_headers()) as (read_stream, write_stream, _):
         async with ClientSession(read_stream, write_stream) as session1:
             await session1.initialize()
             print("[Session 1] 🛒 Starting with empty cart...")
@@ -20,7 +30,7 @@ async def stateful_shopping_cart():
             remove_result = await session1.call_tool("remove_from_cart", {"item": "🍎", "quantity": 2})
             print(f"[Session 1] removed from cart (-2 🍎) --> state: {remove_result.content[0].text}")
     input()
-    async with streamablehttp_client("http://localhost:8000/mcp") as (read_stream, write_stream, _):
+    async with streamablehttp_client(URL, headers=cart_headers()) as (read_stream, write_stream, _):
         async with ClientSession(read_stream, write_stream) as session2:
             await session2.initialize()
             print("[Session 2]🛒 Starting with empty cart...")
@@ -31,6 +41,46 @@ async def stateful_shopping_cart():
             print(f"[Session 2] added to cart (+1 🍍) --> state: {result.content[0].text}")
 
 
+async def fill_cart(session: ClientSession, shopper: int) -> bool:
+    # A pooled session keeps its X-Session-ID cart between conversations, so start each one empty
+    await session.call_tool("clear_cart", {})
+    await session.call_tool("add_to_cart", {"item": f"🍎-{shopper}", "quantity": 1})
+    result = await session.call_tool("view_cart", {})
+    return result.content[0].text == f"Your cart contains: {{'🍎-{shopper}': 1}}"
+
+async def pooled_shopping_cart(shoppers: int = 50, pool_size: int = 4):
+    """Serve many short conversations, connecting per conversation vs borrowing from a session pool."""
+    # Both paths run the same concurrent conversations, at most pool_size at a time
+    slots = asyncio.Semaphore(pool_size)
+
+    async def connect_per_use(shopper: int) -> bool:
+        async with slots:
+            async with streamablehttp_client(URL, headers=cart_headers()) as (read_stream, write_stream, _):
+                async with ClientSession(read_stream, write_stream) as session:
+                    await session.initialize()
+                    return await fill_cart(session, shopper)
+
+    start = time.perf_counter()
+    carts = await asyncio.gather(*(connect_per_use(shopper) for shopper in range(shoppers)))
+    per_use = time.perf_counter() - start
+    print(f"connect per conversation: {shoppers} conversations in {per_use:.2f}s, {carts.count(False)} wrong carts")
+
+    async with SessionPool(URL, size=pool_size, headers=cart_headers) as pool:
+
+        async def pooled(shopper: int) -> bool:
+            async with pool.acquire() as session:
+                return await fill_cart(session, shopper)
+
+        start = time.perf_counter()
+        carts = await asyncio.gather(*(pooled(shopper) for shopper in range(shoppers)))
+        pooled_s = time.perf_counter() - start
+        print(f"session pool of {pool_size}: {shoppers} conversations in {pooled_s:.2f}s, {carts.count(False)} wrong carts")
+        print(pool.stats())
+
+
 if __name__ == "__main__":
-    asyncio.run(stateful_shopping_cart())
+    if "--pool" in sys.argv:
+        asyncio.run(pooled_shopping_cart())
+    else:
+        asyncio.run(stateful_shopping_cart())
     
\ No newline at end of file
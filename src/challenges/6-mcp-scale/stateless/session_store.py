@@ -0,0 +1,310 @@
+import contextlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, Optional
+
+
+class CartRecord:
+    """One session's cart: item -> quantity, plus bookkeeping for eviction"""
+
+    __slots__ = ("items", "last_seen", "size")
+
+    def __init__(self):
+        self.items: Dict[str, int] = {}
+        self.last_seen = time.monotonic()
+        self.size = 0
+
+    def measure(self, session_id: str) -> int:
+        """Approximate bytes held by this record, its session id and its items"""
+        return (
+            sys.getsizeof(self)
+            + sys.getsizeof(session_id)
+            + sys.getsizeof(self.items)
+            + sum(sys.getsizeof(item) + sys.getsizeof(quantity) for item, quantity in self.items.items())
+        )
+
+
+class SessionStore:
+    """Bounded cart store keyed by mcp-session-id.
+
+    Records are kept in least-recently-used order, which is also idle order,
+    so idle sessions are evicted from the front in O(evicted) on every access.
+    When the store holds more than `max_entries` records or `max_bytes`
+    (approximate) the least recently used sessions are evicted as well.
+    """
+
+    def __init__(self, max_entries: int = 10_000, max_bytes: int = 64 * 1024 * 1024, idle_ttl: float = 1800.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self._records: "OrderedDict[str, CartRecord]" = OrderedDict()
+        self.bytes_used = 0
+        self.sessions_created = 0
+        self.evicted_idle = 0
+        self.evicted_entries = 0
+        self.evicted_bytes = 0
+        self.sessions_closed = 0
+
+    def get(self, session_id: str) -> CartRecord:
+        """The session's cart record, created empty if the session has none"""
+        self.evict_idle()
+        record = self._records.get(session_id)
+        if record is None:
+            record = self._records[session_id] = CartRecord()
+            self.sessions_created += 1
+            self.update(session_id, record)
+        else:
+            self._records.move_to_end(session_id)
+        record.last_seen = time.monotonic()
+        return record
+
+    def update(self, session_id: str, record: CartRecord):
+        """Re-measure a record after its items changed, then enforce the entry and byte limits"""
+        size = record.measure(session_id)
+        self.bytes_used += size - record.size
+        record.size = size
+        while len(self._records) > self.max_entries:
+            self._evict_oldest()
+            self.evicted_entries += 1
+        while self.bytes_used > self.max_bytes and len(self._records) > 1:
+            self._evict_oldest()
+            self.evicted_bytes += 1
+
+    @contextlib.contextmanager
+    def cart(self, session_id: str) -> Iterator[CartRecord]:
+        """A copy of the session's cart to read or change; changes are stored on a clean exit only"""
+        record = self.get(session_id)
+        draft = CartRecord()
+        draft.items = dict(record.items)
+        yield draft
+        # Not reached if the block raised, so like the SQLite store's ROLLBACK a failed call changes nothing
+        record.items = draft.items
+        self.update(session_id, record)
+
+    def discard(self, session_id: str) -> bool:
+        """Drop a session's cart, e.g. when the MCP session is closed"""
+        record = self._records.pop(session_id, None)
+        if record is None:
+            return False
+        self.bytes_used -= record.size
+        return True
+
+    def evict_idle(self):
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._records:
+            session_id, record = next(iter(self._records.items()))
+            if record.last_seen > cutoff:
+                break
+            self.discard(session_id)
+            self.evicted_idle += 1
+
+    def _evict_oldest(self):
+        self.discard(next(iter(self._records)))
+
+    def close_session(self, session_id: Optional[str]):
+        if session_id and self.discard(session_id):
+            self.sessions_closed += 1
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory",
+            "sessions": len(self._records),
+            "max_entries": self.max_entries,
+            "bytes_used": self.bytes_used,
+            "max_bytes": self.max_bytes,
+            "idle_ttl_s": self.idle_ttl,
+            "sessions_created": self.sessions_created,
+            "sessions_closed": self.sessions_closed,
+            "evicted_idle": self.evicted_idle,
+            "evicted_entries": self.evicted_entries,
+            "evicted_bytes": self.evicted_bytes,
+        }
+
+
+class SqliteSessionStore:
+    """Cart store in a SQLite file, shared by every worker process on the host.
+
+    Each cart() call is one IMMEDIATE transaction, so concurrent requests for
+    the same session from different workers are serialized. The tools calling
+    it are sync and run on the event loop, so a locked database is waited on
+    for at most `busy_timeout` seconds per attempt, `busy_retries` attempts,
+    before the call fails. The same limits
+    as SessionStore apply; eviction runs inside the writing transaction.
+    Counters in stats() are per process, sizes come from the database.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_entries: int = 10_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        idle_ttl: float = 1800.0,
+        busy_timeout: float = 0.05,
+        busy_retries: int = 4,
+    ):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+        self.busy_timeout = busy_timeout
+        self.busy_retries = busy_retries
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_pid: Optional[int] = None
+        self.sessions_created = 0
+        self.sessions_closed = 0
+        self.evicted_idle = 0
+        self.evicted_entries = 0
+        self.evicted_bytes = 0
+        self.lock_retries = 0
+        self.lock_failures = 0
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        # Connections must not cross fork(), so each worker opens its own
+        if self._db is None or self._db_pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS carts ("
+                " session_id TEXT PRIMARY KEY, items TEXT NOT NULL, size INTEGER NOT NULL, last_seen REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS carts_last_seen ON carts (last_seen)")
+            self._db_pid = os.getpid()
+        return self._db
+
+    def _begin(self, db: sqlite3.Connection):
+        for attempt in range(self.busy_retries):
+            try:
+                db.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) and "busy" not in str(e):
+                    raise
+                if attempt == self.busy_retries - 1:
+                    self.lock_failures += 1
+                    raise
+                self.lock_retries += 1
+
+    @contextlib.contextmanager
+    def cart(self, session_id: str) -> Iterator[CartRecord]:
+        db = self.db
+        self._begin(db)
+        try:
+            row = db.execute("SELECT items FROM carts WHERE session_id = ?", (session_id,)).fetchone()
+            record = CartRecord()
+            if row is None:
+                self.sessions_created += 1
+            else:
+                record.items = json.loads(row[0])
+            yield record
+            items = json.dumps(record.items)
+            record.size = len(session_id) + len(items)
+            db.execute(
+                "INSERT INTO carts (session_id, items, size, last_seen) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (session_id) DO UPDATE SET items = excluded.items, size = excluded.size,"
+                " last_seen = excluded.last_seen",
+                (session_id, items, record.size, time.time()),
+            )
+            self._evict(db)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def _evict(self, db: sqlite3.Connection):
+        self.evicted_idle += db.execute(
+            "DELETE FROM carts WHERE last_seen < ?", (time.time() - self.idle_ttl,)
+        ).rowcount
+        sessions, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM carts").fetchone()
+        if sessions > self.max_entries:
+            self.evicted_entries += db.execute(
+                "DELETE FROM carts WHERE session_id IN (SELECT session_id FROM carts ORDER BY last_seen LIMIT ?)",
+                (sessions - self.max_entries,),
+            ).rowcount
+        while size > self.max_bytes and sessions > 1:
+            session_id, oldest_size = db.execute(
+                "SELECT session_id, size FROM carts ORDER BY last_seen LIMIT 1"
+            ).fetchone()
+            db.execute("DELETE FROM carts WHERE session_id = ?", (session_id,))
+            size -= oldest_size
+            sessions -= 1
+            self.evicted_bytes += 1
+
+    def close_session(self, session_id: Optional[str]):
+        if session_id and self.db.execute("DELETE FROM carts WHERE session_id = ?", (session_id,)).rowcount:
+            self.sessions_closed += 1
+
+    def stats(self) -> dict:
+        sessions, size = self.db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM carts").fetchone()
+        return {
+            "backend": "sqlite",
+            "pid": os.getpid(),
+            "sessions": sessions,
+            "max_entries": self.max_entries,
+            "bytes_used": size,
+            "max_bytes": self.max_bytes,
+            "idle_ttl_s": self.idle_ttl,
+            "sessions_created": self.sessions_created,
+            "sessions_closed": self.sessions_closed,
+            "evicted_idle": self.evicted_idle,
+            "evicted_entries": self.evicted_entries,
+            "evicted_bytes": self.evicted_bytes,
+            "lock_retries": self.lock_retries,
+            "lock_failures": self.lock_failures,
+        }
+
+
+def initialize_session_store():
+    """Session store selected by SESSION_BACKEND: memory (one process) or sqlite (shared by workers)"""
+    limits = dict(
+        max_entries=int(os.getenv("SESSION_MAX_ENTRIES", 10_000)),
+        max_bytes=int(os.getenv("SESSION_MAX_BYTES", 64 * 1024 * 1024)),
+        idle_ttl=float(os.getenv("SESSION_IDLE_TTL", 1800)),
+    )
+    backend = os.getenv("SESSION_BACKEND", "memory")
+    if backend == "sqlite":
+        return SqliteSessionStore(
+            os.getenv("SESSION_DB", "carts.sqlite3"),
+            busy_timeout=float(os.getenv("SESSION_DB_BUSY_TIMEOUT", 0.05)),
+            busy_retries=int(os.getenv("SESSION_DB_BUSY_RETRIES", 4)),
+            **limits,
+        )
+    if backend == "memory":
+        return SessionStore(**limits)
+    raise ValueError(f"Unknown SESSION_BACKEND: {backend!r}")
+
+
+class SessionCloseMiddleware:
+    """ASGI middleware that drops a session's cart once the client has DELETEd the MCP session.
+
+    The cart is looked up the way the tools name it: X-Session-ID, else mcp-session-id.
+    It is only dropped when the DELETE succeeded (2xx), so a rejected DELETE,
+    e.g. for an unknown or someone else's session, leaves the cart alone.
+    """
+
+    def __init__(self, app, store: SessionStore):
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "DELETE":
+            await self.app(scope, receive, send)
+            return
+        status = None
+
+        async def send_and_record_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        await self.app(scope, receive, send_and_record_status)
+        if status is not None and 200 <= status < 300:
+            headers = dict(scope["headers"])
+            session_id = headers.get(b"x-session-id") or headers.get(b"mcp-session-id")
+            self.store.close_session(session_id.decode() if session_id else None)
@@ -1,61 +1,107 @@
 from mcp.server.fastmcp import FastMCP, Context
+from mcp.server.fastmcp.exceptions import ToolError
 from typing import Dict, List
+import argparse
 import json
+import os
+from cart_ops import Cart, CartOp, apply_ops
+from mcp_logging import get_logger
+from session_store import SessionCloseMiddleware, initialize_session_store
 
-mcp = FastMCP("StatefulShoppingCart", stateless_http=False)
+# MCP sessions live in the process that created them, so with several workers
+# the transport runs stateless and the client names its cart session with an
+# X-Session-ID header; the carts themselves go to the shared SQLite store
+MULTI_WORKER = int(os.getenv("CART_WORKERS", 1)) > 1
 
-session_storage: Dict[str, Dict] = {}
+mcp = FastMCP("StatefulShoppingCart", stateless_http=MULTI_WORKER)
+log = get_logger("stateful_cart")
+
+# Carts are dropped when the MCP session is closed, after SESSION_IDLE_TTL
+# seconds without a call, or least recently used first once the store is full
+session_storage = initialize_session_store()
+
+def get_session_id(ctx: Context) -> str:
+    headers = ctx.request_context.request.headers
+    session_id = headers.get("X-Session-ID") or headers.get("mcp-session-id")
+    if not session_id:
+        # Stateless transport (--workers N) and a client that did not name its cart
+        raise ToolError("No cart session: send an X-Session-ID header")
+    return session_id
 
 @mcp.tool()
 def add_to_cart(item: str, quantity: int, ctx: Context) -> str:
     """Add an item to the shopping cart."""
-    print("========== add_to_cart ==========")
-    print(f"request.headers: {ctx.request_context.request.headers}")
-    session_id = ctx.request_context.request.headers.get("mcp-session-id")
-    print(f"session_id: {session_id}")
-    session_storage[session_id] = session_storage.get(session_id, {"cart": {}})
-    print(f"cart before: {session_storage[session_id]['cart']}")
-    session_storage[session_id]["cart"][item] = session_storage[session_id]["cart"].get(item, 0) + quantity
-    print(f"cart after: {session_storage[session_id]['cart']}")
-    return f"{session_storage[session_id]['cart']}"
+    session_id = get_session_id(ctx)
+    with session_storage.cart(session_id) as record:
+        record.items[item] = record.items.get(item, 0) + quantity
+    log.debug("add_to_cart", session_id=session_id, item=item, quantity=quantity, cart_size=len(record.items))
+    return f"{record.items}"
 
 @mcp.tool()
 def view_cart(ctx: Context) -> str:
     """View the current shopping cart."""
-    print("========== view_cart ==========")
-    session_id = ctx.request_context.request.headers.get("mcp-session-id")
-    print(f"session_id: {session_id}")
-    cart = session_storage[session_id]["cart"]
-    print(f"cart: {cart}")
+    session_id = get_session_id(ctx)
+    with session_storage.cart(session_id) as record:
+        cart = record.items
+    log.debug("view_cart", session_id=session_id, cart_size=len(cart))
     return f"Your cart contains: {cart}"
 
 @mcp.tool()
 def remove_from_cart(item: str, quantity: int, ctx: Context) -> str:
     """Remove an item from the shopping cart."""
-    print("========== remove_from_cart ==========")
-    session_id = ctx.request_context.request.headers.get("mcp-session-id")
-    
-    current_quantity = session_storage[session_id]["cart"][item]
-    
-    if quantity >= current_quantity:
-        del session_storage[session_id]["cart"][item]
-        removed = current_quantity
-    else:
-        session_storage[session_id]["cart"][item] -= quantity
-        removed = quantity
-    
-    return f"{session_storage[session_id]['cart']}"
+    session_id = get_session_id(ctx)
+    log.debug("remove_from_cart", session_id=session_id, item=item, quantity=quantity)
+
+    with session_storage.cart(session_id) as record:
+        current_quantity = record.items[item]
+
+        if quantity >= current_quantity:
+            del record.items[item]
+            removed = current_quantity
+        else:
+            record.items[item] -= quantity
+            removed = quantity
+
+    return f"{record.items}"
 
 @mcp.tool()
 def clear_cart(ctx: Context) -> str:
     """Clear the entire shopping cart."""
-    # Get session ID consistently
-    session_id = getattr(ctx.request_context.session, 'session_id', str(id(ctx.request_context.session)))
-    
-    if session_id in session_storage:
-        session_storage[session_id] = {"cart": {}, "total_items": 0}
-    
+    session_id = get_session_id(ctx)
+
+    with session_storage.cart(session_id) as record:
+        record.items.clear()
+
     return "Cart cleared successfully."
 
+@mcp.tool()
+def apply_cart_ops(ops: List[CartOp], ctx: Context) -> Cart:
+    """Apply a batch of add/remove operations to the cart in one call, all or none, and return the final cart."""
+    session_id = get_session_id(ctx)
+
+    with session_storage.cart(session_id) as record:
+        record.items = apply_ops(record.items, ops)
+
+    return Cart(items=record.items, applied=len(ops))
+
+@mcp.tool()
+def get_session_store_stats() -> str:
+    """Report cart sessions held, memory used and evictions."""
+    return json.dumps(session_storage.stats(), indent=2)
+
+def create_app():
+    return SessionCloseMiddleware(mcp.streamable_http_app(), session_storage)
+
 if __name__ == "__main__":
-    mcp.run(transport="streamable-http") 
\ No newline at end of file
+    import uvicorn
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes; more than one uses the SQLite session store")
+    args = parser.parse_args()
+    if args.workers > 1:
+        # Workers re-import this module, so they pick the settings up from the environment
+        os.environ["CART_WORKERS"] = str(args.workers)
+        os.environ["SESSION_BACKEND"] = "sqlite"
+        uvicorn.run("stateful_server:create_app", factory=True, workers=args.workers,
+                    host=mcp.settings.host, port=mcp.settings.port)
+    else:
+        uvicorn.run(create_app(), host=mcp.settings.host, port=mcp.settings.port)
@@ -1,31 +1,30 @@
 from mcp.server.fastmcp import FastMCP, Context
 from typing import Dict, List
 import json
+from cart_ops import Cart, CartOp, apply_ops
+from mcp_logging import get_logger
 
 mcp = FastMCP("StatefulShoppingCart", stateless_http=True)
+log = get_logger("stateless_cart")
 
 session_storage: Dict[str, Dict] = {}
 
 @mcp.tool()
 def add_to_cart(item: str, quantity: int, ctx: Context) -> str:
     """Add an item to the shopping cart."""
-    print("========== add_to_cart ==========")
-    print(f"request.headers: {ctx.request_context.request.headers}")
     session_id = ctx.request_context.request.headers.get("mcp-session-id")
-    print(f"session_id: {session_id}")
+    log.debug("add_to_cart", session_id=session_id, item=item, quantity=quantity)
     if not session_id:
         return ""
     session_storage[session_id] = session_storage.get(session_id, {"cart": {}})
-    print(f"cart before: {session_storage[session_id]['cart']}")
     session_storage[session_id]["cart"][item] = session_storage[session_id]["cart"].get(item, 0) + quantity
-    print(f"cart after: {session_storage[session_id]['cart']}")
     return f"{session_storage[session_id]['cart']}"
 
 @mcp.tool()
 def remove_from_cart(item: str, quantity: int, ctx: Context) -> str:
     """Remove an item from the shopping cart."""
-    print("========== remove_from_cart ==========")
     session_id = ctx.request_context.request.headers.get("mcp-session-id")
+    log.debug("remove_from_cart", session_id=session_id, item=item, quantity=quantity)
     
     if not session_id:
         return ""
@@ -40,6 +39,18 @@ def remove_from_cart(item: str, quantity: int, ctx: Context) -> str:
     
     return f"{session_storage[session_id]['cart']}"
 
+@mcp.tool()
+def apply_cart_ops(ops: List[CartOp], ctx: Context) -> Cart:
+    """Apply a batch of add/remove operations to the cart in one call, all or none, and return the final cart."""
+    session_id = ctx.request_context.request.headers.get("mcp-session-id")
+    
+    if not session_id:
+        # Nothing outlives the request here, so the batch starts from an empty cart
+        return Cart(items=apply_ops({}, ops), applied=len(ops))
+    cart = session_storage.get(session_id, {"cart": {}})["cart"]
+    session_storage[session_id] = {"cart": apply_ops(cart, ops)}
+    return Cart(items=session_storage[session_id]["cart"], applied=len(ops))
+
 
 if __name__ == "__main__":
     mcp.run(transport="streamable-http") 
\ No newline at end of file
@@ -0,0 +1,97 @@
+"""Benchmark tool selection over synthetic catalogs of 1k-10k tools.
+
+    TOOL_EMBEDDINGS=local python bench_tool_selection.py --sizes 1000,5000,10000
+
+Each catalog is built from domain x object x action combinations. Every query
+is written for one target tool with different wording, and recall@k is
+the share of queries whose target is in the selected group. Also reports the
+cold build, the warm start from the on-disk cache, and an incremental update
+after 1% of the tools change, compared with a full rebuild.
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from typing import List, Tuple
+
+from langchain_core.tools import StructuredTool
+from mcp_tool_catalog import ACTIONS, combinations
+from tool_index import ToolIndex, get_embeddings
+
+
+def catalog(size: int, seed: int = 0) -> List[StructuredTool]:
+    return [
+        StructuredTool(
+            name=f"{domain}_{action}_{obj}",
+            description=f"{action.capitalize()} a {obj} in the {domain} system.",
+            args_schema={
+                "type": "object",
+                "properties": {f"{obj}_id": {"type": "string"}, "note": {"type": "string"}},
+                "required": [f"{obj}_id"],
+            },
+            func=lambda **kwargs: "",
+        )
+        for domain, obj, action in combinations(size, seed)
+    ]
+
+
+def queries(tools: List[StructuredTool], count: int, seed: int = 1) -> List[Tuple[str, str]]:
+    rng = random.Random(seed)
+    out = []
+    for tool in rng.sample(tools, min(count, len(tools))):
+        domain, action, obj = tool.name.split("_", 2)
+        phrase = rng.choice(ACTIONS[action])
+        out.append((f"please {phrase} {obj} from {domain}", tool.name))
+    return out
+
+
+def percentile(samples: List[float], p: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def run(size: int, k: int, query_count: int):
+    tools = catalog(size)
+    with tempfile.TemporaryDirectory() as cache_dir, tempfile.TemporaryDirectory() as rebuild_dir:
+        cold = ToolIndex(get_embeddings(), cache_dir)
+        cold.build(tools)
+        warm = ToolIndex(get_embeddings(), cache_dir)
+        warm.build(tools)
+
+        # 1% of the tools get a new description, as after a server release
+        changed = list(tools)
+        for i in random.Random(2).sample(range(size), max(1, size // 100)):
+            tool = changed[i]
+            changed[i] = StructuredTool(
+                name=tool.name, description=tool.description + " Supports bulk mode.",
+                args_schema=tool.args_schema, func=tool.func,
+            )
+        warm.update(changed)
+        rebuild = ToolIndex(get_embeddings(), rebuild_dir)
+        rebuild.build(changed)
+
+        latencies, hits_at_1, hits_at_k = [], 0, 0
+        for query, target in queries(changed, query_count):
+            start = time.perf_counter()
+            names = [name for name, _ in warm.select(query, k=k)]
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits_at_1 += names[:1] == [target]
+            hits_at_k += target in names
+
+    print(
+        f"{size:>6} tools | cold build {cold.build_ms:8.1f} ms | warm start {warm.build_ms:7.1f} ms"
+        f" | update {warm.update_ms:7.1f} ms vs rebuild {rebuild.build_ms:8.1f} ms"
+        f" | select p50 {statistics.median(latencies):.3f} ms p99 {percentile(latencies, 0.99):.3f} ms"
+        f" | recall@1 {hits_at_1 / len(latencies):.2f} recall@{k} {hits_at_k / len(latencies):.2f}"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,2500,5000,10000")
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    for size in (int(size) for size in args.sizes.split(",")):
+        run(size, args.k, args.queries)
@@ -2,51 +2,72 @@ import asyncio
 from dotenv import load_dotenv
 from mcp.client.streamable_http import streamablehttp_client
 from mcp import ClientSession
+from mcp.types import ServerNotification, ToolListChangedNotification
 from langchain_mcp_adapters.tools import load_mcp_tools
 from langgraph.prebuilt import create_react_agent
 from langchain_openai import ChatOpenAI
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain_core.documents import Document
 from langchain.tools import Tool
 from langchain.agents import AgentType
+from agent_cache import AgentCache
+from tool_index import ToolIndex, get_embeddings
 
 load_dotenv()
 
 async def main() -> None:
+    # Set by the server's notifications/tools/list_changed; the tools are reloaded
+    # before the next turn, since requests cannot be awaited inside the handler
+    tools_changed = asyncio.Event()
+
+    async def message_handler(message) -> None:
+        if isinstance(message, ServerNotification) and isinstance(message.root, ToolListChangedNotification):
+            tools_changed.set()
+
     async with streamablehttp_client("http://localhost:8000/mcp") as (read_stream, write_stream, _):
-        async with ClientSession(read_stream, write_stream) as session:
+        async with ClientSession(read_stream, write_stream, message_handler=message_handler) as session:
 
             await session.initialize()
             all_tools = await load_mcp_tools(session)
+            tools_by_name = {tool.name: tool for tool in all_tools}
             print(f"✅ Connected! Found {len(all_tools)} tools: {[tool.name for tool in all_tools]}")
 
-            docs = [Document(page_content=t.description, metadata={"tool_name": t.name}) for t in all_tools]
-            embeddings = OpenAIEmbeddings()
-            vectorstore = FAISS.from_documents(docs, embeddings)
-
-            def select_tool(query: str, k: int = 2):
-                results = vectorstore.similarity_search_with_score(query, k=k)
-                best_match = min(results, key=lambda x: x[1])
-                doc, score = best_match
-                selected_tool_name = doc.metadata['tool_name']
-                print(f"doc: {doc}")
-                selected_tool = next((tool for tool in all_tools if tool.name == selected_tool_name), None)
-                print(f"selected_tool: {selected_tool}")
-                return selected_tool
+            # Only tools that are new or changed since the last run get embedded
+            tool_index = ToolIndex(get_embeddings())
+            tool_index.build(all_tools)
+            print(f"Tool index: {tool_index.stats()}")
+
+            def select_tools(query: str):
+                matches = tool_index.select(query)
+                print(f"selected tools: {[(name, round(similarity, 3)) for name, similarity in matches]}")
+                return [tools_by_name[name] for name, _ in matches]
                 
             model = ChatOpenAI(model="gpt-4o", temperature=0.1)
+            # One compiled agent per selected tool set, reused across turns
+            agents = AgentCache(lambda tools: create_react_agent(
+                model=model,
+                tools=tools,
+                prompt="You are a helpful assistant."
+            ))
 
             while True:
                 user_input = input("\n🙂: ").strip()
                 
-                selected_tool = select_tool(user_input)
+                if user_input.lower() in ["exit", "quit", "bye"]:
+                    print(f"Tool index: {tool_index.stats()}")
+                    print(f"Agent cache: {agents.stats()}")
+                    break
+                
+                if tools_changed.is_set():
+                    tools_changed.clear()
+                    all_tools = await load_mcp_tools(session)
+                    tools_by_name = {tool.name: tool for tool in all_tools}
+                    tool_index.update(all_tools)
+                    # Cached agents may hold the old definition of a changed tool
+                    agents.clear()
+                    print(f"🔄 Tools changed: {tool_index.stats()}")
+                
+                selected_tools = select_tools(user_input)
                 
-                agent = create_react_agent(
-                    model=model,
-                    tools=[selected_tool],
-                    prompt="You are a helpful assistant."
-                )
+                agent = agents.get(selected_tools)
                 print("🤖: ", end="", flush=True)
                 async for token, metadata in agent.astream(
                     {"messages": [{"role": "user", "content": user_input}]},
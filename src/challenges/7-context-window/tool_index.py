@@ -0,0 +1,242 @@
+"""FAISS index over tool descriptions, persisted on disk between runs.
+
+Each tool is keyed by a hash of its name, description and input schema.
+Embeddings are cached per key, so on startup only new or changed tools are
+embedded; if the tool set is unchanged the saved FAISS index is loaded as is.
+When the server's tool list changes, update() adds and removes only the
+tools that differ instead of rebuilding the index.
+
+    index = ToolIndex(get_embeddings())
+    vectorstore = index.build(all_tools)
+    matches = index.select("what's the weather in Paris?")   # top-k, cutoff, token budget
+    print(index.stats())
+
+Configured from the environment:
+
+- TOOL_EMBEDDINGS   openai or local (default openai); local needs no network
+- TOOL_INDEX_DIR    cache directory (default .tool_index)
+- TOOL_TOP_K, TOOL_MIN_SIMILARITY, TOOL_TOKEN_BUDGET
+                    select() defaults (3, 0.2, 1500)
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+from langchain_core.tools import BaseTool
+
+
+class HashingEmbeddings(Embeddings):
+    """Local embeddings from hashed words and word pairs; no model, no network.
+
+    Much weaker than a real embedding model, but deterministic and fast,
+    which is enough to match queries against short tool descriptions offline.
+    """
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+        self.cache_key = f"hashing-{dim}"
+
+    def _embed(self, text: str) -> List[float]:
+        words = re.findall(r"[a-z0-9]+", text.lower())
+        vector = [0.0] * self.dim
+        for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = math.sqrt(sum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def get_embeddings() -> Embeddings:
+    """Embedding backend selected by TOOL_EMBEDDINGS"""
+    backend = os.getenv("TOOL_EMBEDDINGS", "openai")
+    if backend == "local":
+        return HashingEmbeddings()
+    if backend == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings()
+    raise ValueError(f"Unknown TOOL_EMBEDDINGS: {backend!r}")
+
+
+def tool_schema(tool: BaseTool) -> dict:
+    # MCP tools carry their JSON schema as a dict; native LangChain tools have a pydantic model
+    return tool.args_schema if isinstance(tool.args_schema, dict) else tool.args
+
+
+def tool_fingerprint(tool: BaseTool) -> str:
+    payload = json.dumps(
+        {"name": tool.name, "description": tool.description, "schema": tool_schema(tool)},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def estimate_tokens(tool: BaseTool) -> int:
+    """Rough prompt cost of a tool: about four characters per token for its description and schema"""
+    return (len(tool.name) + len(tool.description) + len(json.dumps(tool_schema(tool), default=str))) // 4 + 8
+
+
+class ToolIndex:
+    def __init__(self, embeddings: Embeddings, cache_dir: Optional[str] = None):
+        self.embeddings = embeddings
+        # Vectors from different models are not comparable, so each gets its own directory
+        backend_key = getattr(embeddings, "cache_key", None) or (
+            f"{type(embeddings).__name__}-{getattr(embeddings, 'model', 'default')}"
+        )
+        self.path = Path(cache_dir or os.getenv("TOOL_INDEX_DIR", ".tool_index")) / backend_key
+        self.vectorstore: Optional[FAISS] = None
+        self.top_k = int(os.getenv("TOOL_TOP_K", 3))
+        self.min_similarity = float(os.getenv("TOOL_MIN_SIMILARITY", 0.2))
+        self.token_budget = int(os.getenv("TOOL_TOKEN_BUDGET", 1500))
+        self.embedded = 0
+        self.reused = 0
+        self.index_loaded = False
+        self.build_ms = 0.0
+        self.updates = 0
+        self.added = 0
+        self.removed = 0
+        self.update_ms = 0.0
+        self.selections = 0
+        self.select_seconds = 0.0
+
+    def _load_vectors(self) -> Dict[str, np.ndarray]:
+        keys_file, vectors_file = self.path / "vectors.json", self.path / "vectors.npy"
+        if not (keys_file.exists() and vectors_file.exists()):
+            return {}
+        keys = json.loads(keys_file.read_text())
+        return dict(zip(keys, np.load(vectors_file)))
+
+    def _save(self, vectors: Dict[str, np.ndarray]):
+        keys = list(vectors)
+        np.save(self.path / "vectors.npy", np.array([vectors[key] for key in keys], dtype=np.float32))
+        (self.path / "vectors.json").write_text(json.dumps(keys))
+        self.vectorstore.save_local(str(self.path))
+        (self.path / "index.json").write_text(json.dumps(sorted(keys)))
+
+    def _embed_missing(self, cached: Dict[str, np.ndarray], tools: Dict[str, BaseTool]) -> int:
+        """Embed the tools whose fingerprint is not in `cached`, adding them to it"""
+        missing = [fp for fp in tools if fp not in cached]
+        if missing:
+            vectors = self.embeddings.embed_documents([tools[fp].description for fp in missing])
+            for fp, vector in zip(missing, vectors):
+                cached[fp] = np.asarray(vector, dtype=np.float32)
+        return len(missing)
+
+    @staticmethod
+    def _entries(fingerprints: List[str], tools: Dict[str, BaseTool], cached: Dict[str, np.ndarray]):
+        return (
+            [(tools[fp].description, cached[fp].tolist()) for fp in fingerprints],
+            [{"tool_name": tools[fp].name, "tokens": estimate_tokens(tools[fp])} for fp in fingerprints],
+        )
+
+    def build(self, tools: List[BaseTool]) -> FAISS:
+        """FAISS index over `tools`, embedding only tools whose fingerprint is not cached"""
+        start = time.perf_counter()
+        self.path.mkdir(parents=True, exist_ok=True)
+        by_fingerprint = {tool_fingerprint(tool): tool for tool in tools}
+        manifest = self.path / "index.json"
+
+        if manifest.exists() and json.loads(manifest.read_text()) == sorted(by_fingerprint):
+            self.vectorstore = FAISS.load_local(
+                str(self.path), self.embeddings, allow_dangerous_deserialization=True
+            )
+            self.index_loaded = True
+            self.reused = len(tools)
+        else:
+            cached = self._load_vectors()
+            self.embedded = self._embed_missing(cached, by_fingerprint)
+            self.reused = len(tools) - self.embedded
+
+            fingerprints = list(by_fingerprint)
+            text_embeddings, metadatas = self._entries(fingerprints, by_fingerprint, cached)
+            self.vectorstore = FAISS.from_embeddings(text_embeddings, self.embeddings, metadatas=metadatas, ids=fingerprints)
+            # Only the current tools are kept, so the cache does not grow with every change
+            self._save({fp: cached[fp] for fp in fingerprints})
+
+        self.build_ms = (time.perf_counter() - start) * 1000
+        return self.vectorstore
+
+    def update(self, tools: List[BaseTool]) -> FAISS:
+        """Bring the index in line with a new tool list, touching only tools that were added, removed or changed"""
+        start = time.perf_counter()
+        by_fingerprint = {tool_fingerprint(tool): tool for tool in tools}
+        current = set(self.vectorstore.index_to_docstore_id.values())
+        removed = [fp for fp in current if fp not in by_fingerprint]
+        added = [fp for fp in by_fingerprint if fp not in current]
+
+        if removed:
+            self.vectorstore.delete(removed)
+        cached = self._load_vectors()
+        self.embedded += self._embed_missing(cached, {fp: by_fingerprint[fp] for fp in added})
+        if added:
+            text_embeddings, metadatas = self._entries(added, by_fingerprint, cached)
+            self.vectorstore.add_embeddings(text_embeddings, metadatas=metadatas, ids=added)
+        self._save({fp: cached[fp] for fp in by_fingerprint})
+
+        self.updates += 1
+        self.added += len(added)
+        self.removed += len(removed)
+        self.update_ms = (time.perf_counter() - start) * 1000
+        return self.vectorstore
+
+    def select(
+        self,
+        query: str,
+        k: Optional[int] = None,
+        min_similarity: Optional[float] = None,
+        token_budget: Optional[int] = None,
+    ) -> List[Tuple[str, float]]:
+        """Up to `k` (tool name, similarity) pairs, best first.
+
+        Tools below `min_similarity` are left out, as is any tool that would take
+        the group past `token_budget`. The best match is always returned.
+        """
+        start = time.perf_counter()
+        k = k or self.top_k
+        min_similarity = self.min_similarity if min_similarity is None else min_similarity
+        token_budget = token_budget or self.token_budget
+
+        selected, tokens = [], 0
+        for doc, distance in self.vectorstore.similarity_search_with_score(query, k=k):
+            # Squared L2 distance between unit vectors, turned back into cosine similarity
+            similarity = 1.0 - float(distance) / 2.0
+            cost = doc.metadata.get("tokens", 0)
+            if selected and (similarity < min_similarity or tokens + cost > token_budget):
+                continue
+            selected.append((doc.metadata["tool_name"], similarity))
+            tokens += cost
+
+        self.selections += 1
+        self.select_seconds += time.perf_counter() - start
+        return selected
+
+    def stats(self) -> dict:
+        return {
+            "tools": self.vectorstore.index.ntotal if self.vectorstore else 0,
+            "embedded": self.embedded,
+            "reused": self.reused,
+            "index_loaded": self.index_loaded,
+            "build_ms": round(self.build_ms, 1),
+            "updates": self.updates,
+            "added": self.added,
+            "removed": self.removed,
+            "last_update_ms": round(self.update_ms, 1),
+            "selections": self.selections,
+            "avg_select_ms": round(self.select_seconds * 1000 / self.selections, 3) if self.selections else 0.0,
+            "cache_dir": str(self.path),
+        }
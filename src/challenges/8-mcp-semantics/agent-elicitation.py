@@ -1,4 +1,5 @@
 import asyncio
+import os
 import uuid
 from dotenv import load_dotenv
 from mcp.client.streamable_http import streamablehttp_client
@@ -6,7 +7,8 @@ from mcp import ClientSession
 from langchain_mcp_adapters.tools import load_mcp_tools
 from langchain_openai import ChatOpenAI
 from langgraph.prebuilt import create_react_agent
-from langgraph.checkpoint.memory import InMemorySaver
+from mcp_history import BoundedSaver
+from mcp_tool_compaction import ToolCompactor
 from mcp.types import ElicitRequestParams, ElicitResult, LoggingMessageNotificationParams
 from mcp.shared.context import RequestContext
 
@@ -41,25 +43,44 @@ async def main():
             tools = await load_mcp_tools(session)
             print(f"✅ Connection successful! Found {len(tools)} tools.")
             print(f"Available tools: {[tool.name for tool in tools]}")
+            # The nested order schemas are trimmed to TOOL_SCHEMA_BUDGET, if set, until the model calls the tool
+            compactor = ToolCompactor(tools)
+            print(f"Tool schemas: {compactor.report()}")
 
             model = ChatOpenAI(model="gpt-4o", temperature=1.5)
-            checkpointer = InMemorySaver()
+            # Recent turns verbatim, older ones summarized; HISTORY_DB persists them
+            checkpointer = BoundedSaver()
             agent = create_react_agent(
                 model=model,
-                tools=tools,
+                tools=compactor.tools(),
                 prompt="You are a helpful assistant.",
                 checkpointer=checkpointer
             )
             
-            config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+            # Set HISTORY_THREAD_ID to resume a conversation saved in HISTORY_DB
+            config = {
+                "configurable": {"thread_id": os.getenv("HISTORY_THREAD_ID") or str(uuid.uuid4())},
+                # The timer counts model calls and their latency for the report
+                "callbacks": [compactor.timer],
+            }
             
             while True:
                 user_input = input("\n🙂: ")
                 
                 if user_input.lower() in ["exit", "quit", "bye"]:
+                    print(f"Tool schemas: {compactor.report()}")
                     print("\n🤖: Goodbye!")
                     break
                 
+                if compactor.changed():
+                    # The conversation lives in the checkpointer, so the thread carries over
+                    agent = create_react_agent(
+                        model=model,
+                        tools=compactor.tools(),
+                        prompt="You are a helpful assistant.",
+                        checkpointer=checkpointer
+                    )
+                
                 print("🤖: ", end="", flush=True)
                 async for token, metadata in agent.astream(
                     {"messages": [{"role": "user", "content": user_input}]},
@@ -69,6 +90,7 @@ async def main():
                     if not getattr(token, "tool_call_id", None):
                         print(token.content, end="", flush=True)
                         await asyncio.sleep(0.08)
+                compactor.record_turn()
                     
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,12 +1,14 @@
 import asyncio
+import os
 import uuid
 from dotenv import load_dotenv
 from mcp.client.streamable_http import streamablehttp_client
-from mcp import ClientSession
 from langchain_mcp_adapters.tools import load_mcp_tools
 from langchain_openai import ChatOpenAI
 from langgraph.prebuilt import create_react_agent
-from langgraph.checkpoint.memory import InMemorySaver
+from mcp_history import BoundedSaver
+from mcp_tool_compaction import ToolCompactor
+from mcp_sampling import ConcurrentClientSession, SamplingLimiter
 from mcp.types import LoggingMessageNotificationParams, CreateMessageRequestParams, CreateMessageResult, TextContent
 from mcp.shared.context import RequestContext
 from langchain_core.messages import HumanMessage
@@ -20,16 +22,18 @@ model = ChatOpenAI(model="gpt-4o", temperature=1.5)
 async def logging_callback(params: LoggingMessageNotificationParams):
     print(f"\n[Server Log - {params.level.upper()}] {params.data}")
 
+class SoupOrderValidationResult(BaseModel):
+    """Soup order validation check result."""
+    valid: bool = Field(description="True if the item is valid, False otherwise.")
+    reason: str = Field(description="Explanation for why the item is valid or not.")
+
+parser = PydanticOutputParser(pydantic_object=SoupOrderValidationResult)
+
 async def sampling_callback(ctx: RequestContext, params: CreateMessageRequestParams) -> CreateMessageResult:
     """Handle sampling requests from MCP server."""
     print(f"[Sampling]: 🍲 {params.messages[0].content.text}")
-    class SoupOrderValidationResult(BaseModel):
-        """Soup order validation check result."""
-        valid: bool = Field(description="True if the item is valid, False otherwise.")
-        reason: str = Field(description="Explanation for why the item is valid or not.")
-    parser = PydanticOutputParser(pydantic_object=SoupOrderValidationResult)
     prompt = f"{params.messages[0].content.text} {parser.get_format_instructions()}"
-    result = model.invoke([HumanMessage(content=prompt)])
+    result = await model.ainvoke([HumanMessage(content=prompt)])
     parsed_result = parser.invoke(result)
     print(f"[Sampling]: 🍲 result: {parsed_result}")
     
@@ -43,36 +47,60 @@ async def sampling_callback(ctx: RequestContext, params: CreateMessageRequestPar
         stopReason="endTurn",
     )
 
+# SAMPLING_CONCURRENCY requests run at once, up to SAMPLING_QUEUE more wait, each gets SAMPLING_TIMEOUT seconds
+sampler = SamplingLimiter(sampling_callback)
+
 async def main():
     async with streamablehttp_client("http://localhost:8000/mcp") as (read_stream, write_stream, _):
-        async with ClientSession(
+        # Sampling runs in background tasks, so tool results and logs keep arriving meanwhile
+        async with ConcurrentClientSession(
             read_stream, 
             write_stream,
             logging_callback=logging_callback,
-            sampling_callback=sampling_callback
+            sampling_callback=sampler
         ) as session:
             await session.initialize()
             tools = await load_mcp_tools(session)
             print(f"✅ Connection successful! Found {len(tools)} tools.")
             print(f"Available tools: {[tool.name for tool in tools]}")
+            # The nested order schemas are trimmed to TOOL_SCHEMA_BUDGET, if set, until the model calls the tool
+            compactor = ToolCompactor(tools)
+            print(f"Tool schemas: {compactor.report()}")
             
-            checkpointer = InMemorySaver()
+            # Recent turns verbatim, older ones summarized; HISTORY_DB persists them
+            checkpointer = BoundedSaver()
             agent = create_react_agent(
                 model=model,
-                tools=tools,
+                tools=compactor.tools(),
                 prompt="You are a helpful assistant.",
                 checkpointer=checkpointer
             )
             
-            config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+            # Set HISTORY_THREAD_ID to resume a conversation saved in HISTORY_DB
+            config = {
+                "configurable": {"thread_id": os.getenv("HISTORY_THREAD_ID") or str(uuid.uuid4())},
+                # The timer counts model calls and their latency for the report
+                "callbacks": [compactor.timer],
+            }
             
             while True:
                 user_input = input("\n🙂: ")
                 
                 if user_input.lower() in ["exit", "quit", "bye"]:
+                    print(f"Tool schemas: {compactor.report()}")
+                    print(f"Sampling: {sampler.stats()}")
                     print("\n🤖: Goodbye!")
                     break
                 
+                if compactor.changed():
+                    # The conversation lives in the checkpointer, so the thread carries over
+                    agent = create_react_agent(
+                        model=model,
+                        tools=compactor.tools(),
+                        prompt="You are a helpful assistant.",
+                        checkpointer=checkpointer
+                    )
+                
                 print("🤖: ", end="", flush=True)
                 async for token, metadata in agent.astream(
                     {"messages": [{"role": "user", "content": user_input}]},
@@ -82,6 +110,7 @@ async def main():
                     if not getattr(token, "tool_call_id", None):
                         print(token.content, end="", flush=True)
                         await asyncio.sleep(0.08)
+                compactor.record_turn()
                     
 if __name__ == "__main__":
     asyncio.run(main())
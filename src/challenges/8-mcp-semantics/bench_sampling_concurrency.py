@@ -0,0 +1,97 @@
+"""Tool-call throughput while sampling requests are in flight, per client sampling setup.
+
+    python bench_sampling_concurrency.py --soups 16 --llm-ms 500 --pizzas 200
+
+Runs this server in-process. A fake LLM sleeps --llm-ms per sampling request,
+either blocking the loop (time.sleep, like a sync model.invoke) or not
+(asyncio.sleep, like model.ainvoke). --soups order_soup calls are started
+together; each one samples, and the validation cache is off. Meanwhile
+order_pizza calls, which don't sample, run back to back until the soups are done
+or --pizzas have completed. The bench reports their latency and rate next to
+the time the soups took.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import anyio
+from mcp import ClientSession
+from mcp.shared.memory import create_client_server_memory_streams
+from mcp.types import CreateMessageResult, TextContent
+from mcp_sampling import ConcurrentClientSession, SamplingLimiter
+from server import mcp, validation_cache
+
+VALID = '{"valid": true, "reason": "ok"}'
+
+
+def fake_llm(llm_ms: float, blocking: bool):
+    async def sampling_callback(context, params):
+        if blocking:
+            time.sleep(llm_ms / 1000)
+        else:
+            await asyncio.sleep(llm_ms / 1000)
+        return CreateMessageResult(role="assistant", model="fake", content=TextContent(type="text", text=VALID))
+    return sampling_callback
+
+
+async def run(session_class, sampling_callback, soups: int, pizzas: int):
+    async with create_client_server_memory_streams() as ((client_read, client_write), (server_read, server_write)):
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(lambda: mcp._mcp_server.run(server_read, server_write, mcp._mcp_server.create_initialization_options()))
+            async with session_class(client_read, client_write, sampling_callback=sampling_callback) as session:
+                await session.initialize()
+                soup_orders = [
+                    {"soup_type": f"soup {n}", "soup_size": "large", "extra": "bread"} for n in range(soups)
+                ]
+                start = time.perf_counter()
+                soup_calls = asyncio.gather(*(session.call_tool("order_soup", {"order": order}) for order in soup_orders))
+                soup_task = asyncio.ensure_future(soup_calls)
+                latencies = []
+                while not soup_task.done() and len(latencies) < pizzas:
+                    call_start = time.perf_counter()
+                    await session.call_tool("order_pizza", {"order": {
+                        "pizza_type": "margherita", "pizza_size": "small", "extra_cheese": "true",
+                    }})
+                    latencies.append((time.perf_counter() - call_start) * 1000)
+                pizza_s = time.perf_counter() - start
+                results = await soup_task
+                soups_s = time.perf_counter() - start
+                errors = sum(result.isError for result in results)
+            tg.cancel_scope.cancel()
+    return latencies, pizza_s, soups_s, errors
+
+
+async def main(soups: int, llm_ms: float, pizzas: int, concurrency: int, timeout: float):
+    validation_cache.ttl = 0
+    setups = [
+        ("sync LLM, ClientSession", ClientSession, lambda: fake_llm(llm_ms, blocking=True)),
+        ("async LLM, ClientSession", ClientSession, lambda: fake_llm(llm_ms, blocking=False)),
+        (f"async LLM, concurrent, limit {concurrency}", ConcurrentClientSession,
+         lambda: SamplingLimiter(fake_llm(llm_ms, blocking=False), concurrency, soups, timeout)),
+        (f"async LLM, concurrent, limit {soups}", ConcurrentClientSession,
+         lambda: SamplingLimiter(fake_llm(llm_ms, blocking=False), soups, soups, timeout)),
+    ]
+    for name, session_class, callback in setups:
+        sampling_callback = callback()
+        latencies, pizza_s, soups_s, errors = await run(session_class, sampling_callback, soups, pizzas)
+        line = (
+            f"{name:<32} | {soups} soups in {soups_s:6.2f} s ({errors} errors)"
+            f" | {len(latencies):4} pizzas, p50 {statistics.median(latencies):7.1f} ms"
+            f" max {max(latencies):7.1f} ms, {len(latencies) / pizza_s:7.1f}/s"
+        )
+        if isinstance(sampling_callback, SamplingLimiter):
+            stats = sampling_callback.stats()
+            line += f" | max queued {stats['max_queued']}, avg wait {stats['avg_wait_ms']} ms"
+        print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--soups", type=int, default=16)
+    parser.add_argument("--llm-ms", type=float, default=500)
+    parser.add_argument("--pizzas", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+    asyncio.run(main(args.soups, args.llm_ms, args.pizzas, args.concurrency, args.timeout))
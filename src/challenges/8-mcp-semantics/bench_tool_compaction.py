@@ -0,0 +1,63 @@
+"""Prompt tokens and model latency with full vs compacted tool schemas.
+
+    python bench_tool_compaction.py --budgets 0,350,0.5 --calls 20
+
+Loads this server's tools in-process, as load_mcp_tools() sees them, and prints
+the schema tokens sent per model call for each budget. With OPENAI_API_KEY
+set, it also times model calls that carry the tools and generate one token,
+so the difference is mostly the time spent reading the schemas. The ms per
+saved token it prints is the value for TOOL_PREFILL_MS_PER_TOKEN.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from dotenv import load_dotenv
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp.shared.memory import create_connected_server_and_client_session
+from mcp_tool_compaction import ToolCompactor
+from server import mcp
+
+load_dotenv()
+
+
+async def time_calls(tools, calls: int) -> float:
+    from langchain_openai import ChatOpenAI
+    model = ChatOpenAI(model="gpt-4o", temperature=0, max_tokens=1).bind_tools(tools)
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await model.ainvoke("Which tool would you use to order a large chicken soup?")
+        latencies.append((time.perf_counter() - start) * 1000)
+    return statistics.median(latencies)
+
+
+async def main(budgets, calls: int):
+    async with create_connected_server_and_client_session(mcp._mcp_server) as session:
+        tools = await load_mcp_tools(session)
+        baseline_ms = baseline_tokens = None
+        for budget in budgets:
+            compactor = ToolCompactor(tools, budget)
+            report = compactor.report()
+            line = (
+                f"budget {f'{budget:g}' if budget else 'off':>5} = {report['budget']:4} tokens | level {report['level']} | {report['sent_tokens']:5} tokens"
+                f" | saved {report['saved_tokens_per_call']:5} per call ({report['token_counter']})"
+            )
+            if os.getenv("OPENAI_API_KEY"):
+                p50 = await time_calls(compactor.tools(), calls)
+                if baseline_ms is None:
+                    baseline_ms, baseline_tokens = p50, report["sent_tokens"]
+                line += f" | p50 {p50:7.1f} ms | saved {baseline_ms - p50:6.1f} ms per call"
+                if baseline_tokens > report["sent_tokens"]:
+                    line += f" ({(baseline_ms - p50) / (baseline_tokens - report['sent_tokens']):.3f} ms per token)"
+            print(line)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budgets", default="0,350,0.5", help="tokens, or below 1 a fraction; 0 (no compaction) first, as the baseline")
+    parser.add_argument("--calls", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main([float(budget) for budget in args.budgets.split(",")], args.calls))
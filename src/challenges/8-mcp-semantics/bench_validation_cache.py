@@ -0,0 +1,89 @@
+"""order_soup latency and sampling round trips with and without the validation cache.
+
+    python bench_validation_cache.py --orders 200 --distinct 20 --llm-ms 400
+
+Runs this server in-process with a sampling callback that stands in for the
+client's LLM. The callback sleeps --llm-ms and answers "valid". Orders are
+drawn from --distinct soups, with random case and spacing. They are sent one
+at a time, then --concurrency at a time.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+from mcp.shared.memory import create_connected_server_and_client_session
+from mcp.types import CreateMessageResult, TextContent
+from server import mcp, validation_cache
+
+SOUPS = ["chicken", "beef", "tomato", "miso", "lentil", "onion", "pumpkin", "mushroom", "pea", "fish"]
+SIZES = ["small", "medium", "large"]
+EXTRAS = ["bread", "croutons", "cheese", "noodles"]
+
+
+def orders(count: int, distinct: int, seed: int = 0):
+    rng = random.Random(seed)
+    menu = [(soup, size, extra) for soup in SOUPS for size in SIZES for extra in EXTRAS]
+    menu = rng.sample(menu, distinct)
+    out = []
+    for _ in range(count):
+        soup, size, extra = rng.choice(menu)
+        if rng.random() < 0.5:
+            soup = f" {soup.capitalize()} "
+        out.append({"soup_type": soup, "soup_size": size, "extra": extra})
+    return out
+
+
+async def run(workload, concurrency: int, llm_ms: float):
+    sampled = 0
+
+    async def sampling_callback(context, params):
+        nonlocal sampled
+        sampled += 1
+        await asyncio.sleep(llm_ms / 1000)
+        return CreateMessageResult(
+            role="assistant", model="fake",
+            content=TextContent(type="text", text=json.dumps({"valid": True})),
+        )
+
+    async with create_connected_server_and_client_session(mcp._mcp_server, sampling_callback=sampling_callback) as session:
+        latencies = []
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def order(arguments):
+            async with semaphore:
+                start = time.perf_counter()
+                await session.call_tool("order_soup", {"order": arguments})
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(order(arguments) for arguments in workload))
+        total_s = time.perf_counter() - start
+    return sampled, latencies, total_s
+
+
+async def main(count: int, distinct: int, llm_ms: float, concurrency: int):
+    workload = orders(count, distinct)
+    for parallel in (1, concurrency):
+        for enabled in (False, True):
+            validation_cache.clear()
+            validation_cache.ttl = 600 if enabled else 0
+            sampled, latencies, total_s = await run(workload, parallel, llm_ms)
+            print(
+                f"concurrency {parallel:>3} | cache {'on ' if enabled else 'off'} | {sampled:4} sampling calls"
+                f" | p50 {statistics.median(latencies):7.1f} ms | mean {statistics.mean(latencies):7.1f} ms"
+                f" | {count / total_s:7.1f} orders/s"
+            )
+    print(validation_cache.stats())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--distinct", type=int, default=20)
+    parser.add_argument("--llm-ms", type=float, default=400)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.orders, args.distinct, args.llm_ms, args.concurrency))
@@ -5,6 +5,9 @@ from pydantic import BaseModel, Field, create_model
 from typing import Optional
 from mcp.types import SamplingMessage, TextContent
 import json
+import logging
+from mcp_logging import get_logger
+from validation_cache import ValidationCache, schema_version
 
 class PizzaOrder(BaseModel):
     """Schema for pizza order."""
@@ -36,7 +39,18 @@ def clone_model_with_values(model: BaseModel, instance: BaseModel) -> BaseModel:
         }
     )
 
+SOUP_VALIDATION_PROMPT = """Check if this user's soup order is semantically valid: {order}, 
+    verify the 'extra' field is semantically relevant to the soup order,
+    here is the order schema: {schema}.
+    - If valid, respond with "valid: true".
+    - If invalid, respond with "valid: false" and the "reason: <reason>".
+    """
+# Changes whenever the schema or the prompt does, so stale verdicts are never reused
+SOUP_SCHEMA_VERSION = schema_version(SoupOrder, SOUP_VALIDATION_PROMPT)
+
 mcp = FastMCP("PizzaMCP")
+log = get_logger("pizza")
+validation_cache = ValidationCache()
 
 @mcp.tool("order_pizza")
 async def order_pizza(
@@ -44,7 +58,7 @@ async def order_pizza(
     ctx: Context
 ) -> str:
     """Order a pizza."""
-    print(f"order: {order}")
+    log.debug("order_pizza", order=order)
     await ctx.info(f"order: {order}")
     if order.extra_cheese.lower() not in {"true", "false"}:
         PizzaOrderClone = clone_model_with_values(PizzaOrder, order)        
@@ -52,12 +66,12 @@ async def order_pizza(
             message=(f"Please enter a valid value for extra cheese."),
             schema=PizzaOrderClone
         )
-        print(f"result: {result}")
+        log.debug("order_pizza elicitation", action=result.action)
         if result.action == "accept" and result.data:
             if result.data.extra_cheese:
                 order.extra_cheese = result.data.extra_cheese
     order.id = id({})
-    print(f"order: {order}")
+    log.info("order_pizza placed", order=order.model_dump())
     return f"Your pizza order has been placed with id: {order.id}."
 
 
@@ -67,32 +81,34 @@ async def order_soup(
     ctx: Context
 ) -> str:
     """Order a soup."""
-    print(f"order: {order}")
+    log.debug("order_soup", order=order)
     await ctx.info(f"order: {order}")
     
-    prompt = f"""Check if this user's soup order is semantically valid: {order.model_dump()}, 
-    verify the 'extra' field is semantically relevant to the soup order,
-    here is the order schema: {SoupOrder.model_json_schema()}.
-    - If valid, respond with "valid: true".
-    - If invalid, respond with "valid: false" and the "reason: <reason>".
-    """
-    result = await ctx.session.create_message(
-        messages=[
-            SamplingMessage(
-                role="user",
-                content=TextContent(type="text", text=prompt),
-            )
-        ],
-        max_tokens=100,
-    )
-    print(f"result: {result}")
-    semantic_analysis = json.loads(result.content.text)
+    async def validate() -> dict:
+        prompt = SOUP_VALIDATION_PROMPT.format(order=order.model_dump(), schema=SoupOrder.model_json_schema())
+        result = await ctx.session.create_message(
+            messages=[
+                SamplingMessage(
+                    role="user",
+                    content=TextContent(type="text", text=prompt),
+                )
+            ],
+            max_tokens=100,
+        )
+        log.debug("order_soup validation", result=result.content.text)
+        return json.loads(result.content.text)
+
+    # Orders that only differ in case, whitespace or id reuse an earlier verdict
+    semantic_analysis = await validation_cache.get_or_load(validation_cache.key(order, SOUP_SCHEMA_VERSION), validate)
+    if log.enabled(logging.DEBUG):
+        # stats() builds a dict, so only pay for it when it will be logged
+        log.debug("order_soup validation cache", **validation_cache.stats())
     if not semantic_analysis['valid']:
-        print(f"semantic_analysis: {semantic_analysis['reason']}")
+        log.info("order_soup rejected", reason=semantic_analysis['reason'])
         return semantic_analysis['reason']
     
     order.id = id({})
-    print(f"order: {order}")
+    log.info("order_soup placed", order=order.model_dump())
     return f"Your soup order has been placed with id: {order.id}."
 
 
@@ -0,0 +1,117 @@
+"""TTL + LRU cache of semantic-validation results, so repeated orders skip the sampling round trip.
+
+    cache = ValidationCache()
+    version = schema_version(SoupOrder, SOUP_VALIDATION_PROMPT)
+    result = await cache.get_or_load(cache.key(order, version), lambda: validate(order))
+    if log.enabled(logging.DEBUG):
+        log.debug("validation cache", **cache.stats())
+
+The key is the order with its fields normalized (case, surrounding and repeated
+whitespace) and the server-assigned id left out, plus a version hashed from the
+order schema and the validation prompt. Editing either one starts a fresh set
+of keys. Identical orders that arrive while one validation is in flight wait
+for it instead of sending their own. Failed validations are not cached.
+Configured from the environment:
+
+- VALIDATION_CACHE_SIZE   results kept, least recently used dropped first (default 1024)
+- VALIDATION_CACHE_TTL    seconds a result is reused, 0 to disable the cache (default 600)
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from pydantic import BaseModel
+
+
+def schema_version(model: type, *extra: str) -> str:
+    """Short hash of the model's JSON schema and anything else the result depends on"""
+    payload = json.dumps([model.model_json_schema(), *extra], sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()[:12]
+
+
+def normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    return value
+
+
+class ValidationCache:
+    def __init__(self, max_entries: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_entries = max_entries or int(os.getenv("VALIDATION_CACHE_SIZE", 1024))
+        self.ttl = float(os.getenv("VALIDATION_CACHE_TTL", 600)) if ttl is None else ttl
+        self._entries: "OrderedDict[Tuple, Tuple[Any, float]]" = OrderedDict()
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.load_seconds = 0.0
+
+    def key(self, order: BaseModel, version: str, exclude: Iterable[str] = ("id",)) -> Tuple:
+        fields = order.model_dump(exclude=set(exclude))
+        return (version, type(order).__name__, *((name, normalize(fields[name])) for name in sorted(fields)))
+
+    async def get_or_load(self, key: Tuple, load: Callable[[], Awaitable[Any]]) -> Any:
+        """The cached result for `key`, or the result of `load()`, cached if it returns"""
+        if self.ttl <= 0:
+            return await load()
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, cached_at = entry
+            if time.monotonic() - cached_at <= self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.expirations += 1
+            del self._entries[key]
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            await asyncio.wait([inflight])
+            if not inflight.cancelled() and inflight.exception() is None:
+                self.coalesced += 1
+                return inflight.result()
+            # The validation this call waited for failed; try again with our own
+
+        self.misses += 1
+        future = self._inflight[key] = asyncio.get_running_loop().create_future()
+        start = time.perf_counter()
+        try:
+            value = await load()
+        except BaseException:
+            future.cancel()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+            self.load_seconds += time.perf_counter() - start
+        future.set_result(value)
+        self._entries[key] = (value, time.monotonic())
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        avg_load_ms = self.load_seconds * 1000 / self.misses if self.misses else 0.0
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 3) if lookups else 0.0,
+            "avg_validation_ms": round(avg_load_ms, 1),
+            # Every hit or coalesced wait would have been a sampling round trip
+            "estimated_ms_saved": round((self.hits + self.coalesced) * avg_load_ms, 1),
+        }
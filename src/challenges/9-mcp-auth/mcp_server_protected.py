@@ -2,6 +2,7 @@ import httpx
 from mcp.server.fastmcp import FastMCP, Context
 from mcp.server.auth.provider import TokenVerifier, AccessToken
 from mcp.server.auth.settings import AuthSettings
+from mcp_logging import get_logger
 
 # Configuration constants
 AUTH_SERVER_URL = "http://localhost:3000"
@@ -45,16 +46,18 @@ mcp = FastMCP(
     ),
 )
 
+log = get_logger("protected")
+
 @mcp.tool()
 def protected_tool_1(ctx: Context) -> str:
     """Protected tool 1 - requires auth"""
-    print(f"ctx.request_context: {ctx.request_context.request.scope}")
+    log.debug("protected_tool_1", path=ctx.request_context.request.scope["path"])
     return "This is protected data 1"
 
 @mcp.tool()
 def protected_tool_2(ctx: Context) -> str:
     """Protected tool 2 - requires auth"""
-    print(f"ctx.request_context: {ctx.request_context.request.scope}")
+    log.debug("protected_tool_2", path=ctx.request_context.request.scope["path"])
     return "This is protected data 2"
 
 if __name__ == "__main__":
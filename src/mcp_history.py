@@ -0,0 +1,279 @@
+"""A LangGraph checkpointer that keeps conversation history bounded.
+
+InMemorySaver keeps every checkpoint of a thread, and the agent resends the
+whole message history on every turn. BoundedSaver keeps the last
+`window_turns` turns verbatim and folds older turns into one summary message
+at the start of the history. It also keeps only the newest checkpoints of a
+thread. With a path it writes through to SQLite and loads the file on start,
+so a conversation resumes where it stopped:
+
+    checkpointer = BoundedSaver(path="history.sqlite3")
+    agent = create_react_agent(model=model, tools=tools, checkpointer=checkpointer)
+    print(checkpointer.stats(thread_id))
+
+A turn starts at a user message. History is only cut between turns, so a tool
+call is never separated from its result. Configured from the environment:
+
+- HISTORY_WINDOW_TURNS   turns kept verbatim (default 10)
+- HISTORY_SUMMARY_CHARS  size of the summary of older turns (default 2000)
+- HISTORY_MAX_BYTES      cap per thread for kept messages; more turns move into
+                         the summary when it is exceeded (default 256 KiB)
+- HISTORY_DB             SQLite file to persist to (default: memory only)
+"""
+import os
+import sqlite3
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata
+from langgraph.checkpoint.memory import InMemorySaver
+
+SUMMARY_ID = "history-summary"
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+
+Summarize = Callable[[str, List[List[BaseMessage]]], str]
+
+
+def _text(message: BaseMessage, limit: int) -> str:
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    content = " ".join(content.split())
+    return content if len(content) <= limit else content[:limit - 3] + "..."
+
+
+def summarize_turns(summary: str, turns: List[List[BaseMessage]], max_chars: int = 2000) -> str:
+    """Extractive summary: one line per turn with the request, the tools used and the answer.
+
+    Lines past `max_chars` are dropped oldest first. Pass an LLM-backed
+    function with the same signature to BoundedSaver for real summaries.
+    """
+    lines = summary.splitlines()[1:] if summary else []
+    for turn in turns:
+        request = next((_text(m, 120) for m in turn if isinstance(m, HumanMessage)), "")
+        tools = sorted({call["name"] for m in turn if isinstance(m, AIMessage) for call in m.tool_calls})
+        answer = next((_text(m, 120) for m in reversed(turn) if isinstance(m, AIMessage) and m.content), "")
+        line = f"- user: {request}"
+        if tools:
+            line += f" | tools: {', '.join(tools)}"
+        lines.append(f"{line} | assistant: {answer}")
+    while lines and sum(len(line) + 1 for line in lines) > max_chars:
+        lines.pop(0)
+    return "\n".join([SUMMARY_HEADER] + lines)
+
+
+def _size(message: BaseMessage) -> int:
+    size = len(message.content) if isinstance(message.content, str) else len(str(message.content))
+    if isinstance(message, AIMessage):
+        size += sum(len(str(call["args"])) for call in message.tool_calls)
+    return size
+
+
+class BoundedSaver(InMemorySaver):
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        window_turns: Optional[int] = None,
+        summary_chars: Optional[int] = None,
+        max_thread_bytes: Optional[int] = None,
+        keep_checkpoints: int = 2,
+        summarize: Optional[Summarize] = None,
+    ):
+        super().__init__()
+        self.window_turns = window_turns or int(os.getenv("HISTORY_WINDOW_TURNS", 10))
+        self.summary_chars = summary_chars or int(os.getenv("HISTORY_SUMMARY_CHARS", 2000))
+        self.max_thread_bytes = max_thread_bytes or int(os.getenv("HISTORY_MAX_BYTES", 256 * 1024))
+        self.keep_checkpoints = keep_checkpoints
+        self.summarize = summarize or (lambda summary, turns: summarize_turns(summary, turns, self.summary_chars))
+        self.path = path if path is not None else os.getenv("HISTORY_DB")
+        self.summarized_turns: Dict[str, int] = {}
+        # thread -> (summary in, evicted message ids, summary out); put() runs several
+        # times per turn on the same history, and the summarizer may be an LLM call
+        self._last_summary: Dict[str, tuple] = {}
+        self.checkpoints_pruned = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if self.path:
+            self._open_db()
+
+    # --- compaction ---
+
+    def compact(self, thread_id: str, messages: Sequence[BaseMessage]) -> List[BaseMessage]:
+        """The window of recent turns, preceded by a summary of everything older"""
+        summary = ""
+        if messages and messages[0].id == SUMMARY_ID:
+            summary, messages = messages[0].content, messages[1:]
+
+        turns: List[List[BaseMessage]] = []
+        for message in messages:
+            if isinstance(message, HumanMessage) or not turns:
+                turns.append([])
+            turns[-1].append(message)
+
+        keep = len(turns)
+        if keep > self.window_turns:
+            keep = self.window_turns
+        size = sum(_size(m) for turn in turns[-keep:] for m in turn)
+        while keep > 1 and size > self.max_thread_bytes:
+            size -= sum(_size(m) for m in turns[-keep])
+            keep -= 1
+
+        evicted = turns[:len(turns) - keep]
+        if evicted:
+            evicted_ids = tuple(turn[0].id for turn in evicted)
+            last = self._last_summary.get(thread_id)
+            if last is not None and last[0] == summary and last[1] == evicted_ids:
+                summary = last[2]
+            else:
+                new_summary = self.summarize(summary, evicted)
+                self._last_summary[thread_id] = (summary, evicted_ids, new_summary)
+                self.summarized_turns[thread_id] = self.summarized_turns.get(thread_id, 0) + len(evicted)
+                summary = new_summary
+        kept = [m for turn in turns[len(turns) - keep:] for m in turn]
+        return ([SystemMessage(content=summary, id=SUMMARY_ID)] if summary else []) + kept
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        values = checkpoint["channel_values"]
+        if "messages" in new_versions and isinstance(values.get("messages"), list):
+            # The running graph keeps its own copy; the next turn starts from this one
+            checkpoint = {**checkpoint, "channel_values": {**values, "messages": self.compact(thread_id, values["messages"])}}
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        pruned_ids, pruned_blobs = self._prune(thread_id, checkpoint_ns)
+        if self._db is not None:
+            self._persist_put(thread_id, checkpoint_ns, checkpoint["id"], new_versions, pruned_ids, pruned_blobs)
+        return saved
+
+    def _prune(self, thread_id: str, checkpoint_ns: str):
+        """Drop all but the newest checkpoints of a thread, with their writes and unreferenced blobs"""
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.keep_checkpoints:
+            return [], []
+        ids = sorted(checkpoints)
+        pruned_ids = ids[:-self.keep_checkpoints]
+        for checkpoint_id in pruned_ids:
+            del checkpoints[checkpoint_id]
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+        self.checkpoints_pruned += len(pruned_ids)
+
+        referenced = set()
+        for saved, _, _ in checkpoints.values():
+            referenced.update(self.serde.loads_typed(saved)["channel_versions"].items())
+        pruned_blobs = [
+            key for key in self.blobs
+            if key[0] == thread_id and key[1] == checkpoint_ns and (key[2], key[3]) not in referenced
+        ]
+        for key in pruned_blobs:
+            del self.blobs[key]
+        return pruned_ids, pruned_blobs
+
+    # --- SQLite write-through ---
+
+    def _open_db(self):
+        self._db = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS checkpoints (thread_id TEXT, ns TEXT, id TEXT, type TEXT, data BLOB,"
+            " metadata_type TEXT, metadata BLOB, parent TEXT, PRIMARY KEY (thread_id, ns, id));"
+            "CREATE TABLE IF NOT EXISTS blobs (thread_id TEXT, ns TEXT, channel TEXT, version TEXT, type TEXT,"
+            " data BLOB, PRIMARY KEY (thread_id, ns, channel, version));"
+            "CREATE TABLE IF NOT EXISTS writes (thread_id TEXT, ns TEXT, checkpoint_id TEXT, task_id TEXT,"
+            " idx INTEGER, channel TEXT, type TEXT, data BLOB, task_path TEXT,"
+            " PRIMARY KEY (thread_id, ns, checkpoint_id, task_id, idx));"
+        )
+        for thread_id, ns, checkpoint_id, type_, data, metadata_type, metadata, parent in self._db.execute(
+            "SELECT thread_id, ns, id, type, data, metadata_type, metadata, parent FROM checkpoints"
+        ):
+            self.storage[thread_id][ns][checkpoint_id] = ((type_, data), (metadata_type, metadata), parent)
+        for thread_id, ns, channel, version, type_, data in self._db.execute(
+            "SELECT thread_id, ns, channel, version, type, data FROM blobs"
+        ):
+            self.blobs[(thread_id, ns, channel, version)] = (type_, data)
+        for thread_id, ns, checkpoint_id, task_id, idx, channel, type_, data, task_path in self._db.execute(
+            "SELECT thread_id, ns, checkpoint_id, task_id, idx, channel, type, data, task_path FROM writes"
+        ):
+            self.writes[(thread_id, ns, checkpoint_id)][(task_id, idx)] = (task_id, channel, (type_, data), task_path)
+
+    def _persist_put(self, thread_id, ns, checkpoint_id, new_versions, pruned_ids, pruned_blobs):
+        (type_, data), (metadata_type, metadata), parent = self.storage[thread_id][ns][checkpoint_id]
+        db = self._db
+        db.execute("BEGIN")
+        try:
+            db.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, ns, checkpoint_id, type_, data, metadata_type, metadata, parent),
+            )
+            db.executemany(
+                "INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (thread_id, ns, channel, version, *self.blobs[(thread_id, ns, channel, version)])
+                    for channel, version in new_versions.items()
+                ],
+            )
+            db.executemany(
+                "DELETE FROM checkpoints WHERE thread_id = ? AND ns = ? AND id = ?",
+                [(thread_id, ns, pruned) for pruned in pruned_ids],
+            )
+            db.executemany(
+                "DELETE FROM writes WHERE thread_id = ? AND ns = ? AND checkpoint_id = ?",
+                [(thread_id, ns, pruned) for pruned in pruned_ids],
+            )
+            db.executemany(
+                "DELETE FROM blobs WHERE thread_id = ? AND ns = ? AND channel = ? AND version = ?",
+                pruned_blobs,
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        super().put_writes(config, writes, task_id, task_path)
+        if self._db is None:
+            return
+        key = (
+            config["configurable"]["thread_id"],
+            config["configurable"].get("checkpoint_ns", ""),
+            config["configurable"]["checkpoint_id"],
+        )
+        self._db.executemany(
+            "INSERT OR REPLACE INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (*key, task_id_, idx, channel, type_, data, path)
+                for (task_id_, idx), (_, channel, (type_, data), path) in self.writes[key].items()
+                if task_id_ == task_id
+            ],
+        )
+
+    def delete_thread(self, thread_id: str) -> None:
+        super().delete_thread(thread_id)
+        self.summarized_turns.pop(thread_id, None)
+        self._last_summary.pop(thread_id, None)
+        if self._db is not None:
+            for table in ("checkpoints", "blobs", "writes"):
+                self._db.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def stats(self, thread_id: Optional[str] = None) -> dict:
+        threads = [thread_id] if thread_id else list(self.storage)
+        blob_bytes = sum(len(blob[1]) for key, blob in self.blobs.items() if key[0] in threads)
+        return {
+            "threads": len(threads),
+            "checkpoints": sum(len(ns) for t in threads for ns in self.storage[t].values()),
+            "blob_bytes": blob_bytes,
+            "summarized_turns": sum(self.summarized_turns.get(t, 0) for t in threads),
+            "checkpoints_pruned": self.checkpoints_pruned,
+            "window_turns": self.window_turns,
+            "db": self.path,
+        }
@@ -0,0 +1,174 @@
+"""Shared logging for the example servers: levels, sampling and a queue-backed handler.
+
+    from mcp_logging import get_logger
+    log = get_logger("weather")
+    log.info("get_weather", latitude=latitude, longitude=longitude)
+
+Tools only build a LogRecord and put it on a bounded queue; formatting and
+writing to stderr happen on a background thread. Records below the level,
+or sampled out, are dropped before a record is built. Configured from the environment:
+
+- MCP_LOG_LEVEL    DEBUG / INFO / WARNING / ERROR / OFF (default INFO)
+- MCP_LOG_SAMPLE   fraction of DEBUG / INFO records kept, 0..1 (default 1);
+                   WARNING and above are always kept
+- MCP_LOG_FORMAT   json or text (default json)
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import time
+from typing import Any, Dict, Optional, TextIO
+
+ROOT = "mcp.app"
+OFF = logging.CRITICAL + 10
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops records when the queue is full instead of blocking the caller"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.enqueued = 0
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting is left to the listener thread
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            self.enqueued += 1
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+            **getattr(record, "fields", {}),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        fields = " ".join(f"{key}={value!r}" for key, value in getattr(record, "fields", {}).items())
+        line = f"{time.strftime('%H:%M:%S', time.localtime(record.created))} {record.levelname:<7} {record.name} {record.getMessage()} {fields}"
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class StructuredLogger:
+    """Thin wrapper that logs an event name plus keyword fields"""
+
+    __slots__ = ("logger",)
+
+    def __init__(self, logger: logging.Logger):
+        self.logger = logger
+
+    def enabled(self, level: int) -> bool:
+        return self.logger.isEnabledFor(level)
+
+    def log(self, level: int, event: str, exc_info: Any = None, **fields: Any):
+        global _sampled_out
+        if not self.logger.isEnabledFor(level):
+            return
+        # Sampled out before a record is built, so a dropped record costs almost nothing
+        if level < logging.WARNING and _sample_rate < 1.0 and random.random() >= _sample_rate:
+            _sampled_out += 1
+            return
+        if exc_info is True:
+            exc_info = sys.exc_info()
+        # makeRecord + handle skips Logger.log's caller lookup, which walks the stack
+        self.logger.handle(self.logger.makeRecord(
+            self.logger.name, level, "", 0, event, (), exc_info, extra={"fields": fields}
+        ))
+
+    def debug(self, event: str, **fields: Any):
+        self.log(logging.DEBUG, event, **fields)
+
+    def info(self, event: str, **fields: Any):
+        self.log(logging.INFO, event, **fields)
+
+    def warning(self, event: str, **fields: Any):
+        self.log(logging.WARNING, event, **fields)
+
+    def error(self, event: str, **fields: Any):
+        self.log(logging.ERROR, event, **fields)
+
+    def exception(self, event: str, **fields: Any):
+        self.log(logging.ERROR, event, exc_info=True, **fields)
+
+
+_handler: Optional[DroppingQueueHandler] = None
+_sample_rate = 1.0
+_sampled_out = 0
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure(
+    level: Optional[str] = None,
+    sample_rate: Optional[float] = None,
+    fmt: Optional[str] = None,
+    queue_size: int = 10_000,
+    stream: Optional[TextIO] = None,
+):
+    """(Re)configure the shared handler; called automatically by the first get_logger()"""
+    global _handler, _sample_rate, _listener
+    shutdown()
+    level = (level or os.getenv("MCP_LOG_LEVEL", "INFO")).upper()
+    _sample_rate = float(os.getenv("MCP_LOG_SAMPLE", 1.0)) if sample_rate is None else sample_rate
+    fmt = fmt or os.getenv("MCP_LOG_FORMAT", "json")
+
+    root = logging.getLogger(ROOT)
+    root.setLevel(OFF if level == "OFF" else logging.getLevelName(level))
+    root.propagate = False
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    output = logging.StreamHandler(stream)
+    output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    _handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    root.addHandler(_handler)
+    _listener = logging.handlers.QueueListener(_handler.queue, output)
+    _listener.start()
+
+
+def shutdown():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def get_logger(name: str) -> StructuredLogger:
+    if _handler is None:
+        configure()
+    return StructuredLogger(logging.getLogger(f"{ROOT}.{name}"))
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        "level": logging.getLevelName(logging.getLogger(ROOT).level),
+        "sample_rate": _sample_rate,
+        "sampled_out": _sampled_out,
+        "enqueued": _handler.enqueued if _handler else 0,
+        "dropped": _handler.dropped if _handler else 0,
+    }
+
+
+atexit.register(shutdown)
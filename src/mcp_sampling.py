@@ -0,0 +1,132 @@
+"""Serve sampling requests concurrently without holding up the rest of the session.
+
+ClientSession awaits the sampling callback inside its receive loop. Until the
+LLM answers, no tool result, notification or other request on that session is
+read. ConcurrentClientSession runs each sampling request in its own task
+instead, and SamplingLimiter bounds how many run at once:
+
+    sampler = SamplingLimiter(sampling_callback)
+    async with ConcurrentClientSession(read, write, sampling_callback=sampler) as session:
+        ...
+    print(sampler.stats())
+
+Requests over the limit wait in a bounded queue. One that finds the queue full,
+or is not answered within the timeout, gets an MCP error back. The waiting
+server tool does not hang. Configured from the environment:
+
+- SAMPLING_CONCURRENCY   sampling requests run at once (default 4)
+- SAMPLING_QUEUE         requests waiting for a slot before new ones are rejected (default 32)
+- SAMPLING_TIMEOUT       seconds from arrival to answer, queueing included, 0 for none (default 60)
+"""
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from mcp import ClientSession, types
+from mcp.client.session import ClientResponse
+from mcp.shared.context import RequestContext
+from mcp.shared.session import RequestResponder
+
+SamplingCallback = Callable[
+    [RequestContext, types.CreateMessageRequestParams],
+    Awaitable[types.CreateMessageResult | types.ErrorData],
+]
+
+
+class SamplingLimiter:
+    """Wraps a sampling callback with a concurrency limit, a bounded queue and a timeout"""
+
+    def __init__(
+        self,
+        callback: SamplingCallback,
+        max_concurrency: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        timeout: Optional[float] = None,
+    ):
+        self.callback = callback
+        self.max_concurrency = max_concurrency or int(os.getenv("SAMPLING_CONCURRENCY", 4))
+        self.max_queue = int(os.getenv("SAMPLING_QUEUE", 32)) if max_queue is None else max_queue
+        self.timeout = float(os.getenv("SAMPLING_TIMEOUT", 60)) if timeout is None else timeout
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self.running = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    async def __call__(self, ctx: RequestContext, params: types.CreateMessageRequestParams):
+        if self.queued >= self.max_queue and self._slots.locked():
+            self.rejected += 1
+            return types.ErrorData(code=types.INTERNAL_ERROR, message="Sampling queue is full, try again later")
+        try:
+            return await asyncio.wait_for(self._run(ctx, params), self.timeout or None)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            return types.ErrorData(code=types.INTERNAL_ERROR, message=f"Sampling timed out after {self.timeout:g}s")
+
+    async def _run(self, ctx: RequestContext, params: types.CreateMessageRequestParams):
+        arrived = time.perf_counter()
+        self.queued += 1
+        self.max_queued = max(self.max_queued, self.queued)
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        started = time.perf_counter()
+        self.wait_seconds += started - arrived
+        self.running += 1
+        try:
+            result = await self.callback(ctx, params)
+        except Exception as e:
+            self.failed += 1
+            return types.ErrorData(code=types.INTERNAL_ERROR, message=f"Sampling failed: {e}")
+        finally:
+            self.running -= 1
+            self.run_seconds += time.perf_counter() - started
+            self._slots.release()
+        self.completed += 1
+        return result
+
+    def stats(self) -> dict:
+        started = self.completed + self.failed
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "timeout_s": self.timeout,
+            "running": self.running,
+            "queued": self.queued,
+            "max_queued": self.max_queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.wait_seconds * 1000 / started, 1) if started else 0.0,
+            "avg_run_ms": round(self.run_seconds * 1000 / started, 1) if started else 0.0,
+        }
+
+
+class ConcurrentClientSession(ClientSession):
+    """ClientSession that answers sampling requests from background tasks"""
+
+    async def _received_request(self, responder: RequestResponder[types.ServerRequest, types.ClientResult]) -> None:
+        if isinstance(responder.request.root, types.CreateMessageRequest):
+            # The receive loop moves on to the next message right away
+            self._task_group.start_soon(self._sample, responder)
+            return
+        await super()._received_request(responder)
+
+    async def _sample(self, responder: RequestResponder[types.ServerRequest, types.ClientResult]) -> None:
+        ctx = RequestContext[ClientSession, Any](
+            request_id=responder.request_id,
+            meta=responder.request_meta,
+            session=self,
+            lifespan_context=None,
+        )
+        with responder:
+            response = await self._sampling_callback(ctx, responder.request.root.params)
+            await responder.respond(ClientResponse.validate_python(response))
@@ -0,0 +1,172 @@
+"""A pool of initialized MCP client sessions to one streamable HTTP server.
+
+    async with SessionPool("http://localhost:8000/mcp", size=4) as pool:
+        async with pool.acquire() as session:
+            await session.call_tool("add_to_cart", {"item": "apple", "quantity": 1})
+        print(pool.stats())
+
+Opening a session costs a connection plus the initialize handshake. The pool
+pays that once per session and hands sessions out to concurrent callers.
+A session idle for longer than `health_check_after` gets a ping before it is
+handed out. Sessions that fail a ping, raise a transport error, or reach
+`max_uses` are closed and replaced. `headers` may be a function, called for
+each session opened, to give every session headers of its own.
+"""
+import asyncio
+import contextlib
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+import anyio
+import httpx
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+
+class PooledSession:
+    """One pooled session, owned by a task that keeps its transport contexts open.
+
+    anyio cancel scopes must be exited by the task that entered them, so the
+    session is opened and closed inside `_run` and never by a caller.
+    """
+
+    __slots__ = ("session", "uses", "last_used", "_ready", "_close", "_task", "_error")
+
+    def __init__(self):
+        self.session: Optional[ClientSession] = None
+        self.uses = 0
+        self.last_used = time.monotonic()
+        self._ready = asyncio.Event()
+        self._close = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._error: Optional[BaseException] = None
+
+    async def open(self, url: str, headers: Optional[Dict[str, str]], logging_callback=None):
+        self._task = asyncio.create_task(self._run(url, headers, logging_callback))
+        await self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    async def _run(self, url: str, headers: Optional[Dict[str, str]], logging_callback):
+        try:
+            async with streamablehttp_client(url, headers=headers) as (read, write, _):
+                async with ClientSession(read, write, logging_callback=logging_callback) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._close.wait()
+        except Exception as e:
+            self._error = e
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def close(self):
+        self._close.set()
+        if self._task is not None:
+            await self._task
+
+
+class SessionPool:
+    def __init__(
+        self,
+        url: str,
+        size: int = 4,
+        headers: Union[Dict[str, str], Callable[[], Dict[str, str]], None] = None,
+        max_uses: Optional[int] = None,
+        health_check_after: float = 30.0,
+        logging_callback=None,
+    ):
+        self.url = url
+        self.size = size
+        self.headers = headers
+        self.max_uses = max_uses
+        self.health_check_after = health_check_after
+        self.logging_callback = logging_callback
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._all: List[PooledSession] = []
+        self.handshakes = 0
+        self.handshake_seconds = 0.0
+        self.acquisitions = 0
+        self.health_checks = 0
+        self.recycled = 0
+
+    async def __aenter__(self) -> "SessionPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        for pooled in await asyncio.gather(*(self._open() for _ in range(self.size))):
+            self._idle.put_nowait(pooled)
+
+    async def _open(self) -> PooledSession:
+        pooled = PooledSession()
+        start = time.perf_counter()
+        headers = self.headers() if callable(self.headers) else self.headers
+        await pooled.open(self.url, headers, self.logging_callback)
+        self.handshake_seconds += time.perf_counter() - start
+        self.handshakes += 1
+        self._all.append(pooled)
+        return pooled
+
+    async def _replace(self, pooled: PooledSession) -> PooledSession:
+        self.recycled += 1
+        if pooled in self._all:
+            self._all.remove(pooled)
+            await pooled.close()
+        return await self._open()
+
+    async def _healthy(self, pooled: PooledSession) -> bool:
+        if pooled.session is None:
+            return False
+        if time.monotonic() - pooled.last_used < self.health_check_after:
+            return True
+        self.health_checks += 1
+        try:
+            with anyio.fail_after(5):
+                await pooled.session.send_ping()
+            return True
+        except Exception:
+            return False
+
+    @contextlib.asynccontextmanager
+    async def acquire(self):
+        """Borrow a session for the duration of the block; waits while every session is in use"""
+        pooled: PooledSession = await self._idle.get()
+        try:
+            if not await self._healthy(pooled):
+                pooled = await self._replace(pooled)
+            self.acquisitions += 1
+            pooled.uses += 1
+            try:
+                yield pooled.session
+            except (httpx.TransportError, anyio.ClosedResourceError, anyio.BrokenResourceError):
+                pooled = await self._replace(pooled)
+                raise
+            if self.max_uses is not None and pooled.uses >= self.max_uses:
+                pooled = await self._replace(pooled)
+        finally:
+            pooled.last_used = time.monotonic()
+            self._idle.put_nowait(pooled)
+
+    async def close(self):
+        await asyncio.gather(*(pooled.close() for pooled in self._all))
+        self._all.clear()
+
+    def stats(self) -> dict:
+        avg_handshake_ms = self.handshake_seconds * 1000 / self.handshakes if self.handshakes else 0.0
+        # Every acquisition would have been a handshake with connect-per-use
+        saved = max(0, self.acquisitions - self.handshakes)
+        return {
+            "size": self.size,
+            "acquisitions": self.acquisitions,
+            "handshakes": self.handshakes,
+            "handshakes_saved": saved,
+            "avg_handshake_ms": round(avg_handshake_ms, 3),
+            "estimated_ms_saved": round(saved * avg_handshake_ms, 1),
+            "health_checks": self.health_checks,
+            "recycled": self.recycled,
+        }
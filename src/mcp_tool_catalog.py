@@ -0,0 +1,46 @@
+"""Vocabulary for synthetic tool catalogs, shared by the tool selection and tool search benchmarks.
+
+    for domain, obj, action in combinations(1000):
+        name = f"{domain}_{action}_{obj}"
+
+Each tool is one domain x object x action combination, 12,000 in all. ACTIONS
+maps every action to other ways of saying it, so queries can be worded
+differently from the tool they target.
+"""
+import random
+from typing import List, Tuple
+
+DOMAINS = [
+    "billing", "inventory", "shipping", "payroll", "crm", "support", "marketing", "analytics",
+    "weather", "finance", "calendar", "email", "storage", "security", "hr", "recruiting",
+    "travel", "maps", "search", "music", "video", "photos", "notes", "tasks", "chat",
+    "devops", "monitoring", "database", "network", "iot", "health", "fitness", "education",
+    "legal", "insurance", "banking", "trading", "retail", "logistics", "energy",
+]
+OBJECTS = [
+    "invoice", "order", "customer", "account", "report", "ticket", "user", "product",
+    "shipment", "payment", "forecast", "event", "message", "file", "alert", "record",
+    "contract", "policy", "device", "metric", "campaign", "document", "schedule", "quote", "budget",
+    "vendor", "warehouse", "lead", "survey", "license",
+]
+ACTIONS = {
+    "create": ["make a new", "add a", "open a new"],
+    "get": ["look up the", "show me the", "fetch the"],
+    "update": ["change the", "edit the", "modify the"],
+    "delete": ["remove the", "get rid of the", "erase the"],
+    "list": ["show all", "give me every", "enumerate the"],
+    "search": ["find a", "look for a", "query for a"],
+    "export": ["download the", "save a copy of the", "dump the"],
+    "approve": ["sign off on the", "accept the", "okay the"],
+    "archive": ["put away the", "file away the", "retire the"],
+    "summarize": ["give me a summary of the", "recap the", "condense the"],
+}
+
+
+def combinations(count: int, seed: int = 0) -> List[Tuple[str, str, str]]:
+    """`count` distinct (domain, object, action) triples in a seeded random order"""
+    combos = [(d, o, a) for d in DOMAINS for o in OBJECTS for a in ACTIONS]
+    random.Random(seed).shuffle(combos)
+    if count > len(combos):
+        raise ValueError(f"At most {len(combos)} synthetic tools")
+    return combos[:count]
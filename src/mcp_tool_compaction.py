@@ -0,0 +1,252 @@
+"""Fit the tool schemas an agent sends to the model into a token budget.
+
+load_mcp_tools() gives the model every tool's full description and JSON
+schema on every call. ToolCompactor trims them, one step at a time, until all
+tools fit in the budget. A tool gets its full schema back once the model has
+called it:
+
+    compactor = ToolCompactor(await load_mcp_tools(session))
+    agent = create_react_agent(model=model, tools=compactor.tools())
+    ...
+    if compactor.changed():   # a compacted tool was called since the last check
+        agent = create_react_agent(model=model, tools=compactor.tools())
+    await agent.ainvoke(inputs, {"callbacks": [compactor.timer]})
+    compactor.record_turn()   # model calls and their latency, from the timer
+    print(compactor.report())
+
+Compacted tools keep the original coroutine, so calls are sent to the server
+unchanged; only what the model reads is shorter. Steps, cumulative:
+
+1. drop schema titles, null defaults and optional server-assigned fields such as
+   `id`; tool descriptions keep their first sentence
+2. parameter descriptions keep their first clause, examples are removed,
+   Optional[X] becomes X
+3. parameter descriptions are dropped; tool descriptions are cut to 80 characters
+
+Configured from the environment:
+
+- TOOL_SCHEMA_BUDGET        prompt tokens for all tool schemas, or below 1 a fraction of
+                            their full size, e.g. 0.5; 0 sends full schemas (default 0)
+- TOOL_SCHEMA_DROP_FIELDS   optional fields the server fills in itself (default id)
+- TOOL_PREFILL_MS_PER_TOKEN model time per prompt token, to estimate the latency saved;
+                            bench_tool_compaction.py measures it (default 0.1)
+
+Compaction is off unless TOOL_SCHEMA_BUDGET is set. The latency it saves is
+estimated from the tokens saved, not measured, so run bench_tool_compaction.py
+against your model to check the saving before turning it on.
+"""
+import json
+import os
+import re
+import time
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tools import BaseTool
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+MAX_LEVEL = 3
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:
+    # tiktoken downloads its vocabulary on first use; offline, estimate instead
+    _encoding = None
+
+
+def count_tokens(text: str) -> int:
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+
+def tool_tokens(tool: BaseTool) -> int:
+    """Tokens of the tool definition as the chat model receives it"""
+    return count_tokens(json.dumps(convert_to_openai_tool(tool)))
+
+
+def first_sentence(text: str) -> str:
+    return re.split(r"(?<=[.!?])\s", text.strip(), maxsplit=1)[0]
+
+
+def shorten(text: str, level: int) -> str:
+    text = first_sentence(text)
+    if level >= 2:
+        # "The size of the pizza to order, example:'small', ..." -> "The size of the pizza to order"
+        text = re.split(r",?\s*(?:e\.g\.|example|for example|such as)\b", text, maxsplit=1, flags=re.IGNORECASE)[0]
+    return text.strip()
+
+
+def compact_schema(node: Any, level: int, drop: Iterable[str] = ()) -> Any:
+    """Copy of a JSON schema with titles, defaults and descriptions trimmed for `level`.
+
+    Optional properties named in `drop` are left out, so the model does not
+    try to fill in what the server assigns.
+    """
+    if isinstance(node, list):
+        return [compact_schema(item, level, drop) for item in node]
+    if not isinstance(node, dict):
+        return node
+    required = set(node.get("required", ()))
+    out = {}
+    for key, value in node.items():
+        if key in ("properties", "$defs", "definitions", "patternProperties") and isinstance(value, dict):
+            # Keys here are names, not keywords; a property may well be called "title"
+            out[key] = {
+                name: compact_schema(schema, level, drop) for name, schema in value.items()
+                if key != "properties" or name in required or name not in drop
+            }
+        elif key == "title" and isinstance(value, str):
+            continue
+        elif key == "default" and value is None:
+            continue
+        elif key == "anyOf" and level >= 2 and isinstance(value, list) and {"type": "null"} in value and len(value) == 2:
+            # Optional[X] -> X; the field is already left out of "required"
+            out.update(compact_schema(next(item for item in value if item != {"type": "null"}), level, drop))
+        elif key == "description" and isinstance(value, str):
+            if level < 3:
+                out[key] = shorten(value, level)
+        else:
+            out[key] = compact_schema(value, level, drop)
+    return out
+
+
+def compact_description(description: str, level: int) -> str:
+    text = first_sentence(description or "")
+    if level >= 3 and len(text) > 80:
+        text = text[:77].rstrip() + "..."
+    return text
+
+
+class ModelTimer(BaseCallbackHandler):
+    """Counts chat model calls and the time they take; pass it in the agent's callbacks"""
+
+    run_inline = True
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self._started: Dict[Any, float] = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = time.perf_counter()
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id)
+
+    def _finish(self, run_id):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            self.calls += 1
+            self.seconds += time.perf_counter() - started
+
+
+class ToolCompactor:
+    def __init__(
+        self,
+        tools: List[BaseTool],
+        budget: Union[int, float, None] = None,
+        drop_fields: Optional[Iterable[str]] = None,
+    ):
+        self.full: Dict[str, BaseTool] = {tool.name: tool for tool in tools}
+        self.full_tokens = {tool.name: tool_tokens(tool) for tool in tools}
+        budget = float(os.getenv("TOOL_SCHEMA_BUDGET", 0)) if budget is None else budget
+        self.budget = int(budget * sum(self.full_tokens.values())) if 0 < budget < 1 else int(budget)
+        if drop_fields is None:
+            drop_fields = [name for name in os.getenv("TOOL_SCHEMA_DROP_FIELDS", "id").split(",") if name]
+        self.drop_fields = frozenset(drop_fields)
+        self.prefill_ms_per_token = float(os.getenv("TOOL_PREFILL_MS_PER_TOKEN", 0.1))
+        self.timer = ModelTimer()
+        self._timed = (0, 0.0)
+        self.model_seconds = 0.0
+        self.called: set = set()
+        self._seen_called: frozenset = frozenset()
+        self.level = 0
+        self.compacted: Dict[str, BaseTool] = dict(self.full)
+        self.compact_tokens = dict(self.full_tokens)
+        self.turns = 0
+        self.model_calls = 0
+        self.tokens_saved = 0
+        if self.budget > 0:
+            self._fit()
+
+    def _fit(self):
+        for level in range(1, MAX_LEVEL + 1):
+            if sum(self.compact_tokens.values()) <= self.budget:
+                break
+            self.level = level
+            for name, tool in self.full.items():
+                self.compacted[name] = self._compact(tool, level)
+                self.compact_tokens[name] = tool_tokens(self.compacted[name])
+
+    def _compact(self, tool: BaseTool, level: int) -> BaseTool:
+        schema = tool.args_schema if isinstance(tool.args_schema, dict) else tool.tool_call_schema.model_json_schema()
+        coroutine = tool.coroutine
+
+        async def call(*args, **kwargs):
+            # From the next agent build on, the model sees this tool's full schema
+            self.called.add(tool.name)
+            return await coroutine(*args, **kwargs)
+
+        return tool.model_copy(update={
+            "description": compact_description(tool.description, level),
+            "args_schema": compact_schema(schema, level, self.drop_fields),
+            "coroutine": call if coroutine is not None else None,
+        })
+
+    def tools(self) -> List[BaseTool]:
+        """Full tools for those already called, compacted tools for the rest"""
+        self._seen_called = frozenset(self.called)
+        return [self.full[name] if name in self.called else self.compacted[name] for name in self.full]
+
+    def changed(self) -> bool:
+        """True if tools() would now return a different set of schemas"""
+        return frozenset(self.called) != self._seen_called
+
+    def tokens(self, restored: Optional[frozenset] = None) -> int:
+        """Tokens of the schemas sent per model call once `restored` (default: every called tool) is full"""
+        restored = self.called if restored is None else restored
+        return sum(
+            self.full_tokens[name] if name in restored else self.compact_tokens[name]
+            for name in self.full
+        )
+
+    def record_turn(self, model_calls: Optional[int] = None, model_seconds: Optional[float] = None):
+        """Count a finished turn; every model call in it was sent the schemas of the last tools().
+
+        Calls and their latency default to what `timer` saw since the last turn.
+        """
+        calls, seconds = self.timer.calls - self._timed[0], self.timer.seconds - self._timed[1]
+        self._timed = (self.timer.calls, self.timer.seconds)
+        model_calls = calls if model_calls is None else model_calls
+        self.turns += 1
+        self.model_calls += model_calls
+        self.model_seconds += seconds if model_seconds is None else model_seconds
+        self.tokens_saved += model_calls * (sum(self.full_tokens.values()) - self.tokens(self._seen_called))
+
+    def report(self) -> dict:
+        full = sum(self.full_tokens.values())
+        sent = self.tokens()
+        return {
+            "tools": len(self.full),
+            "budget": self.budget,
+            "level": self.level,
+            "restored": sorted(self.called),
+            "full_tokens": full,
+            "sent_tokens": sent,
+            "saved_tokens_per_call": full - sent,
+            "turns": self.turns,
+            "model_calls": self.model_calls,
+            "tokens_saved": self.tokens_saved,
+            "tokens_saved_per_turn": round(self.tokens_saved / self.turns, 1) if self.turns else 0.0,
+            "model_ms_per_turn": round(self.model_seconds * 1000 / self.turns, 1) if self.turns else 0.0,
+            # Not measured: saved tokens times TOOL_PREFILL_MS_PER_TOKEN
+            "estimated_latency_saved_ms_per_turn": (
+                round(self.tokens_saved * self.prefill_ms_per_token / self.turns, 1) if self.turns else 0.0
+            ),
+            "token_counter": "tiktoken" if _encoding is not None else "estimate",
+        }
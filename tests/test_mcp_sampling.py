@@ -0,0 +1,72 @@
+"""ConcurrentClientSession overrides ClientSession._received_request, a private
+method of the pinned mcp version. These fail if an mcp upgrade stops calling
+the override, or if sampling goes back to blocking the receive loop."""
+import anyio
+from mcp.server.fastmcp import Context, FastMCP
+from mcp.shared.memory import create_client_server_memory_streams
+from mcp.types import CreateMessageResult, SamplingMessage, TextContent
+from mcp_sampling import ConcurrentClientSession
+
+mcp = FastMCP("sampling-test")
+
+
+@mcp.tool()
+async def ask(ctx: Context) -> str:
+    result = await ctx.session.create_message(
+        messages=[SamplingMessage(role="user", content=TextContent(type="text", text="hi"))],
+        max_tokens=10,
+    )
+    return result.content.text
+
+
+@mcp.tool()
+def echo(text: str) -> str:
+    return text
+
+
+def test_sampling_does_not_block_other_calls(monkeypatch):
+    sampled = []
+    original_sample = ConcurrentClientSession._sample
+
+    async def spy_sample(self, responder):
+        sampled.append(responder.request_id)
+        await original_sample(self, responder)
+
+    monkeypatch.setattr(ConcurrentClientSession, "_sample", spy_sample)
+
+    async def main():
+        sampling_started = anyio.Event()
+        release = anyio.Event()
+
+        async def sampling_callback(context, params):
+            sampling_started.set()
+            await release.wait()
+            return CreateMessageResult(role="assistant", model="fake", content=TextContent(type="text", text="answer"))
+
+        async with create_client_server_memory_streams() as ((client_read, client_write), (server_read, server_write)):
+            async with anyio.create_task_group() as tg:
+                tg.start_soon(lambda: mcp._mcp_server.run(
+                    server_read, server_write, mcp._mcp_server.create_initialization_options()
+                ))
+                async with ConcurrentClientSession(client_read, client_write, sampling_callback=sampling_callback) as session:
+                    await session.initialize()
+                    results = {}
+
+                    async def call_ask():
+                        results["ask"] = await session.call_tool("ask", {})
+
+                    tg.start_soon(call_ask)
+                    with anyio.fail_after(5):
+                        await sampling_started.wait()
+                        # A plain ClientSession would not read this response until sampling returned
+                        echoed = await session.call_tool("echo", {"text": "still responsive"})
+                    assert echoed.content[0].text == "still responsive"
+                    release.set()
+                    with anyio.fail_after(5):
+                        while "ask" not in results:
+                            await anyio.sleep(0.01)
+                    assert results["ask"].content[0].text == "answer"
+                tg.cancel_scope.cancel()
+
+    anyio.run(main)
+    assert len(sampled) == 1